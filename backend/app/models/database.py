@@ -16,6 +16,9 @@ class SummaryRecord(BaseModel):
     provider: str
     response_time_ms: float
     tokens_used: int
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    finish_reason: Optional[str] = None
     cost_usd: float
     max_length: Optional[int] = None
     language: str = "sl"
@@ -48,3 +51,27 @@ class ComparisonAnalysis(BaseModel):
     max_response_time_ms: float
     times_fastest: int
     times_cheapest: int
+    avg_compression_ratio: Optional[float] = None
+    avg_source_rouge1_precision: Optional[float] = None
+    avg_source_rouge2_precision: Optional[float] = None
+    avg_consensus_rouge_l: Optional[float] = None
+    avg_quality_score: Optional[float] = None
+    times_best_quality: int = 0
+
+
+class ModelRollup(BaseModel):
+    """Agregat rezultatov enega modela v enem časovnem intervalu (tabela model_rollups)"""
+    granularity: str
+    bucket_start: datetime
+    model_name: str
+    provider: str
+    result_count: int
+    sum_response_time_ms: float
+    min_response_time_ms: Optional[float] = None
+    max_response_time_ms: Optional[float] = None
+    sum_cost_usd: float
+    sum_tokens_used: int
+    times_fastest: int
+    times_cheapest: int
+    quality_count: int = 0
+    sum_quality_score: float = 0.0
@@ -1,9 +1,12 @@
 """
-API router za odločanje (decision making) na podlagi podatkov - samo comparison-analysis
+API router za odločanje (decision making) na podlagi podatkov - comparison-analysis in trendi
 """
-from fastapi import APIRouter, HTTPException
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from app.services.database_service import DatabaseService
 from app.models.database import ComparisonAnalysis
+from app.utils.metrics import merge_rollups
 
 router = APIRouter(prefix="/api/decision", tags=["decision"])
 
@@ -24,11 +27,14 @@ async def get_comparison_analysis():
         
         fastest = None
         cheapest = None
+        best_quality = None
         if analysis:
             fastest_item = max(analysis, key=lambda x: x.times_fastest)
             cheapest_item = max(analysis, key=lambda x: x.times_cheapest)
+            quality_item = max(analysis, key=lambda x: (x.times_best_quality, x.avg_quality_score or 0.0))
             fastest = fastest_item.dict() if fastest_item else None
             cheapest = cheapest_item.dict() if cheapest_item else None
+            best_quality = quality_item.dict() if quality_item.avg_quality_score is not None else None
         
         return {
             "analysis": [a.dict() for a in analysis],
@@ -36,7 +42,8 @@ async def get_comparison_analysis():
                 "total_models": len(analysis),
                 "best_performance": {
                     "fastest": fastest,
-                    "cheapest": cheapest
+                    "cheapest": cheapest,
+                    "best_quality": best_quality
                 }
             }
         }
@@ -44,3 +51,58 @@ async def get_comparison_analysis():
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Napaka pri analizi: {str(e)}")
+
+
+@router.get("/trends")
+async def get_trends(
+    granularity: Optional[str] = Query(None, description="hour ali day (privzeto glede na dolžino okna)"),
+    created_from: Optional[datetime] = Query(None, description="Začetek okna (privzeto pred 7 dnevi)"),
+    created_to: Optional[datetime] = Query(None, description="Konec okna (privzeto zdaj)"),
+    model: Optional[str] = Query(None, description="Samo ta model")
+):
+    """
+    Vrne trende modelov (hitrost, strošek, tokeni, zmage) po urah ali dnevih
+    
+    Odgovor se sestavi iz vnaprej agregiranih intervalov (model_rollups),
+    ne iz surovih rezultatov primerjav.
+    """
+    end = created_to or datetime.now(timezone.utc)
+    start = created_from or end - timedelta(days=7)
+    # Intervali v model_rollups so poravnani na UTC
+    end = end.replace(tzinfo=timezone.utc) if end.tzinfo is None else end.astimezone(timezone.utc)
+    start = start.replace(tzinfo=timezone.utc) if start.tzinfo is None else start.astimezone(timezone.utc)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="created_from mora biti pred created_to")
+    
+    if granularity is None:
+        granularity = "hour" if end - start <= timedelta(days=2) else "day"
+    if granularity not in ("hour", "day"):
+        raise HTTPException(status_code=400, detail="granularity mora biti 'hour' ali 'day'")
+    
+    # Interval, ki se začne pred oknom, je vključen v celoti
+    if granularity == "hour":
+        bucket_from = start.replace(minute=0, second=0, microsecond=0)
+    else:
+        bucket_from = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    try:
+        rollups = await DatabaseService.get_rollups(
+            granularity, bucket_from.isoformat(), end.isoformat(), model
+        )
+        
+        if not rollups:
+            raise HTTPException(
+                status_code=404,
+                detail="Ni podatkov za trende v izbranem obdobju. Najprej naredite nekaj primerjav."
+            )
+        
+        return {
+            "granularity": granularity,
+            "from": start,
+            "to": end,
+            "models": merge_rollups(rollups)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Napaka pri izračunu trendov: {str(e)}")
@@ -0,0 +1,179 @@
+"""
+API router za diagnostiko procesa - samo za administratorje (glava X-Admin-Token)
+
+Brez nastavljenega DIAGNOSTICS_ADMIN_TOKEN so vse poti izklopljene (404).
+"""
+import asyncio
+import secrets
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response
+from app.config import settings
+from app.utils.diagnostics import SamplingProfiler, memory_tracker, monitor_loop, largest_objects
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Preveri admin žeton; brez nastavljenega žetona diagnostika ne obstaja"""
+    if not settings.diagnostics_admin_token:
+        raise HTTPException(status_code=404, detail="Diagnostika ni omogočena")
+    if not x_admin_token or not secrets.compare_digest(
+        x_admin_token.encode(), settings.diagnostics_admin_token.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Neveljaven admin žeton")
+
+
+router = APIRouter(prefix="/api/diagnostics", tags=["diagnostics"], dependencies=[Depends(require_admin)])
+
+# Naenkrat teče največ en profil in eno spremljanje event loopa
+_profile_lock = asyncio.Lock()
+_loop_lock = asyncio.Lock()
+
+PROFILE_FORMATS = {
+    "collapsed": ("text/plain; charset=utf-8", "collapsed.txt"),
+    "pstats": ("application/octet-stream", "pstats")
+}
+
+
+def _attachment(content: bytes, media_type: str, filename: str, headers: Optional[dict] = None) -> Response:
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', **(headers or {})}
+    )
+
+
+@router.get("/status")
+async def get_status():
+    """
+    Vrne, katere meritve trenutno tečejo
+    """
+    return {
+        "profile_running": _profile_lock.locked(),
+        "loop_monitor_running": _loop_lock.locked(),
+        "memory": memory_tracker.get_stats()
+    }
+
+
+@router.post("/profile")
+async def profile_cpu(
+    seconds: float = Query(10.0, gt=0, description="Trajanje vzorčenja"),
+    interval_ms: float = Query(5.0, ge=1, le=100, description="Interval vzorčenja"),
+    format: str = Query("collapsed", description="collapsed (flamegraph) ali pstats")
+):
+    """
+    Vzorčni profil CPU vseh niti za seconds sekund - prenos kot datoteka
+
+    collapsed: vhod za flamegraph.pl / speedscope; pstats: pstats.Stats(datoteka), snakeviz
+    """
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Nepodprt format '{format}'. Podprti: {', '.join(PROFILE_FORMATS)}"
+        )
+    if seconds > settings.diagnostics_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Profil je lahko dolg največ {settings.diagnostics_max_seconds:g} s"
+        )
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="Profil že teče")
+
+    async with _profile_lock:
+        profiler = SamplingProfiler(interval_ms)
+        await asyncio.to_thread(profiler.run, seconds)
+        content = profiler.collapsed().encode() if format == "collapsed" else profiler.pstats()
+
+    media_type, extension = PROFILE_FORMATS[format]
+    return _attachment(
+        content,
+        media_type,
+        f"profile-{time.strftime('%Y%m%d-%H%M%S')}.{extension}",
+        {"X-Profile-Samples": str(profiler.samples)}
+    )
+
+
+@router.post("/loop")
+async def profile_loop(
+    seconds: float = Query(10.0, gt=0, description="Trajanje spremljanja"),
+    threshold_ms: float = Query(100.0, gt=0, description="Prag za počasen callback"),
+    limit: int = Query(20, ge=1, le=200, description="Največ počasnih callbackov")
+):
+    """
+    Zamik event loopa in najpočasnejši callbacki v časovnem oknu
+    """
+    if seconds > settings.diagnostics_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Spremljanje je lahko dolgo največ {settings.diagnostics_max_seconds:g} s"
+        )
+    if _loop_lock.locked():
+        raise HTTPException(status_code=409, detail="Spremljanje event loopa že teče")
+
+    async with _loop_lock:
+        return await monitor_loop(seconds, threshold_ms, limit=limit)
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(
+    frames: int = Query(10, ge=1, le=100, description="Globina sklada alokacij"),
+    max_seconds: Optional[float] = Query(None, gt=0, description="Samodejni izklop (privzeto iz nastavitev)")
+):
+    """
+    Vklopi tracemalloc - do izklopa ali poteka max_seconds upočasni alokacije
+    """
+    try:
+        memory_tracker.start(frames, max_seconds or settings.diagnostics_tracemalloc_max_s)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return memory_tracker.get_stats()
+
+
+@router.post("/memory/snapshot")
+async def take_memory_snapshot(
+    limit: int = Query(30, ge=1, le=500, description="Največ vrstic"),
+    group_by: str = Query("lineno", description="lineno, filename ali traceback")
+):
+    """
+    Največje alokacije in razlika glede na prejšnji posnetek
+    """
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail=f"Nepodprto združevanje '{group_by}'")
+    try:
+        return await asyncio.to_thread(memory_tracker.snapshot, limit, group_by)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/memory/snapshot/download")
+async def download_memory_snapshot():
+    """
+    Zadnji posnetek v formatu tracemalloc (tracemalloc.Snapshot.load)
+    """
+    try:
+        content = await asyncio.to_thread(memory_tracker.dump)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _attachment(
+        content, "application/octet-stream", f"memory-{time.strftime('%Y%m%d-%H%M%S')}.tracemalloc"
+    )
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    """
+    Izklopi tracemalloc in zavrže posnetke
+    """
+    memory_tracker.stop()
+    return memory_tracker.get_stats()
+
+
+@router.get("/objects")
+async def get_largest_objects(
+    limit: int = Query(20, ge=1, le=200, description="Največ objektov in tipov"),
+    include_repr: bool = Query(False, description="Dodaj skrajšan repr (lahko vsebuje podatke zahtev)")
+):
+    """
+    Največji živi objekti in poraba pomnilnika po tipih (plitve velikosti)
+    """
+    return await asyncio.to_thread(largest_objects, limit, include_repr)
@@ -0,0 +1,153 @@
+"""
+API router za izvoz - pretočni izvoz shranjenih rezultatov (NDJSON, Parquet)
+"""
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.services.database_service import DatabaseService
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.export import ndjson_chunk, ParquetStreamWriter, PYARROW_AVAILABLE
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet")
+}
+
+
+async def _iter_chunks(
+    table: str,
+    columns: List[str],
+    chunk_size: int,
+    cursor: Optional[str],
+    model: Optional[str],
+    provider: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime]
+) -> AsyncIterator[tuple[list, str]]:
+    """
+    Bere tabelo po kosih od najstarejše vrstice naprej (keyset, ASC)
+
+    Vsak kos se prebere v threadu, zato izvoz ne blokira event loopa;
+    v pomnilniku je naenkrat samo en kos.
+    """
+    keyset = decode_cursor(cursor) if cursor else None
+    while True:
+        rows, has_more = await asyncio.to_thread(
+            DatabaseService.fetch_page,
+            table,
+            columns,
+            chunk_size,
+            keyset,
+            model,
+            provider,
+            created_from.isoformat() if created_from else None,
+            created_to.isoformat() if created_to else None,
+            None,
+            True
+        )
+        if not rows:
+            return
+        last = rows[-1]
+        keyset = (str(last["created_at"]), str(last["id"]))
+        yield rows, encode_cursor(*keyset)
+        if not has_more:
+            return
+
+
+def _export_response(
+    table: str,
+    format: str,
+    chunk_size: int,
+    cursor: Optional[str],
+    model: Optional[str],
+    provider: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    fields: Optional[str]
+) -> StreamingResponse:
+    """Skupna logika za izvozne endpointe"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format '{format}' ni podprt. Podprti formati: {', '.join(EXPORT_FORMATS.keys())}"
+        )
+    if format == "parquet" and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Izvoz v Parquet ni na voljo - pyarrow paket ni nameščen")
+    
+    try:
+        requested = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        # Izvoz privzeto vsebuje vse stolpce, tudi velike
+        columns = DatabaseService.resolve_history_fields(
+            table, requested or DatabaseService.HISTORY_TABLES[table]["columns"]
+        )
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    chunks = _iter_chunks(table, columns, chunk_size, cursor, model, provider, created_from, created_to)
+    
+    async def ndjson_stream():
+        async for rows, checkpoint in chunks:
+            yield ndjson_chunk(rows, checkpoint)
+    
+    async def parquet_stream():
+        writer = ParquetStreamWriter(columns)
+        async for rows, _ in chunks:
+            yield writer.write_rows(rows)
+        yield writer.close()
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        ndjson_stream() if format == "ndjson" else parquet_stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'}
+    )
+
+
+@router.get("/summaries")
+async def export_summaries(
+    format: str = Query("ndjson", description="ndjson ali parquet"),
+    chunk_size: int = Query(500, ge=1, le=5000, description="Število vrstic na kos"),
+    cursor: Optional[str] = Query(None, description="Nadaljuj za to vrstico (_checkpoint iz prejšnjega izvoza)"),
+    model: Optional[str] = Query(None, description="Filter po modelu"),
+    provider: Optional[str] = Query(None, description="Filter po providerju"),
+    created_from: Optional[datetime] = Query(None, description="Od (vključno)"),
+    created_to: Optional[datetime] = Query(None, description="Do (izključno)"),
+    fields: Optional[str] = Query(None, description="Stolpci, ločeni z vejico (privzeto vsi)")
+):
+    """
+    Pretočno izvozi povzetke od najstarejšega naprej
+    
+    NDJSON za vsakim kosom doda vrstico {"_checkpoint": "<kurzor>"}; prekinjen
+    izvoz se nadaljuje z ?cursor=<zadnji checkpoint>. Za Parquet je kurzor
+    base64url niz "<created_at>|<id>" zadnje prejete vrstice.
+    """
+    return _export_response(
+        "summaries", format, chunk_size, cursor, model, provider, created_from, created_to, fields
+    )
+
+
+@router.get("/comparison-results")
+async def export_comparison_results(
+    format: str = Query("ndjson", description="ndjson ali parquet"),
+    chunk_size: int = Query(500, ge=1, le=5000, description="Število vrstic na kos"),
+    cursor: Optional[str] = Query(None, description="Nadaljuj za to vrstico (_checkpoint iz prejšnjega izvoza)"),
+    model: Optional[str] = Query(None, description="Filter po modelu"),
+    provider: Optional[str] = Query(None, description="Filter po providerju"),
+    created_from: Optional[datetime] = Query(None, description="Od (vključno)"),
+    created_to: Optional[datetime] = Query(None, description="Do (izključno)"),
+    fields: Optional[str] = Query(None, description="Stolpci, ločeni z vejico (privzeto vsi)")
+):
+    """
+    Pretočno izvozi rezultate primerjav od najstarejšega naprej
+    
+    Nadaljevanje deluje enako kot pri /api/export/summaries.
+    """
+    return _export_response(
+        "comparison_results", format, chunk_size, cursor, model, provider, created_from, created_to, fields
+    )
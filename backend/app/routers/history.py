@@ -0,0 +1,112 @@
+"""
+API router za zgodovino - branje shranjenih povzetkov in primerjav
+"""
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, HTTPException, Query
+from app.schemas.history import HistoryPage
+from app.services.database_service import DatabaseService
+from app.utils.pagination import encode_cursor, decode_cursor
+
+router = APIRouter(prefix="/api/history", tags=["history"])
+
+
+async def _history_page(
+    table: str,
+    limit: int,
+    cursor: Optional[str],
+    model: Optional[str],
+    provider: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    fields: Optional[str],
+    comparison_id: Optional[str] = None
+) -> HistoryPage:
+    """Skupna logika za vse history endpointe"""
+    try:
+        columns = DatabaseService.resolve_history_fields(
+            table,
+            [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        )
+        keyset = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        rows, has_more = await DatabaseService.get_history_page(
+            table,
+            columns,
+            limit,
+            cursor=keyset,
+            model=model,
+            provider=provider,
+            created_from=created_from.isoformat() if created_from else None,
+            created_to=created_to.isoformat() if created_to else None,
+            comparison_id=comparison_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Napaka pri branju zgodovine: {str(e)}")
+    
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(str(last["created_at"]), str(last["id"]))
+    
+    return HistoryPage(items=rows, next_cursor=next_cursor, has_more=has_more, fields=columns)
+
+
+@router.get("/summaries", response_model=HistoryPage)
+async def list_summaries(
+    limit: int = Query(20, ge=1, le=100, description="Velikost strani"),
+    cursor: Optional[str] = Query(None, description="Kurzor iz prejšnje strani (next_cursor)"),
+    model: Optional[str] = Query(None, description="Filter po modelu"),
+    provider: Optional[str] = Query(None, description="Filter po providerju (OpenAI, Anthropic)"),
+    created_from: Optional[datetime] = Query(None, description="Od (vključno)"),
+    created_to: Optional[datetime] = Query(None, description="Do (izključno)"),
+    fields: Optional[str] = Query(None, description="Stolpci, ločeni z vejico (privzeto brez original_text)")
+):
+    """
+    Vrne stran shranjenih povzetkov, od najnovejšega naprej
+    """
+    return await _history_page(
+        "summaries", limit, cursor, model, provider, created_from, created_to, fields
+    )
+
+
+@router.get("/comparisons", response_model=HistoryPage)
+async def list_comparisons(
+    limit: int = Query(20, ge=1, le=100, description="Velikost strani"),
+    cursor: Optional[str] = Query(None, description="Kurzor iz prejšnje strani (next_cursor)"),
+    model: Optional[str] = Query(None, description="Samo primerjave, ki vključujejo ta model"),
+    provider: Optional[str] = Query(None, description="Samo primerjave, ki vključujejo tega providerja"),
+    created_from: Optional[datetime] = Query(None, description="Od (vključno)"),
+    created_to: Optional[datetime] = Query(None, description="Do (izključno)"),
+    fields: Optional[str] = Query(None, description="Stolpci, ločeni z vejico (privzeto brez original_text in comparison_data)")
+):
+    """
+    Vrne stran shranjenih primerjav modelov, od najnovejše naprej
+    """
+    return await _history_page(
+        "model_comparisons", limit, cursor, model, provider, created_from, created_to, fields
+    )
+
+
+@router.get("/comparison-results", response_model=HistoryPage)
+async def list_comparison_results(
+    limit: int = Query(20, ge=1, le=100, description="Velikost strani"),
+    cursor: Optional[str] = Query(None, description="Kurzor iz prejšnje strani (next_cursor)"),
+    model: Optional[str] = Query(None, description="Filter po modelu"),
+    provider: Optional[str] = Query(None, description="Filter po providerju (OpenAI, Anthropic)"),
+    created_from: Optional[datetime] = Query(None, description="Od (vključno)"),
+    created_to: Optional[datetime] = Query(None, description="Do (izključno)"),
+    comparison_id: Optional[UUID] = Query(None, description="Samo rezultati ene primerjave"),
+    fields: Optional[str] = Query(None, description="Stolpci, ločeni z vejico")
+):
+    """
+    Vrne stran rezultatov posameznih modelov iz primerjav
+    """
+    return await _history_page(
+        "comparison_results", limit, cursor, model, provider, created_from, created_to, fields,
+        comparison_id=str(comparison_id) if comparison_id else None
+    )
@@ -0,0 +1,62 @@
+"""
+API router za iskanje po shranjenih povzetkih (lokalni BM25 indeks)
+"""
+import asyncio
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.schemas.search import SearchResponse
+from app.services.database_service import DatabaseService
+from app.services.search_service import search_index, SEARCH_TABLES
+from app.utils.tracing import span
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=500, description="Iskalni niz"),
+    table: Optional[str] = Query(None, description="Samo summaries ali comparison_results"),
+    model: Optional[str] = Query(None, description="Filter po modelu"),
+    limit: int = Query(20, ge=1, le=100, description="Največ zadetkov"),
+    include_text: bool = Query(False, description="Dodaj besedila povzetkov (dodatna poizvedba v bazo)")
+):
+    """
+    Poišče shranjene povzetke po ključnih besedah, rangirano z BM25
+    
+    Iskanje ne bere baze - uporablja indeks v procesu. Besede se
+    normalizirajo (male črke, brez šumnikov, brez končnic), zato
+    "hiša" najde tudi "hišami" in "hise".
+    """
+    if table is not None and table not in SEARCH_TABLES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Neznana tabela '{table}'. Podprte: {', '.join(SEARCH_TABLES)}"
+        )
+    
+    start = time.perf_counter()
+    with span("search_index"):
+        result = await asyncio.to_thread(
+            search_index.search,
+            q, limit, table=table, model=DatabaseService._clean_model_name(model) if model else None
+        )
+    took_ms = (time.perf_counter() - start) * 1000
+    
+    if include_text and result["hits"]:
+        try:
+            with span("search_hydrate"):
+                texts = await DatabaseService.get_summary_texts(result["hits"])
+            for hit in result["hits"]:
+                hit["summary_text"] = texts.get(hit["id"])
+        except Exception as e:
+            print(f"Napaka pri branju besedil zadetkov: {e}")
+    
+    return SearchResponse(query=q, took_ms=took_ms, **result)
+
+
+@router.get("/stats")
+async def get_search_stats():
+    """
+    Vrne velikost iskalnega indeksa in kurzorje sinhronizacije z bazo
+    """
+    return search_index.get_stats()
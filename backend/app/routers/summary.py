@@ -1,21 +1,48 @@
 """
 API router za povzetke - samo OpenRouter API z 3 modeli
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import APIRouter, HTTPException, Header, Request
+from pydantic import ValidationError
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
 from app.schemas.summary import (
     SummaryRequest, 
     SummaryResponse, 
     ComparisonRequest, 
-    ComparisonResponse
+    ComparisonResponse,
+    BatchSummaryRequest,
+    BatchSummaryResponse,
+    BatchSummaryItem
 )
 from app.config import settings
 from app.services.openai_service import OpenAIService
 from app.services.anthropic_service import AnthropicService
 from app.services.database_service import DatabaseService
+from app.services.llm_service import LLMService
+from app.services.cascade_service import CascadeService
+from app.services.benchmark_service import BenchmarkService
+from app.services.packing_service import PackingService
+from app.services.token_calibration import token_calibrator
+from app.services.scheduler import provider_scheduler, set_request_context
+from app.services.budget_service import (
+    budget_ledger,
+    estimate_cost,
+    estimate_packed_cost,
+    BudgetExceeded,
+    Reservation
+)
+from app.utils.serialization import FastJSONResponse, to_payload
+from app.utils.compression import compress_text, CompressionResult
+from app.utils.tracing import span, traced
+from app.utils.extraction import extract_text, SUPPORTED_EXTENSIONS
+from app.utils.admission import admission_limiter, bulk_admission_limiter, move_to_bulk, AdmissionRejected
 
 router = APIRouter(prefix="/api/summary", tags=["summary"])
 
-# Dovoljeni modeli - samo 3
+# Dovoljeni modeli - samo 3, urejeni od najcenejšega (vrstni red kaskade)
 ALLOWED_MODELS = {
     "gpt-4o-mini": {"provider": "OpenAI", "service": "openai"},
     "gpt-4o": {"provider": "OpenAI", "service": "openai"},
@@ -47,57 +74,543 @@ def get_service_for_model(model: str):
     
     model_info = ALLOWED_MODELS[clean_model]
     
-    if model_info["service"] == "openai":
-        return OpenAIService(model_name=clean_model, api_key=settings.openrouter_api_key)
-    elif model_info["service"] == "anthropic":
-        return AnthropicService(model_name=clean_model, api_key=settings.openrouter_api_key)
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Neznan tip servisa za model '{clean_model}'"
-        )
+    with span("client_init", clean_model):
+        if model_info["service"] == "openai":
+            return OpenAIService(model_name=clean_model, api_key=settings.openrouter_api_key)
+        elif model_info["service"] == "anthropic":
+            return AnthropicService(model_name=clean_model, api_key=settings.openrouter_api_key)
+    
+    raise HTTPException(
+        status_code=400,
+        detail=f"Neznan tip servisa za model '{clean_model}'"
+    )
+
+
+async def prepare_text(
+    text: str,
+    compression_ratio: Optional[float],
+    target_input_tokens: Optional[int]
+) -> tuple[str, Optional[CompressionResult]]:
+    """
+    Opcijska lokalna predkompresija vhoda pred klicem LLM-ja
+    
+    Returns:
+        (besedilo za model, rezultat kompresije ali None)
+    """
+    if not compression_ratio and not target_input_tokens:
+        return text, None
+    # CPU delo v threadu, da ne blokira event loopa
+    compression = await traced("compression", asyncio.to_thread(
+        compress_text, text, target_input_tokens, compression_ratio
+    ))
+    return compression.text, compression
+
+
+def apply_compression_metrics(result: SummaryResponse, compression: Optional[CompressionResult]) -> None:
+    """Zapiše tokene pred/po predkompresiji v metrike rezultata"""
+    if compression is None:
+        return
+    result.metrics.original_input_tokens = compression.original_tokens
+    result.metrics.compressed_input_tokens = compression.compressed_tokens
+    result.metrics.compression_time_ms = compression.time_ms
+
+
+def clean_model_name(model: str) -> str:
+    """Odstrani prefiks iz modelnega imena (openai/ ali anthropic/)"""
+    return model.replace("openai/", "").replace("anthropic/", "")
+
+
+def reserve_budget(
+    service: LLMService,
+    model: str,
+    client_key: str,
+    text: str,
+    max_length: Optional[int],
+    allow_downgrade: bool = False
+) -> tuple[LLMService, str, Reservation]:
+    """
+    Preveri proračun pred klicem modela in rezervira ocenjen strošek
+    
+    Če je proračun presežen in je nastavljen budget_action="downgrade", poskusi
+    najdražji cenejši model, ki se še prilega proračunu.
+    
+    Returns:
+        (service, model, rezervacija) - model je lahko zamenjan s cenejšim
+        
+    Raises:
+        HTTPException 429: Če proračun ne dopušča klica
+    """
+    model = clean_model_name(model)
+    estimated = estimate_cost(service, text, max_length)
+    try:
+        return service, model, budget_ledger.reserve(client_key, model, estimated)
+    except BudgetExceeded as exceeded:
+        if allow_downgrade and settings.budget_action == "downgrade":
+            candidates = []
+            for candidate in ALLOWED_MODELS:
+                if candidate == model:
+                    continue
+                candidate_service = get_service_for_model(candidate)
+                candidate_cost = estimate_cost(candidate_service, text, max_length)
+                if candidate_cost < estimated:
+                    candidates.append((candidate_cost, candidate, candidate_service))
+            
+            for candidate_cost, candidate, candidate_service in sorted(candidates, key=lambda c: c[0], reverse=True):
+                try:
+                    reservation = budget_ledger.reserve(client_key, candidate, candidate_cost)
+                    return candidate_service, candidate, reservation
+                except BudgetExceeded:
+                    continue
+        
+        raise HTTPException(status_code=429, detail=str(exceeded))
+
+
+async def settle_reservation(
+    reservation: Reservation,
+    call: Awaitable[Any],
+    cost: Callable[[Any], float] = lambda result: result.metrics.cost_usd
+) -> Any:
+    """
+    Izvede klic modela in rezervacijo poravna z dejanskim stroškom
+    
+    Če klic ne uspe ali je prekinjen (CancelledError ob prekinjeni povezavi
+    ali časovni omejitvi), se rezervacija sprosti - sicer bi ostala
+    všteta v proračun do konca periode.
+    
+    Args:
+        reservation: Rezervacija iz reserve_budget / budget_ledger.reserve
+        call: Klic modela
+        cost: Dejanski strošek iz rezultata (privzeto SummaryResponse)
+    """
+    settled = False
+    try:
+        result = await call
+        budget_ledger.reconcile(reservation, cost(result))
+        settled = True
+        return result
+    finally:
+        if not settled:
+            budget_ledger.release(reservation)
+
+
+@router.get("/budget")
+async def get_budget(x_client_key: Optional[str] = Header(None)):
+    """
+    Vrne porabo proračuna za odjemalca (glava X-Client-Key)
+    """
+    client_key = x_client_key or "anonymous"
+    return {"client_key": client_key, "usage": budget_ledger.usage(client_key)}
+
+
+@router.get("/cascade/stats")
+async def get_cascade_stats():
+    """
+    Vrne statistiko kaskad - delež eskalacij in skupni prihranek
+    """
+    return CascadeService.get_stats()
+
+
+@router.get("/packing/stats")
+async def get_packing_stats():
+    """
+    Vrne statistiko pakiranja - besedila na klic in delež navadnih klicev
+    """
+    return PackingService.get_stats()
+
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """
+    Vrne čakalne čase po prioritetnih razredih in zasedenost providerjev
+    """
+    return provider_scheduler.get_stats()
+
+
+@router.get("/tokens/stats")
+async def get_token_stats():
+    """
+    Vrne kalibracijo izhodnih tokenov po modelih (znakov/token, odrezani odgovori, max_tokens)
+    """
+    return token_calibrator.get_stats()
+
+
+@router.get("/admission/stats")
+async def get_admission_stats():
+    """
+    Vrne trenutno mejo sočasnih zahtev, zasedenost vrste in zavrnitve (503)
+    
+    Limiter za dolgotrajne zahteve (paketi, datoteke, benchmark) je pod "bulk".
+    """
+    return {**admission_limiter.get_stats(), "bulk": bulk_admission_limiter.get_stats()}
+
+
+def apply_request_context(priority: str, client_key: str) -> None:
+    """Nastavi prioriteto in odjemalca za razporejevalnik klicev providerjev"""
+    try:
+        set_request_context(priority, client_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/generate", response_model=SummaryResponse)
-async def generate_summary(request: SummaryRequest):
+async def generate_summary(request: SummaryRequest, x_client_key: Optional[str] = Header(None)):
     """
     Generira povzetek z izbranim LLM modelom in ga shrani v bazo
     """
+    client_key = x_client_key or "anonymous"
+    apply_request_context(request.priority, client_key)
+    
     try:
         service = get_service_for_model(request.model)
-        result = await service.generate_summary(request.text, request.max_length)
+        text, compression = await prepare_text(
+            request.text, request.compression_ratio, request.target_input_tokens
+        )
+        
+        async def dispatch(model: str, model_service: LLMService, allow_downgrade: bool = False) -> SummaryResponse:
+            model_service, used_model, reservation = reserve_budget(
+                model_service, model, client_key, text, request.max_length, allow_downgrade
+            )
+            result = await settle_reservation(reservation, traced(
+                "provider", model_service.generate_summary(text, request.max_length), desc=used_model
+            ))
+            if used_model != clean_model_name(model):
+                result.requested_model = model
+            return result
+        
+        if request.cascade:
+            # Kaskada: od najcenejšega modela do zahtevanega (ALLOWED_MODELS je urejen po ceni)
+            model_names = list(ALLOWED_MODELS)
+            chain = model_names[:model_names.index(clean_model_name(request.model)) + 1]
+            cascade = CascadeService(
+                [(name, get_service_for_model(name)) for name in chain[:-1]] + [(chain[-1], service)],
+                service,
+                dispatch
+            )
+            # Jezik se preverja glede na prompt (povzetki so vedno v slovenščini)
+            result = await cascade.generate_summary(text, request.text, request.max_length)
+        else:
+            result = await dispatch(request.model, service, allow_downgrade=True)
+        apply_compression_metrics(result, compression)
+        
+        # Serializiraj enkrat - isti payload gre v bazo in v HTTP odgovor
+        with span("serialize"):
+            payload = to_payload(result)
         
         # Shrani v Supabase
         try:
-            await DatabaseService.save_summary(result, request.text)
+            with span("db_save"):
+                await DatabaseService.save_summary(payload, request.text, request.max_length)
         except Exception as db_error:
             print(f"Napaka pri shranjevanju v bazo: {db_error}")
         
-        return result
+        return FastJSONResponse(payload)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Napaka pri generiranju povzetka: {str(e)}")
 
 
+@router.post("/batch", response_model=BatchSummaryResponse)
+async def generate_batch(request: BatchSummaryRequest, x_client_key: Optional[str] = Header(None)):
+    """
+    Povzame več besedil naenkrat in jih shrani v bazo
+    
+    Kratka besedila se združijo v skupne klice do packing_token_budget
+    vhodnih tokenov; model vrne JSON s povzetkom za vsako besedilo. Strošek
+    klica se razdeli po besedilih, neuspešno razčlenjena besedila pa se
+    povzamejo z navadnim klicem.
+    """
+    client_key = x_client_key or "anonymous"
+    apply_request_context(request.priority, client_key)
+    
+    if len(request.texts) > settings.batch_max_documents:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Paket ima lahko največ {settings.batch_max_documents} besedil"
+        )
+    short = [i for i, text in enumerate(request.texts) if len(text.strip()) < 10]
+    if short:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Besedila morajo imeti vsaj 10 znakov (indeksi: {', '.join(map(str, short[:10]))})"
+        )
+    
+    service = get_service_for_model(request.model)
+    model = clean_model_name(request.model)
+    
+    async def dispatch_single(text: str) -> SummaryResponse:
+        single_service, used_model, reservation = reserve_budget(
+            service, request.model, client_key, text, request.max_length
+        )
+        return await settle_reservation(reservation, traced(
+            "provider", single_service.generate_summary(text, request.max_length), desc=used_model
+        ))
+    
+    async def dispatch_packed(texts: list[str]) -> list[SummaryResponse]:
+        try:
+            reservation = budget_ledger.reserve(
+                client_key, model, estimate_packed_cost(service, texts, request.max_length)
+            )
+        except BudgetExceeded as exceeded:
+            raise HTTPException(status_code=429, detail=str(exceeded))
+        return await settle_reservation(
+            reservation,
+            traced("provider_packed", service.generate_packed(texts, request.max_length), desc=model),
+            cost=lambda results: sum(r.metrics.cost_usd for r in results)
+        )
+    
+    packing = PackingService(dispatch_single, dispatch_packed, max_documents=None if request.pack else 1)
+    with span("batch", str(len(request.texts))):
+        results, errors, report = await packing.run(request.texts)
+    
+    if len(errors) == len(request.texts):
+        # Nobeno besedilo ni uspelo - vrni prvo napako (npr. 429 proračun)
+        first = errors[0]
+        if isinstance(first, HTTPException):
+            raise first
+        raise HTTPException(status_code=500, detail=f"Napaka pri generiranju povzetkov: {str(first)}")
+    
+    def describe(error: Optional[Exception]) -> Optional[str]:
+        if error is None:
+            return None
+        return error.detail if isinstance(error, HTTPException) else str(error)
+    
+    items = [
+        BatchSummaryItem(index=i, result=result, error=describe(errors.get(i)))
+        for i, result in enumerate(results)
+    ]
+    with span("serialize"):
+        payload = to_payload(BatchSummaryResponse(results=items, packing=report))
+    
+    # Ena skupna vstavitev v threadu - ne blokira event loopa
+    try:
+        with span("db_save"):
+            await asyncio.to_thread(
+                DatabaseService.save_summaries,
+                [
+                    (item["result"], request.texts[item["index"]])
+                    for item in payload["results"] if item["result"] is not None
+                ],
+                request.max_length
+            )
+    except Exception as db_error:
+        print(f"Napaka pri shranjevanju paketa v bazo: {db_error}")
+    
+    return FastJSONResponse(payload)
+
+
+class _UploadTooLarge(MultiPartException):
+    """Telo zahteve je preseglo upload_max_bytes"""
+
+
+# Polja obrazca, ki se prenesejo v SummaryRequest
+_UPLOAD_FIELDS = ("model", "max_length", "language", "compression_ratio", "target_input_tokens", "cascade", "priority")
+
+
+@router.post("/upload", response_model=SummaryResponse)
+async def upload_summary(request: Request, x_client_key: Optional[str] = Header(None)):
+    """
+    Naloži datoteko (.txt, .md, .html, .pdf) kot multipart obrazec in vrne povzetek
+    
+    Polje 'file' je datoteka, ostala polja (model, max_length, language, ...)
+    so enaka kot pri /generate. Telo se bere pretočno v začasno datoteko
+    (nad 1 MB na disk), zahteva pa se prekine takoj, ko preseže upload_max_bytes.
+    """
+    max_bytes = settings.upload_max_bytes
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Datoteka je prevelika (največ {max_bytes} bytes)")
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Zahteva mora biti multipart/form-data s poljem 'file'")
+    
+    async def limited_stream():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise _UploadTooLarge(f"Datoteka je prevelika (največ {max_bytes} bytes)")
+            yield chunk
+    
+    try:
+        with span("upload"):
+            form = await MultiPartParser(
+                request.headers, limited_stream(), max_files=1, max_fields=len(_UPLOAD_FIELDS)
+            ).parse()
+    except _UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.message)
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=f"Neveljaven obrazec: {e.message}")
+    
+    upload = form.get("file")
+    try:
+        if not isinstance(upload, UploadFile) or not upload.filename:
+            raise HTTPException(status_code=400, detail="Manjka datoteka v polju 'file'")
+        if not upload.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            raise HTTPException(
+                status_code=415,
+                detail=f"Format datoteke ni podprt. Podprti formati: {', '.join(SUPPORTED_EXTENSIONS)}"
+            )
+        
+        try:
+            # Samo končnica - ime datoteke je od odjemalca in ne sodi v glave ali trace zapise
+            with span("extract", os.path.splitext(upload.filename)[1].lower()):
+                # Izluščanje (predvsem PDF) je CPU delo - ne blokiraj event loopa
+                text = await asyncio.to_thread(extract_text, upload.file, upload.filename)
+        except ValueError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Napaka pri branju datoteke: {str(e)}")
+    finally:
+        await form.close()
+    
+    text = text.strip()
+    if len(text) < 10:
+        raise HTTPException(status_code=400, detail="Datoteka ne vsebuje dovolj besedila za povzetek")
+    
+    fields = {name: form[name] for name in _UPLOAD_FIELDS if isinstance(form.get(name), str) and form[name] != ""}
+    try:
+        summary_request = SummaryRequest(text=text, **fields)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Neveljavna zahteva: {e.errors(include_url=False, include_context=False)}")
+    
+    return await generate_summary(summary_request, x_client_key)
+
+
+async def run_benchmark(
+    request: ComparisonRequest,
+    client_key: str,
+    text: str,
+    compression: Optional[CompressionResult]
+) -> FastJSONResponse:
+    """
+    Benchmark način /compare - vsak model request.trials krat
+    
+    Proračun se preveri vnaprej za vse klice (brez zamenjave modela, da
+    meritve ostanejo primerljive). Rezultat se shrani v benchmark_runs,
+    ne med uporabniške primerjave, zato ne vpliva na comparison_analysis.
+    """
+    from app.utils.metrics import calculate_comparison, calculate_benchmark
+    
+    calls_per_model = request.trials + request.warmup
+    models = []
+    for model in dict.fromkeys(request.models):
+        service = get_service_for_model(model)
+        try:
+            budget_ledger.check(
+                client_key, clean_model_name(model),
+                estimate_cost(service, text, request.max_length) * calls_per_model
+            )
+        except BudgetExceeded as exceeded:
+            raise HTTPException(status_code=429, detail=str(exceeded))
+        models.append((model, service))
+    
+    async def dispatch(model: str, model_service: LLMService) -> SummaryResponse:
+        model_service, used_model, reservation = reserve_budget(
+            model_service, model, client_key, text, request.max_length
+        )
+        return await settle_reservation(reservation, traced(
+            "provider", model_service.generate_summary(text, request.max_length), desc=used_model
+        ))
+    
+    benchmark = BenchmarkService(
+        models, dispatch, request.trials, warmup=request.warmup, concurrency=request.concurrency
+    )
+    with span("benchmark", f"{len(models)}x{request.trials}"):
+        samples, errors, duration_ms = await benchmark.run()
+    
+    failed = [model for model, results in samples.items() if not results]
+    if failed:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Vse ponovitve so bile neuspešne za modele: {', '.join(failed)}"
+        )
+    
+    try:
+        with span("comparison"):
+            report = calculate_benchmark(
+                samples, errors, request.trials, request.warmup, request.concurrency,
+                duration_ms, settings.benchmark_confidence
+            )
+            # Reprezentativen rezultat modela - ponovitev z latenco najbližje mediani
+            medians = {m.model: m.latency_ms.median for m in report.models}
+            results = [
+                min(model_results, key=lambda r: abs(r.metrics.response_time_ms - medians[model]))
+                for model, model_results in samples.items()
+            ]
+            for result in results:
+                apply_compression_metrics(result, compression)
+            comparison = calculate_comparison(results)
+            # Zmagovalec samo pri statistično značilni razliki (Mann-Whitney + Holm)
+            comparison.fastest = report.fastest
+        
+        with span("serialize"):
+            payload = to_payload(ComparisonResponse(results=results, comparison=comparison, benchmark=report))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Napaka pri izračunu benchmarka: {str(e)}")
+    
+    try:
+        with span("db_save"):
+            await DatabaseService.save_benchmark(payload, request.text)
+    except Exception as db_error:
+        print(f"Napaka pri shranjevanju benchmarka v bazo: {db_error}")
+    
+    return FastJSONResponse(payload)
+
+
 @router.post("/compare", response_model=ComparisonResponse)
-async def compare_models(request: ComparisonRequest):
+async def compare_models(request: ComparisonRequest, x_client_key: Optional[str] = Header(None)):
     """
     Generira povzetke z več modeli hkrati in jih primerja
+    
+    Pri primerjavi se modeli zaradi proračuna ne zamenjujejo - če kateri od
+    modelov preseže proračun, se zahteva zavrne.
     """
-    import asyncio
-    from app.utils.metrics import calculate_comparison
+    from app.utils.metrics import calculate_comparison, calculate_quality
+    
+    apply_request_context(request.priority, x_client_key or "anonymous")
+    
+    if request.trials > 1:
+        # Benchmark traja dolgo - ne sme zniževati meje interaktivnih zahtev
+        try:
+            await move_to_bulk()
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=503,
+                detail="Strežnik je preobremenjen, poskusite znova kasneje",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+    
+    # Predkompresija enkrat za vse modele
+    text, compression = await prepare_text(
+        request.text, request.compression_ratio, request.target_input_tokens
+    )
+    
+    if request.trials > 1:
+        return await run_benchmark(request, x_client_key or "anonymous", text, compression)
     
     # Generiraj povzetke za vse modele paralelno
     tasks = []
+    reservations = []
     for model in request.models:
         try:
             service = get_service_for_model(model)
-            task = service.generate_summary(request.text, request.max_length)
+            service, _, reservation = reserve_budget(
+                service, model, x_client_key or "anonymous", text, request.max_length
+            )
+            reservations.append(reservation)
+            task = traced("provider", service.generate_summary(text, request.max_length), desc=model)
             tasks.append(task)
         except HTTPException:
+            for reservation in reservations:
+                budget_ledger.release(reservation)
+            for task in tasks:
+                task.close()
             raise
         except Exception as e:
+            for reservation in reservations:
+                budget_ledger.release(reservation)
+            for task in tasks:
+                task.close()
             raise HTTPException(
                 status_code=500, 
                 detail=f"Napaka pri inicializaciji modela '{model}': {str(e)}"
@@ -105,23 +618,52 @@ async def compare_models(request: ComparisonRequest):
     
     try:
         # Počakaj na vse rezultate
-        results = await asyncio.gather(*tasks)
+        # Vsak klic poravna svojo rezervacijo (ali jo sprosti ob napaki/prekinitvi)
+        outcomes = await asyncio.gather(
+            *(settle_reservation(reservation, task) for reservation, task in zip(reservations, tasks)),
+            return_exceptions=True
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        results = list(outcomes)
+        for result in results:
+            apply_compression_metrics(result, compression)
         
         # Izračunaj primerjavo
-        comparison = calculate_comparison(results)
+        with span("comparison"):
+            comparison = calculate_comparison(results)
         
         comparison_response = ComparisonResponse(
             results=results,
             comparison=comparison
         )
         
-        # Shrani primerjavo v Supabase
+        # Serializiraj enkrat - isti payload gre v bazo in v HTTP odgovor
+        with span("serialize"):
+            payload = to_payload(comparison_response)
+        
+        # Kakovostne metrike v threadu - sočasno z zapisom primerjave v bazo
+        quality_task = asyncio.create_task(traced(
+            "quality",
+            asyncio.to_thread(lambda: to_payload(calculate_quality(request.text, results)))
+        ))
+        
+        # Shrani primerjavo v Supabase (kakovost doda v payload, ko je izračunana)
         try:
-            await DatabaseService.save_comparison(comparison_response, request.text)
+            with span("db_save"):
+                await DatabaseService.save_comparison(
+                    payload, request.text, quality_task, max_length=request.max_length
+                )
         except Exception as db_error:
             print(f"Napaka pri shranjevanju primerjave v bazo: {db_error}")
         
-        return comparison_response
+        try:
+            payload["quality"] = await quality_task
+        except Exception as quality_error:
+            print(f"Napaka pri izračunu kakovosti: {quality_error}")
+        
+        return FastJSONResponse(payload)
     except Exception as e:
         raise HTTPException(
             status_code=500, 
@@ -0,0 +1,13 @@
+"""
+Pydantic sheme za zgodovino - stran rezultatov s kurzorjem
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+
+
+class HistoryPage(BaseModel):
+    """Ena stran zgodovine (keyset paginacija)"""
+    items: List[Dict[str, Any]] = Field(..., description="Vrstice strani, samo izbrani stolpci")
+    next_cursor: Optional[str] = Field(None, description="Kurzor za naslednjo stran (None, če je to zadnja)")
+    has_more: bool = Field(..., description="Ali obstaja naslednja stran")
+    fields: List[str] = Field(..., description="Vrnjeni stolpci")
@@ -0,0 +1,24 @@
+"""
+Pydantic sheme za iskanje po shranjenih povzetkih
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+
+class SearchHit(BaseModel):
+    """En zadetek iskanja"""
+    table: str = Field(..., description="Tabela zadetka (summaries ali comparison_results)")
+    id: str = Field(..., description="ID vrstice")
+    model_name: str = Field(..., description="Model, ki je ustvaril povzetek")
+    created_at: str = Field(..., description="Čas shranjevanja")
+    score: float = Field(..., description="BM25 ocena")
+    summary_text: Optional[str] = Field(None, description="Besedilo povzetka (samo z include_text)")
+
+
+class SearchResponse(BaseModel):
+    """Rezultat iskanja"""
+    query: str = Field(..., description="Iskalni niz")
+    terms: List[str] = Field(..., description="Normalizirani iskalni izrazi")
+    total_matches: int = Field(..., description="Število dokumentov z vsaj enim izrazom")
+    took_ms: float = Field(..., description="Čas iskanja v indeksu v milisekundah")
+    hits: List[SearchHit] = Field(..., description="Zadetki, urejeni po oceni")
@@ -12,14 +12,51 @@ class SummaryRequest(BaseModel):
     model: str = Field(..., description="Ime LLM modela (npr. 'gpt-4', 'claude-3')")
     max_length: Optional[int] = Field(None, description="Maksimalna dolžina povzetka v znakih")
     language: Optional[str] = Field("sl", description="Jezik povzetka")
+    compression_ratio: Optional[float] = Field(
+        None, gt=0, lt=1, description="Lokalna predkompresija vhoda na ta delež tokenov (npr. 0.3)"
+    )
+    target_input_tokens: Optional[int] = Field(
+        None, gt=0, description="Lokalna predkompresija vhoda na to število tokenov"
+    )
+    cascade: bool = Field(
+        False, description="Najprej najcenejši model, dražji (do izbranega) samo, če preverjanja ne uspejo"
+    )
+    priority: str = Field("interactive", description="Prioritetni razred klica providerja (interactive, batch)")
 
 
 class SummaryMetrics(BaseModel):
     """Metrike za povzetek"""
     response_time_ms: float = Field(..., description="Čas odziva v milisekundah")
     tokens_used: int = Field(..., description="Število uporabljenih tokenov")
+    input_tokens: Optional[int] = Field(None, description="Število vhodnih tokenov")
+    output_tokens: Optional[int] = Field(None, description="Število izhodnih tokenov")
+    max_tokens: Optional[int] = Field(None, description="Omejitev izhodnih tokenov klica (kalibrirana)")
+    finish_reason: Optional[str] = Field(None, description="Razlog konca generiranja (stop, length, ...)")
+    truncated: bool = Field(False, description="Povzetek je odrezan zaradi max_tokens")
     cost_usd: float = Field(..., description="Strošek v USD")
     timestamp: datetime = Field(default_factory=datetime.now)
+    original_input_tokens: Optional[int] = Field(None, description="Ocenjeni tokeni vhoda pred predkompresijo")
+    compressed_input_tokens: Optional[int] = Field(None, description="Ocenjeni tokeni vhoda po predkompresiji")
+    compression_time_ms: Optional[float] = Field(None, description="Čas lokalne predkompresije v milisekundah")
+    packed_documents: Optional[int] = Field(None, description="Število besedil v skupnem (pakiranem) klicu")
+
+
+class CascadeAttempt(BaseModel):
+    """En poskus v kaskadi"""
+    model: str = Field(..., description="Model poskusa")
+    passed: bool = Field(..., description="Ali je povzetek prestal preverjanja")
+    failed_checks: List[str] = Field(default_factory=list, description="Neuspela preverjanja")
+    cost_usd: float = Field(..., description="Strošek poskusa v USD")
+    response_time_ms: float = Field(..., description="Čas odziva poskusa")
+
+
+class CascadeReport(BaseModel):
+    """Poročilo kaskade - poskusi in prihranek"""
+    attempts: List[CascadeAttempt] = Field(..., description="Poskusi od najcenejšega naprej")
+    escalations: int = Field(..., description="Število eskalacij na dražji model")
+    total_cost_usd: float = Field(..., description="Skupni strošek vseh poskusov")
+    requested_model_cost_usd: float = Field(..., description="Ocenjen strošek zahtevanega modela za iste tokene")
+    savings_usd: float = Field(..., description="Prihranek glede na neposreden klic zahtevanega modela")
 
 
 class SummaryResponse(BaseModel):
@@ -27,6 +64,44 @@ class SummaryResponse(BaseModel):
     summary: str = Field(..., description="Generirani povzetek")
     model: str = Field(..., description="Uporabljeni model")
     metrics: SummaryMetrics = Field(..., description="Metrike generiranja")
+    requested_model: Optional[str] = Field(None, description="Zahtevani model, če je bil zaradi proračuna zamenjan s cenejšim")
+    cascade: Optional[CascadeReport] = Field(None, description="Poročilo kaskade (samo pri cascade=True)")
+
+
+class BatchSummaryRequest(BaseModel):
+    """Zahteva za povzetke več besedil (kratka besedila se pakirajo v skupne klice)"""
+    texts: List[str] = Field(..., description="Besedila za povzetek", min_items=1)
+    model: str = Field(..., description="Ime LLM modela")
+    max_length: Optional[int] = Field(None, description="Maksimalna dolžina vsakega povzetka v znakih")
+    priority: str = Field("batch", description="Prioritetni razred klicev providerja (interactive, batch)")
+    pack: bool = Field(True, description="Pakiranje kratkih besedil v skupne klice (False = en klic na besedilo)")
+
+
+class PackingReport(BaseModel):
+    """Poročilo o pakiranju paketa besedil"""
+    documents: int = Field(..., description="Število besedil")
+    groups: int = Field(..., description="Število skupin (pakiranih ali posamičnih)")
+    calls: int = Field(..., description="Vsi klici providerja, vključno z navadnimi klici ob napaki")
+    packed_calls: int = Field(..., description="Pakirani klici, ki jih je provider uspešno vrnil")
+    packed_documents: int = Field(..., description="Besedila, povzeta v pakiranem klicu")
+    fallback_documents: int = Field(..., description="Besedila iz skupin, ki so potrebovala navaden klic")
+    failed_documents: int = Field(..., description="Besedila brez povzetka")
+    total_cost_usd: float
+    cost_per_document_usd: float = Field(..., description="Strošek na uspešno povzeto besedilo")
+    duration_ms: float
+
+
+class BatchSummaryItem(BaseModel):
+    """Rezultat enega besedila v paketu"""
+    index: int = Field(..., description="Indeks besedila v zahtevi")
+    result: Optional[SummaryResponse] = None
+    error: Optional[str] = None
+
+
+class BatchSummaryResponse(BaseModel):
+    """Odgovor s povzetki paketa besedil"""
+    results: List[BatchSummaryItem]
+    packing: PackingReport
 
 
 class ComparisonRequest(BaseModel):
@@ -34,18 +109,108 @@ class ComparisonRequest(BaseModel):
     text: str = Field(..., description="Besedilo za povzetek", min_length=10)
     models: List[str] = Field(..., description="Seznam modelov za primerjavo", min_items=2)
     max_length: Optional[int] = Field(None, description="Maksimalna dolžina povzetka")
+    compression_ratio: Optional[float] = Field(
+        None, gt=0, lt=1, description="Lokalna predkompresija vhoda na ta delež tokenov (npr. 0.3)"
+    )
+    target_input_tokens: Optional[int] = Field(
+        None, gt=0, description="Lokalna predkompresija vhoda na to število tokenov"
+    )
+    priority: str = Field("interactive", description="Prioritetni razred klicev providerjev (interactive, batch)")
+    trials: int = Field(
+        1, ge=1, le=50, description="Ponovitve na model - več kot 1 vklopi benchmark način"
+    )
+    warmup: int = Field(0, ge=0, le=5, description="Ogrevalni klici na model, ki se ne štejejo (benchmark)")
+    concurrency: int = Field(1, ge=1, le=10, description="Največ sočasnih klicev v benchmark načinu")
 
 
 class ComparisonResult(BaseModel):
     """Rezultat primerjave"""
-    fastest: str = Field(..., description="Najhitrejši model")
+    fastest: Optional[str] = Field(
+        ..., description="Najhitrejši model (v benchmark načinu samo, če je razlika statistično značilna)"
+    )
     cheapest: str = Field(..., description="Najcenejši model")
     average_response_time: float = Field(..., description="Povprečen čas odziva")
     total_cost: float = Field(..., description="Skupni strošek")
 
 
+class ModelQuality(BaseModel):
+    """Kakovostne metrike povzetka enega modela"""
+    model: str = Field(..., description="Model")
+    compression_ratio: float = Field(..., description="Dolžina povzetka / dolžina vira (v besedah)")
+    source_rouge1_precision: float = Field(..., description="Delež unigramov povzetka, ki so v viru")
+    source_rouge2_precision: float = Field(..., description="Delež bigramov povzetka, ki so v viru")
+    consensus_rouge_l: float = Field(..., description="Povprečen ROUGE-L F1 z ostalimi modeli")
+    quality_score: float = Field(..., description="Skupna ocena: (consensus_rouge_l + source_rouge2_precision) / 2")
+
+
+class PairwiseRouge(BaseModel):
+    """ROUGE F1 med povzetkoma dveh modelov"""
+    model_a: str
+    model_b: str
+    rouge1: float
+    rouge2: float
+    rouge_l: float
+
+
+class QualityReport(BaseModel):
+    """Kakovostne metrike primerjave"""
+    models: List[ModelQuality] = Field(..., description="Metrike za vsak model")
+    pairwise: List[PairwiseRouge] = Field(..., description="ROUGE med pari modelov")
+    best_quality: Optional[str] = Field(None, description="Model z najvišjo quality_score")
+    time_ms: float = Field(..., description="Čas izračuna v milisekundah")
+
+
+class DistributionStats(BaseModel):
+    """Porazdelitev meritev enega modela"""
+    n: int = Field(..., description="Število meritev")
+    mean: float
+    median: float
+    q1: float = Field(..., description="Prvi kvartil")
+    q3: float = Field(..., description="Tretji kvartil")
+    iqr: float = Field(..., description="Interkvartilni razmik (q3 - q1)")
+    ci_low: float = Field(..., description="Spodnja meja intervala zaupanja za mediano")
+    ci_high: float = Field(..., description="Zgornja meja intervala zaupanja za mediano")
+    min: float
+    max: float
+
+
+class ModelBenchmark(BaseModel):
+    """Rezultati ponovitev enega modela"""
+    model: str
+    trials: int = Field(..., description="Uspešne ponovitve")
+    errors: int = Field(0, description="Neuspele ponovitve")
+    latency_ms: DistributionStats
+    cost_usd: DistributionStats
+
+
+class PairwiseTest(BaseModel):
+    """Test razlike v latenci med vodilnim in drugim modelom (Mann-Whitney U)"""
+    model_a: str = Field(..., description="Model z najnižjo mediano latence")
+    model_b: str
+    median_diff_ms: float = Field(..., description="Mediana model_b - mediana model_a")
+    p_value: float
+    p_adjusted: float = Field(..., description="p po Holm-Bonferronijevem popravku")
+    significant: bool
+
+
+class BenchmarkReport(BaseModel):
+    """Poročilo benchmark načina /compare"""
+    trials: int
+    warmup: int
+    concurrency: int
+    confidence: float = Field(..., description="Stopnja zaupanja intervalov (npr. 0.95)")
+    models: List[ModelBenchmark]
+    tests: List[PairwiseTest]
+    fastest: Optional[str] = Field(None, description="Najhitrejši model - samo, če je razlika statistično značilna")
+    fastest_significant: bool = Field(..., description="Ali je vodilni model značilno hitrejši od vseh ostalih")
+    total_cost_usd: float
+    duration_ms: float
+
+
 class ComparisonResponse(BaseModel):
     """Odgovor z rezultati primerjave"""
     results: List[SummaryResponse] = Field(..., description="Rezultati za vsak model")
     comparison: ComparisonResult = Field(..., description="Primerjava modelov")
+    quality: Optional[QualityReport] = Field(None, description="Kakovostne metrike")
+    benchmark: Optional[BenchmarkReport] = Field(None, description="Statistika ponovitev (trials > 1)")
 
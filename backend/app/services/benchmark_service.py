@@ -0,0 +1,93 @@
+"""
+Benchmark service - ponovljeni klici modelov za primerjavo latence in stroška
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.schemas.summary import SummaryResponse
+from app.services.llm_service import LLMService
+
+# (ime modela, service) -> rezultat; klicatelj poskrbi za proračun in sledenje
+Dispatch = Callable[[str, LLMService], Awaitable[SummaryResponse]]
+
+
+class BenchmarkService:
+    """
+    Izvede trials ponovitev na model z omejeno sočasnostjo
+
+    Pred merjenjem vsak model opravi warmup klicev (vzpostavitev povezave,
+    TLS, predpomnilniki pri providerju), ki se ne štejejo. Ponovitve so
+    prepletene - v vsakem krogu se vrstni red modelov zamakne, zato
+    časovna nihanja omrežja ne vplivajo sistematično na en model.
+    """
+
+    def __init__(
+        self,
+        models: List[Tuple[str, LLMService]],
+        dispatch: Dispatch,
+        trials: int,
+        warmup: int = 0,
+        concurrency: int = 1
+    ):
+        """
+        Args:
+            models: (ime modela, service) - isti service za vse ponovitve
+            dispatch: Funkcija, ki izvede en klic modela
+            trials: Število merjenih ponovitev na model
+            warmup: Število ogrevalnih klicev na model
+            concurrency: Največ sočasnih klicev
+        """
+        if not models:
+            raise ValueError("Benchmark potrebuje vsaj en model")
+        self.models = models
+        self.dispatch = dispatch
+        self.trials = trials
+        self.warmup = warmup
+        self.concurrency = concurrency
+
+    def schedule(self, rounds: int) -> List[Tuple[str, LLMService]]:
+        """Prepleten vrstni red klicev - v vsakem krogu zamaknjen za en model"""
+        order = []
+        for round_index in range(rounds):
+            shift = round_index % len(self.models)
+            order.extend(self.models[shift:] + self.models[:shift])
+        return order
+
+    async def _run_calls(
+        self, calls: List[Tuple[str, LLMService]]
+    ) -> List[Tuple[str, Optional[SummaryResponse], Optional[BaseException]]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(model: str, service: LLMService):
+            async with semaphore:
+                try:
+                    return model, await self.dispatch(model, service), None
+                except Exception as e:
+                    return model, None, e
+
+        # Taski se ustvarijo v vrstnem redu razporeda, semafor ga ohrani
+        return await asyncio.gather(*(run_one(model, service) for model, service in calls))
+
+    async def run(self) -> Tuple[Dict[str, List[SummaryResponse]], Dict[str, int], float]:
+        """
+        Izvede ogrevanje in merjene ponovitve
+
+        Returns:
+            (uspešni rezultati po modelih, število napak po modelih, trajanje v ms)
+        """
+        start = time.perf_counter()
+        if self.warmup:
+            for model, _, error in await self._run_calls(self.schedule(self.warmup)):
+                if error is not None:
+                    print(f"Napaka pri ogrevalnem klicu modela {model}: {error}")
+
+        samples: Dict[str, List[SummaryResponse]] = {model: [] for model, _ in self.models}
+        errors: Dict[str, int] = {model: 0 for model, _ in self.models}
+        for model, result, error in await self._run_calls(self.schedule(self.trials)):
+            if error is not None:
+                errors[model] += 1
+                print(f"Napaka pri ponovitvi modela {model}: {error}")
+            else:
+                samples[model].append(result)
+        return samples, errors, (time.perf_counter() - start) * 1000
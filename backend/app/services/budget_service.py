@@ -0,0 +1,200 @@
+"""
+Service za proračune - predhodna kontrola stroškov v pomnilniku
+"""
+import asyncio
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.llm_service import LLMService
+from app.utils.compression import estimate_tokens
+from app.utils.packing import DOCUMENT_OVERHEAD_TOKENS
+
+# Ključ v ledgerju: (scope, ime, perioda) npr. ("client", "abc", "2024-01-08")
+LedgerKey = Tuple[str, str, str]
+
+
+class BudgetExceeded(Exception):
+    """Klic bi presegel proračun"""
+
+    def __init__(self, scope: str, name: str, period: str, limit: float, spent: float):
+        self.scope = scope
+        self.name = name
+        self.period = period
+        self.limit = limit
+        self.spent = spent
+        super().__init__(
+            f"Proračun presežen ({scope} '{name}', {period}): porabljeno {spent:.4f} USD od {limit:.4f} USD"
+        )
+
+
+@dataclass
+class Reservation:
+    """Rezervacija ocenjenega stroška pred klicem modela"""
+    client_key: str
+    model: str
+    amount: float
+    keys: List[LedgerKey] = field(default_factory=list)
+
+
+def estimate_cost(service: LLMService, text: str, max_length: Optional[int] = None) -> float:
+    """
+    Oceni strošek klica pred dispatchom - vhod iz dolžine besedila,
+    izhod iz omejitve max_tokens (zgornja meja)
+    """
+    # Sistemski prompt in navodila dodajo nekaj deset tokenov
+    input_tokens = estimate_tokens(text) + 50
+    return service.calculate_cost(input_tokens, service.max_output_tokens(max_length))
+
+
+def estimate_packed_cost(service: LLMService, texts: List[str], max_length: Optional[int] = None) -> float:
+    """Oceni strošek pakiranega klica - vsa besedila z ovojnico, izhod iz packed_output_tokens"""
+    input_tokens = sum(estimate_tokens(text) + DOCUMENT_OVERHEAD_TOKENS for text in texts) + 100
+    return service.calculate_cost(input_tokens, service.packed_output_tokens(len(texts), max_length))
+
+
+class BudgetLedger:
+    """
+    Ledger porabe po odjemalcih in modelih (dnevno in mesečno)
+
+    Vse preverjanje je v pomnilniku; stanje se periodično shrani v datoteko
+    (settings.budget_ledger_file) in ob zagonu naloži nazaj.
+    """
+
+    def __init__(self):
+        self._spent: Dict[LedgerKey, float] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @staticmethod
+    def _periods(now: Optional[datetime] = None) -> Dict[str, str]:
+        now = now or datetime.now(timezone.utc)
+        return {"daily": now.strftime("%Y-%m-%d"), "monthly": now.strftime("%Y-%m")}
+
+    @staticmethod
+    def _limits() -> Dict[Tuple[str, str], float]:
+        """Omejitve (scope, perioda) -> USD; 0 pomeni brez omejitve"""
+        return {
+            ("client", "daily"): settings.budget_client_daily_usd,
+            ("client", "monthly"): settings.budget_client_monthly_usd,
+            ("model", "daily"): settings.budget_model_daily_usd,
+            ("model", "monthly"): settings.budget_model_monthly_usd,
+        }
+
+    def _keys(self, client_key: str, model: str) -> List[Tuple[LedgerKey, float]]:
+        """Ledger ključi za klic skupaj z njihovimi omejitvami"""
+        periods = self._periods()
+        result = []
+        for (scope, period_name), limit in self._limits().items():
+            name = client_key if scope == "client" else model
+            result.append(((scope, name, periods[period_name]), limit))
+        return result
+
+    def check(self, client_key: str, model: str, amount: float) -> None:
+        """
+        Preveri, ali je za klic dovolj proračuna (brez rezervacije)
+
+        Raises:
+            BudgetExceeded: Če bi klic presegel katero od omejitev
+        """
+        with self._lock:
+            self._check_locked(self._keys(client_key, model), amount)
+
+    def _check_locked(self, keys: List[Tuple[LedgerKey, float]], amount: float) -> None:
+        for key, limit in keys:
+            spent = self._spent.get(key, 0.0)
+            if limit > 0 and spent + amount > limit:
+                raise BudgetExceeded(key[0], key[1], key[2], limit, spent)
+
+    def reserve(self, client_key: str, model: str, amount: float) -> Reservation:
+        """
+        Atomarno preveri in rezervira ocenjen strošek
+
+        Raises:
+            BudgetExceeded: Če bi klic presegel katero od omejitev
+        """
+        with self._lock:
+            keys = self._keys(client_key, model)
+            self._check_locked(keys, amount)
+            for key, _ in keys:
+                self._spent[key] = self._spent.get(key, 0.0) + amount
+            self._dirty = True
+        return Reservation(client_key, model, amount, [key for key, _ in keys])
+
+    def reconcile(self, reservation: Reservation, actual_cost: float) -> None:
+        """Zamenja rezerviran (ocenjen) strošek z dejanskim"""
+        delta = actual_cost - reservation.amount
+        with self._lock:
+            for key in reservation.keys:
+                self._spent[key] = max(self._spent.get(key, 0.0) + delta, 0.0)
+            self._dirty = True
+        reservation.amount = actual_cost
+
+    def release(self, reservation: Reservation) -> None:
+        """Sprosti rezervacijo (klic ni uspel)"""
+        self.reconcile(reservation, 0.0)
+
+    def usage(self, client_key: str) -> Dict[str, Dict[str, float]]:
+        """Vrne porabo in omejitve za odjemalca"""
+        periods = self._periods()
+        limits = self._limits()
+        with self._lock:
+            return {
+                period_name: {
+                    "spent_usd": self._spent.get(("client", client_key, period), 0.0),
+                    "limit_usd": limits[("client", period_name)]
+                }
+                for period_name, period in periods.items()
+            }
+
+    # --- Perzistenca ---
+
+    def load(self, path: str) -> None:
+        """Naloži stanje iz datoteke (če obstaja)"""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                self._spent = {}
+                for k, v in data.items():
+                    scope, rest = k.split("|", 1)
+                    name, period = rest.rsplit("|", 1)
+                    self._spent[(scope, name, period)] = v
+        except Exception as e:
+            print(f"Napaka pri nalaganju proračunskega ledgerja: {e}")
+
+    def save(self, path: str) -> None:
+        """Shrani trenutne periode v datoteko (stare periode se zavržejo)"""
+        periods = set(self._periods().values())
+        with self._lock:
+            if not self._dirty:
+                return
+            self._spent = {k: v for k, v in self._spent.items() if k[2] in periods}
+            data = {"|".join(k): v for k, v in self._spent.items()}
+            self._dirty = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    async def persist_periodically(self, path: str, interval_s: float) -> None:
+        """Background naloga - shranjuje ledger vsakih interval_s sekund"""
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await asyncio.to_thread(self.save, path)
+            except Exception as e:
+                print(f"Napaka pri shranjevanju proračunskega ledgerja: {e}")
+
+
+# Globalni ledger (singleton)
+budget_ledger = BudgetLedger()
@@ -0,0 +1,132 @@
+"""
+Kaskadni service - najprej najcenejši model, eskalacija samo ob neuspelih preverjanjih
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.schemas.summary import SummaryResponse, CascadeAttempt, CascadeReport
+from app.services.llm_service import LLMService
+from app.utils.checks import summary_checks
+
+# (ime modela, service) -> rezultat; klicatelj poskrbi za proračun in sledenje
+Dispatch = Callable[[str, LLMService], Awaitable[SummaryResponse]]
+
+
+class CascadeService:
+    """
+    Zaporedno kliče modele od najcenejšega do zahtevanega in se ustavi pri
+    prvem povzetku, ki prestane lokalna preverjanja (glej utils/checks.py).
+    Napaka klica modela šteje kot neuspelo preverjanje "error".
+    """
+
+    # Skupna statistika procesa (za /api/summary/cascade/stats)
+    stats: Dict[str, float] = {
+        "runs": 0,
+        "escalated_runs": 0,
+        "escalations": 0,
+        "total_cost_usd": 0.0,
+        "savings_usd": 0.0
+    }
+
+    def __init__(
+        self,
+        models: List[Tuple[str, LLMService]],
+        requested_service: LLMService,
+        dispatch: Dispatch
+    ):
+        """
+        Args:
+            models: Modeli kaskade od najcenejšega do zahtevanega (vključno)
+            requested_service: Service zahtevanega modela - za izračun prihranka
+            dispatch: Funkcija, ki izvede en klic modela
+        """
+        if not models:
+            raise ValueError("Kaskada potrebuje vsaj en model")
+        self.models = models
+        self.requested_service = requested_service
+        self.dispatch = dispatch
+
+    async def generate_summary(
+        self,
+        text: str,
+        source_text: str,
+        max_length: Optional[int] = None,
+        language: Optional[str] = None
+    ) -> SummaryResponse:
+        """
+        Generira povzetek s kaskado
+
+        Args:
+            text: Besedilo za model (lahko predkompresirano)
+            source_text: Originalno besedilo - za preverjanje prekrivanja
+            max_length: Maksimalna dolžina povzetka
+            language: Pričakovan jezik povzetka - privzeto jezik, ki ga zahteva
+                prompt servisa (prompt_language), ne jezik iz zahteve
+
+        Returns:
+            SummaryResponse zadnjega uspešnega klica z izpolnjenim poročilom kaskade
+
+        Raises:
+            Napako zadnjega modela, če noben klic ni vrnil povzetka
+        """
+        attempts: List[CascadeAttempt] = []
+        result: Optional[SummaryResponse] = None
+        error: Optional[Exception] = None
+        for model, service in self.models:
+            try:
+                attempt = await self.dispatch(model, service)
+            except Exception as e:
+                print(f"Napaka modela '{model}' v kaskadi: {e}")
+                error = e
+                attempts.append(CascadeAttempt(
+                    model=model, passed=False, failed_checks=["error"], cost_usd=0.0, response_time_ms=0.0
+                ))
+                continue
+            result = attempt
+            failed = summary_checks(
+                source_text, result.summary or "", max_length,
+                language or service.prompt_language, result.metrics.finish_reason
+            )
+            attempts.append(CascadeAttempt(
+                model=result.model,
+                passed=not failed,
+                failed_checks=failed,
+                cost_usd=result.metrics.cost_usd,
+                response_time_ms=result.metrics.response_time_ms
+            ))
+            if not failed:
+                break
+
+        if result is None:
+            raise error
+
+        # Kaj bi stal zahtevani model za iste tokene kot zadnji poskus
+        metrics = result.metrics
+        if metrics.input_tokens is not None and metrics.output_tokens is not None:
+            requested_cost = self.requested_service.calculate_cost(metrics.input_tokens, metrics.output_tokens)
+        else:
+            requested_cost = attempts[-1].cost_usd
+        total_cost = sum(a.cost_usd for a in attempts)
+        escalations = len(attempts) - 1
+
+        result.cascade = CascadeReport(
+            attempts=attempts,
+            escalations=escalations,
+            total_cost_usd=total_cost,
+            requested_model_cost_usd=requested_cost,
+            savings_usd=requested_cost - total_cost
+        )
+
+        stats = CascadeService.stats
+        stats["runs"] += 1
+        stats["escalated_runs"] += 1 if escalations else 0
+        stats["escalations"] += escalations
+        stats["total_cost_usd"] += total_cost
+        stats["savings_usd"] += requested_cost - total_cost
+        return result
+
+    @staticmethod
+    def get_stats() -> Dict[str, float]:
+        """Vrne statistiko kaskad z deležem eskalacij"""
+        stats = dict(CascadeService.stats)
+        stats["escalation_rate"] = stats["escalated_runs"] / stats["runs"] if stats["runs"] else 0.0
+        return stats
@@ -1,141 +1,272 @@
 """
 Service za delo z Supabase bazo podatkov
 """
-from typing import Optional
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple, Awaitable
 from app.database import get_supabase, SUPABASE_AVAILABLE
 from app.models.database import (
     SummaryRecord,
     ModelComparisonRecord,
-    ComparisonAnalysis
+    ComparisonAnalysis,
+    ModelRollup
 )
-from app.schemas.summary import SummaryResponse, ComparisonResponse
+from app.services.search_service import search_index
 
 
 class DatabaseService:
     """Service za shranjevanje in pridobivanje podatkov iz Supabase"""
     
+    # Stolpci za /api/history - veliki stolpci niso v privzeti projekciji
+    HISTORY_TABLES = {
+        "summaries": {
+            "columns": [
+                "id", "created_at", "model_name", "provider", "summary_text",
+                "response_time_ms", "tokens_used", "input_tokens", "output_tokens", "finish_reason",
+                "cost_usd", "max_length", "language", "original_text"
+            ],
+            "large": {"original_text"}
+        },
+        "model_comparisons": {
+            "columns": [
+                "id", "created_at", "fastest_model", "cheapest_model",
+                "average_response_time", "total_cost", "original_text", "comparison_data"
+            ],
+            "large": {"original_text", "comparison_data"}
+        },
+        "comparison_results": {
+            "columns": [
+                "id", "created_at", "comparison_id", "model_name", "provider", "summary_text",
+                "response_time_ms", "tokens_used", "input_tokens", "output_tokens", "finish_reason",
+                "cost_usd", "summary_length", "max_length", "compression_ratio", "source_rouge1_precision", "source_rouge2_precision",
+                "consensus_rouge_l", "quality_score"
+            ],
+            "large": set()
+        }
+    }
+    
+    @staticmethod
+    def _detect_provider(model: str) -> str:
+        """Določi provider iz imena modela"""
+        model_lower = model.lower()
+        if "claude" in model_lower or "anthropic" in model_lower:
+            return "Anthropic"
+        return "OpenAI"
+    
     @staticmethod
-    async def save_summary(summary_response: SummaryResponse, original_text: str) -> Optional[SummaryRecord]:
-        """Shrani povzetek v bazo"""
+    def _clean_model_name(model: str) -> str:
+        """Odstrani prefiks iz modelnega imena (openai/ ali anthropic/)"""
+        return model.replace("openai/", "").replace("anthropic/", "")
+    
+    @staticmethod
+    async def save_summary(
+        summary_payload: Dict[str, Any],
+        original_text: str,
+        max_length: Optional[int] = None
+    ) -> Optional[SummaryRecord]:
+        """
+        Shrani povzetek v bazo
+        
+        Args:
+            summary_payload: JSON-ready slovar SummaryResponse (glej utils.serialization.to_payload)
+            original_text: Originalno besedilo
+            max_length: Zahtevana dolžina povzetka (za kalibracijo tokenov)
+        """
         if not SUPABASE_AVAILABLE:
             return None
         
         try:
             supabase = get_supabase()
-            
-            # Določi provider iz modela
-            provider = "OpenAI"
-            model_lower = summary_response.model.lower()
-            if "claude" in model_lower or "anthropic" in model_lower:
-                provider = "Anthropic"
-            elif "gpt" in model_lower or "openai" in model_lower:
-                provider = "OpenAI"
-            
-            data = {
-                "original_text": original_text,
-                "summary_text": summary_response.summary,
-                "model_name": summary_response.model.replace("openai/", "").replace("anthropic/", ""),
-                "provider": provider,
-                "response_time_ms": summary_response.metrics.response_time_ms,
-                "tokens_used": summary_response.metrics.tokens_used,
-                "cost_usd": summary_response.metrics.cost_usd,
-            }
+            data = DatabaseService._summary_row(summary_payload, original_text, max_length)
             
             result = supabase.table("summaries").insert(data).execute()
+            # Tokenizacija in zaklep indeksa v threadu
+            await asyncio.to_thread(search_index.add, "summaries", result.data[0])
             return SummaryRecord(**result.data[0])
         except Exception as e:
             print(f"Napaka pri shranjevanju povzetka v bazo: {e}")
             return None
     
     @staticmethod
-    async def save_comparison(comparison_response: ComparisonResponse, original_text: str) -> Optional[ModelComparisonRecord]:
-        """Shrani primerjavo modelov v bazo in podrobne rezultate za vsak model"""
+    def _summary_row(
+        summary_payload: Dict[str, Any],
+        original_text: str,
+        max_length: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Vrstica tabele summaries iz JSON-ready SummaryResponse"""
+        model = summary_payload["model"]
+        metrics = summary_payload["metrics"]
+        return {
+            "original_text": original_text,
+            "summary_text": summary_payload["summary"],
+            "model_name": DatabaseService._clean_model_name(model),
+            "provider": DatabaseService._detect_provider(model),
+            "response_time_ms": metrics["response_time_ms"],
+            "tokens_used": metrics["tokens_used"],
+            "input_tokens": metrics.get("input_tokens"),
+            "output_tokens": metrics.get("output_tokens"),
+            "finish_reason": metrics.get("finish_reason"),
+            "cost_usd": metrics["cost_usd"],
+            "max_length": max_length,
+        }
+    
+    @staticmethod
+    def save_summaries(
+        items: List[Tuple[Dict[str, Any], str]],
+        max_length: Optional[int] = None
+    ) -> int:
+        """
+        Shrani več povzetkov z enim insertom (blokira - kliči v threadu)
+        
+        Če skupni insert ne uspe, se vrstice shranijo posamično, da ena
+        neveljavna vrstica ne zavrže ostalih.
+        
+        Args:
+            items: (JSON-ready SummaryResponse, originalno besedilo)
+            max_length: Zahtevana dolžina povzetkov (za kalibracijo tokenov)
+            
+        Returns:
+            Število shranjenih vrstic
+        """
+        if not SUPABASE_AVAILABLE or not items:
+            return 0
+        
+        rows = [DatabaseService._summary_row(payload, text, max_length) for payload, text in items]
+        try:
+            table = get_supabase().table("summaries")
+        except Exception as e:
+            print(f"Napaka pri shranjevanju povzetkov v bazo: {e}")
+            return 0
+        
+        try:
+            inserted = table.insert(rows).execute().data
+        except Exception as e:
+            print(f"Napaka pri skupnem shranjevanju {len(rows)} povzetkov, shranjujem posamično: {e}")
+            inserted = []
+            for row in rows:
+                try:
+                    inserted.extend(table.insert(row).execute().data)
+                except Exception as row_error:
+                    print(f"Napaka pri shranjevanju povzetka v bazo: {row_error}")
+        
+        for record in inserted:
+            search_index.add("summaries", record)
+        return len(inserted)
+    
+    @staticmethod
+    def _save_comparison_results(
+        comparison_id: str,
+        results: List[Dict[str, Any]],
+        quality_models: List[Dict[str, Any]],
+        max_length: Optional[int]
+    ) -> None:
+        """Shrani podrobne rezultate modelov (blokirajoče - kliče se v threadu)"""
+        supabase = get_supabase()
+        for index, result in enumerate(results):
+            try:
+                model = result["model"]
+                metrics = result["metrics"]
+                summary = result["summary"]
+                result_data = {
+                    "comparison_id": comparison_id,
+                    "model_name": DatabaseService._clean_model_name(model),
+                    "provider": DatabaseService._detect_provider(model),
+                    "summary_text": summary,
+                    "response_time_ms": metrics["response_time_ms"],
+                    "tokens_used": metrics["tokens_used"],
+                    "input_tokens": metrics.get("input_tokens"),
+                    "output_tokens": metrics.get("output_tokens"),
+                    "finish_reason": metrics.get("finish_reason"),
+                    "cost_usd": metrics["cost_usd"],
+                    "summary_length": len(summary) if summary else 0,
+                    "max_length": max_length
+                }
+                
+                # Kakovost je v istem vrstnem redu kot rezultati (isti model je lahko večkrat)
+                if index < len(quality_models):
+                    model_quality = quality_models[index]
+                    result_data.update({
+                        "compression_ratio": model_quality["compression_ratio"],
+                        "source_rouge1_precision": model_quality["source_rouge1_precision"],
+                        "source_rouge2_precision": model_quality["source_rouge2_precision"],
+                        "consensus_rouge_l": model_quality["consensus_rouge_l"],
+                        "quality_score": model_quality["quality_score"]
+                    })
+                
+                inserted = supabase.table("comparison_results").insert(result_data).execute()
+                search_index.add("comparison_results", inserted.data[0])
+            except Exception as result_error:
+                print(f"Napaka pri shranjevanju rezultata za model {result.get('model')}: {result_error}")
+                # Nadaljujemo z naslednjim modelom
+    
+    @staticmethod
+    async def save_comparison(
+        comparison_payload: Dict[str, Any],
+        original_text: str,
+        quality_task: Optional[Awaitable[Optional[Dict[str, Any]]]] = None,
+        max_length: Optional[int] = None
+    ) -> Optional[ModelComparisonRecord]:
+        """
+        Shrani primerjavo modelov v bazo in podrobne rezultate za vsak model
+        
+        Glavna primerjava se zapiše sočasno z izračunom kakovosti; ko je kakovost
+        znana, se doda v comparison_payload (in shranjeni comparison_data) ter
+        k rezultatom posameznih modelov.
+        
+        Args:
+            comparison_payload: JSON-ready slovar ComparisonResponse - isti, ki gre v HTTP odgovor
+            original_text: Originalno besedilo
+            quality_task: Izračun kakovosti (JSON-ready QualityReport); napako prijavi klicatelj
+            max_length: Zahtevana dolžina povzetkov (za kalibracijo tokenov)
+        """
         if not SUPABASE_AVAILABLE:
             return None
         
         try:
             supabase = get_supabase()
             
-            # 1. Shrani glavno primerjavo
-            # Serializiraj rezultate - pretvori datetime v string
-            results_data = []
-            for r in comparison_response.results:
-                try:
-                    result_dict = r.model_dump() if hasattr(r, 'model_dump') else r.dict()
-                    # Pretvori datetime v ISO format string
-                    if "metrics" in result_dict and isinstance(result_dict["metrics"], dict):
-                        if "timestamp" in result_dict["metrics"]:
-                            timestamp = result_dict["metrics"]["timestamp"]
-                            if hasattr(timestamp, "isoformat"):
-                                result_dict["metrics"]["timestamp"] = timestamp.isoformat()
-                            elif isinstance(timestamp, str):
-                                pass  # Already a string
-                    results_data.append(result_dict)
-                except Exception as serialize_error:
-                    print(f"Napaka pri serializaciji rezultata: {serialize_error}")
-                    # Poskusi z osnovno serializacijo
-                    try:
-                        results_data.append({
-                            "model": r.model,
-                            "summary": r.summary,
-                            "metrics": {
-                                "response_time_ms": r.metrics.response_time_ms,
-                                "tokens_used": r.metrics.tokens_used,
-                                "cost_usd": r.metrics.cost_usd
-                            }
-                        })
-                    except:
-                        pass
-            
-            # Serializiraj comparison
-            comparison_dict = comparison_response.comparison.model_dump() if hasattr(comparison_response.comparison, 'model_dump') else comparison_response.comparison.dict()
-            
-            # Odstrani prefiks iz modelnih imen za shranjevanje (openai/ ali anthropic/)
-            fastest_model = comparison_response.comparison.fastest.replace("openai/", "").replace("anthropic/", "")
-            cheapest_model = comparison_response.comparison.cheapest.replace("openai/", "").replace("anthropic/", "")
+            results = comparison_payload["results"]
+            comparison = comparison_payload["comparison"]
             
+            # 1. Shrani glavno primerjavo - payload je že serializiran (datetime -> ISO)
             comparison_data = {
                 "original_text": original_text,
-                "comparison_data": {
-                    "results": results_data,
-                    "comparison": comparison_dict
-                },
-                "fastest_model": fastest_model,
-                "cheapest_model": cheapest_model,
-                "average_response_time": comparison_response.comparison.average_response_time,
-                "total_cost": comparison_response.comparison.total_cost
+                "comparison_data": comparison_payload,
+                "fastest_model": DatabaseService._clean_model_name(comparison["fastest"]) if comparison["fastest"] else None,
+                "cheapest_model": DatabaseService._clean_model_name(comparison["cheapest"]),
+                "average_response_time": comparison["average_response_time"],
+                "total_cost": comparison["total_cost"]
             }
             
-            comparison_result = supabase.table("model_comparisons").insert(comparison_data).execute()
+            insert = asyncio.to_thread(supabase.table("model_comparisons").insert(comparison_data).execute)
+            if quality_task is None:
+                comparison_result, quality = await insert, None
+            else:
+                comparison_result, quality = await asyncio.gather(insert, quality_task, return_exceptions=True)
+                if isinstance(comparison_result, BaseException):
+                    raise comparison_result
+                if isinstance(quality, BaseException):
+                    quality = None
             comparison_record = ModelComparisonRecord(**comparison_result.data[0])
-            comparison_id = comparison_record.id
+            comparison_id = str(comparison_record.id)
             
-            # 2. Shrani podrobne rezultate za vsak model
-            for result in comparison_response.results:
-                try:
-                    # Določi provider
-                    provider = "OpenAI"
-                    model_lower = result.model.lower()
-                    if "claude" in model_lower or "anthropic" in model_lower:
-                        provider = "Anthropic"
-                    elif "gpt" in model_lower or "openai" in model_lower:
-                        provider = "OpenAI"
-                    
-                    result_data = {
-                        "comparison_id": str(comparison_id),
-                        "model_name": result.model.replace("openai/", "").replace("anthropic/", ""),
-                        "provider": provider,
-                        "summary_text": result.summary,
-                        "response_time_ms": result.metrics.response_time_ms,
-                        "tokens_used": result.metrics.tokens_used,
-                        "cost_usd": result.metrics.cost_usd,
-                        "summary_length": len(result.summary) if result.summary else 0
-                    }
-                    
-                    supabase.table("comparison_results").insert(result_data).execute()
-                except Exception as result_error:
-                    print(f"Napaka pri shranjevanju rezultata za model {result.model}: {result_error}")
-                    # Nadaljujemo z naslednjim modelom
+            # 2. Dopolni comparison_data s kakovostjo in shrani rezultate modelov
+            writes = [
+                asyncio.to_thread(
+                    DatabaseService._save_comparison_results,
+                    comparison_id, results, quality["models"] if quality else [], max_length
+                )
+            ]
+            if quality:
+                comparison_payload["quality"] = quality
+                writes.append(asyncio.to_thread(
+                    supabase.table("model_comparisons")
+                    .update({"comparison_data": comparison_payload})
+                    .eq("id", comparison_id)
+                    .execute
+                ))
+            for outcome in await asyncio.gather(*writes, return_exceptions=True):
+                if isinstance(outcome, Exception):
+                    print(f"Napaka pri shranjevanju kakovosti primerjave: {outcome}")
             
             return comparison_record
         except ValueError as ve:
@@ -148,6 +279,42 @@ class DatabaseService:
             traceback.print_exc()
             return None
     
+    @staticmethod
+    async def save_benchmark(benchmark_payload: Dict[str, Any], original_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Shrani benchmark (ponovljeno primerjavo) v tabelo benchmark_runs
+        
+        Benchmarki so ločeni od model_comparisons, zato ne vplivajo na
+        times_fastest v comparison_analysis.
+        
+        Args:
+            benchmark_payload: JSON-ready slovar ComparisonResponse z benchmark poročilom
+            original_text: Originalno besedilo
+        """
+        if not SUPABASE_AVAILABLE:
+            return None
+        
+        try:
+            supabase = get_supabase()
+            
+            report = benchmark_payload["benchmark"]
+            data = {
+                "original_text": original_text,
+                "models": [DatabaseService._clean_model_name(m["model"]) for m in report["models"]],
+                "trials": report["trials"],
+                "warmup": report["warmup"],
+                "concurrency": report["concurrency"],
+                "fastest_model": DatabaseService._clean_model_name(report["fastest"]) if report["fastest"] else None,
+                "total_cost_usd": report["total_cost_usd"],
+                "report": report
+            }
+            
+            result = supabase.table("benchmark_runs").insert(data).execute()
+            return result.data[0]
+        except Exception as e:
+            print(f"Napaka pri shranjevanju benchmarka v bazo: {e}")
+            return None
+    
     @staticmethod
     async def get_comparison_analysis() -> list[ComparisonAnalysis]:
         """Pridobi analizo primerjav - agregirane statistike"""
@@ -162,3 +329,202 @@ class DatabaseService:
         except Exception as e:
             print(f"Napaka pri pridobivanju analize primerjav: {e}")
             return []
+    
+    @staticmethod
+    async def get_rollups(
+        granularity: str,
+        start: str,
+        end: str,
+        model: Optional[str] = None
+    ) -> list[ModelRollup]:
+        """
+        Pridobi časovne agregate modelov (hour/day) za interval [start, end)
+        
+        Bere samo tabelo model_rollups - ena vrstica na interval in model,
+        ne glede na število surovih rezultatov.
+        """
+        if not SUPABASE_AVAILABLE:
+            return []
+        
+        try:
+            supabase = get_supabase()
+            
+            query = (
+                supabase.table("model_rollups")
+                .select("*")
+                .eq("granularity", granularity)
+                .gte("bucket_start", start)
+                .lt("bucket_start", end)
+            )
+            if model:
+                query = query.eq("model_name", DatabaseService._clean_model_name(model))
+            
+            result = query.order("bucket_start").execute()
+            return [ModelRollup(**row) for row in result.data]
+        except Exception as e:
+            print(f"Napaka pri pridobivanju agregatov: {e}")
+            return []
+    
+    @staticmethod
+    async def get_summary_texts(hits: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Pridobi besedila povzetkov za zadetke iskanja - ena poizvedba na tabelo
+        
+        Args:
+            hits: Zadetki iz search_index.search (table, id)
+            
+        Returns:
+            Slovar id -> summary_text
+        """
+        if not SUPABASE_AVAILABLE:
+            return {}
+        
+        supabase = get_supabase()
+        ids_by_table: Dict[str, List[str]] = {}
+        for hit in hits:
+            ids_by_table.setdefault(hit["table"], []).append(hit["id"])
+        
+        texts = {}
+        for table, ids in ids_by_table.items():
+            result = supabase.table(table).select("id,summary_text").in_("id", ids).execute()
+            texts.update({str(row["id"]): row["summary_text"] for row in result.data or []})
+        return texts
+    
+    @staticmethod
+    def resolve_history_fields(table: str, fields: Optional[List[str]]) -> List[str]:
+        """
+        Določi projekcijo stolpcev za zgodovino
+        
+        Args:
+            table: Ime tabele (ključ v HISTORY_TABLES)
+            fields: Zahtevani stolpci ali None za privzete (brez velikih)
+            
+        Returns:
+            Seznam stolpcev - id in created_at sta vedno vključena (kurzor)
+            
+        Raises:
+            ValueError: Če je zahtevan neznan stolpec
+        """
+        config = DatabaseService.HISTORY_TABLES[table]
+        if not fields:
+            return [c for c in config["columns"] if c not in config["large"]]
+        
+        unknown = [f for f in fields if f not in config["columns"]]
+        if unknown:
+            raise ValueError(
+                f"Neznani stolpci: {', '.join(unknown)}. Dovoljeni: {', '.join(config['columns'])}"
+            )
+        return ["id", "created_at"] + [f for f in fields if f not in ("id", "created_at")]
+    
+    @staticmethod
+    async def get_history_page(
+        table: str,
+        columns: List[str],
+        limit: int,
+        cursor: Optional[Tuple[str, str]] = None,
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        comparison_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Pridobi eno stran zgodovine s keyset paginacijo po (created_at DESC, id DESC)
+        
+        Namesto OFFSET se nadaljuje od zadnje vrstice prejšnje strani, zato je
+        čas poizvedbe enak ne glede na globino (glej indekse v schema.sql).
+        
+        Args:
+            table: Ime tabele (summaries, model_comparisons, comparison_results)
+            columns: Stolpci za projekcijo
+            limit: Velikost strani
+            cursor: (created_at, id) zadnje vrstice prejšnje strani
+            model: Filter po modelu
+            provider: Filter po providerju
+            created_from: Spodnja meja created_at (vključno)
+            created_to: Zgornja meja created_at (izključno)
+            comparison_id: Filter po primerjavi (samo comparison_results)
+            
+        Returns:
+            (vrstice, has_more)
+        """
+        # Supabase klient je sinhron - poizvedba v threadu ne blokira event loopa
+        return await asyncio.to_thread(
+            DatabaseService.fetch_page,
+            table, columns, limit, cursor, model, provider, created_from, created_to, comparison_id
+        )
+    
+    @staticmethod
+    def fetch_page(
+        table: str,
+        columns: List[str],
+        limit: int,
+        cursor: Optional[Tuple[str, str]] = None,
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        comparison_id: Optional[str] = None,
+        ascending: bool = False
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Sinhrona keyset poizvedba - skupna za zgodovino in izvoz
+        
+        Argumenti so enaki kot pri get_history_page; ascending=True bere od
+        najstarejše vrstice naprej (izvoz), sicer od najnovejše.
+        """
+        if not SUPABASE_AVAILABLE:
+            return [], False
+        
+        try:
+            supabase = get_supabase()
+            
+            select = ",".join(columns)
+            embedded = table == "model_comparisons" and (model or provider)
+            if embedded:
+                # Primerjave nimajo stolpca model_name - filtriraj preko rezultatov
+                select += ",comparison_results!inner(model_name,provider)"
+            
+            query = supabase.table(table).select(select)
+            
+            model_column = "comparison_results.model_name" if embedded else "model_name"
+            provider_column = "comparison_results.provider" if embedded else "provider"
+            if model:
+                query = query.eq(model_column, DatabaseService._clean_model_name(model))
+            if provider:
+                query = query.eq(provider_column, provider)
+            if created_from:
+                query = query.gte("created_at", created_from)
+            if created_to:
+                query = query.lt("created_at", created_to)
+            if comparison_id:
+                query = query.eq("comparison_id", comparison_id)
+            
+            if cursor:
+                created_at, row_id = cursor
+                op = "gt" if ascending else "lt"
+                keyset = f'(created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}.{row_id}))'
+                if hasattr(query, "or_"):
+                    query = query.or_(keyset[1:-1])
+                else:
+                    # Starejši postgrest nima or_ - dodaj parameter neposredno
+                    query.params = query.params.add("or", keyset)
+            
+            query = query.order("created_at", desc=not ascending).order("id", desc=not ascending)
+            orders = query.params.get_list("order")
+            if len(orders) > 1:
+                # Starejši postgrest doda vsak order kot ločen parameter, PostgREST pa
+                # upošteva samo enega - združi v "created_at.desc,id.desc"
+                query.params = query.params.set("order", ",".join(orders))
+            
+            # Ena vrstica več pove, ali obstaja naslednja stran
+            result = query.limit(limit + 1).execute()
+            
+            rows = result.data or []
+            if embedded:
+                for row in rows:
+                    row.pop("comparison_results", None)
+            return rows[:limit], len(rows) > limit
+        except Exception as e:
+            print(f"Napaka pri pridobivanju zgodovine ({table}): {e}")
+            raise
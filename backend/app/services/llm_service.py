@@ -3,15 +3,36 @@ Abstraktna osnovna klasa za LLM storitve
 Vsi LLM servisi morajo implementirati ta interface
 """
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, NamedTuple, Optional
 from app.schemas.summary import SummaryResponse, SummaryMetrics
 from datetime import datetime
 import time
+from app.services.token_calibration import token_calibrator
+from app.utils.compression import estimate_tokens
+from app.utils.packing import (
+    DOCUMENT_OVERHEAD_TOKENS, build_packed_prompt, parse_packed_response, split_tokens
+)
+
+
+class Completion(NamedTuple):
+    """Surov odgovor enega klica modela"""
+    content: str
+    finish_reason: Optional[str]
+    input_tokens: int
+    output_tokens: int
+    start_time: float
+    end_time: float
 
 
 class LLMService(ABC):
     """Abstraktna osnovna klasa za LLM storitve"""
     
+    # Ime providerja - ključ za omejitve v razporejevalniku
+    provider: str = ""
+    
+    # Jezik, v katerem prompt zahteva povzetek (za preverjanje jezika v kaskadi)
+    prompt_language: str = "sl"
+    
     def __init__(self, model_name: str, api_key: str):
         self.model_name = model_name
         self.api_key = api_key
@@ -58,6 +79,87 @@ class LLMService(ABC):
         """
         pass
     
+    @abstractmethod
+    async def complete(self, prompt: str, max_tokens: int) -> Completion:
+        """
+        En klic modela s podanim promptom (skozi razporejevalnik)
+        
+        Args:
+            prompt: Uporabniško sporočilo
+            max_tokens: Omejitev izhodnih tokenov
+            
+        Returns:
+            Completion z vsebino, finish_reason, usage in časom klica
+        """
+        pass
+    
+    def max_output_tokens(self, max_length: Optional[int] = None) -> int:
+        """
+        Vrne omejitev izhodnih tokenov za klic modela - kalibrirano po modelu
+        
+        Args:
+            max_length: Maksimalna dolžina povzetka v znakih (opcijsko)
+        """
+        return token_calibrator.max_tokens(self.model_name, max_length)
+    
+    def packed_output_tokens(self, count: int, max_length: Optional[int] = None) -> int:
+        """Omejitev izhodnih tokenov za pakiran klic s count besedili"""
+        return count * (self.max_output_tokens(max_length) + DOCUMENT_OVERHEAD_TOKENS)
+    
+    async def generate_packed(
+        self,
+        texts: List[str],
+        max_length: Optional[int] = None
+    ) -> List[SummaryResponse]:
+        """
+        Povzame več kratkih besedil z enim klicem (JSON odgovor)
+        
+        Tokeni in strošek klica se razdelijo po besedilih: vhod sorazmerno z
+        dolžino besedila (skupna navodila enakomerno), izhod sorazmerno z
+        dolžino povzetka. Vsota stroškov je enaka strošku klica.
+        
+        Returns:
+            SummaryResponse za vsako besedilo v istem vrstnem redu; besedila,
+            ki jih ni bilo mogoče razčleniti, imajo prazen povzetek
+        """
+        max_tokens = self.packed_output_tokens(len(texts), max_length)
+        completion = await self.complete(build_packed_prompt(texts, max_length), max_tokens)
+        summaries = parse_packed_response(completion.content, len(texts))
+        
+        document_tokens = [estimate_tokens(text) + DOCUMENT_OVERHEAD_TOKENS for text in texts]
+        shared = max(0, completion.input_tokens - sum(document_tokens)) / len(texts)
+        input_shares = split_tokens(completion.input_tokens, [tokens + shared for tokens in document_tokens])
+        output_shares = split_tokens(
+            completion.output_tokens, [len(summaries.get(i, "")) for i in range(len(texts))]
+        )
+        
+        if completion.finish_reason == "length":
+            # Odrezan pakiran odgovor - kalibratorju enkrat, ne za vsako besedilo
+            self._record_output(None, completion.output_tokens, completion.finish_reason, max_length)
+        
+        results = []
+        for i in range(len(texts)):
+            summary = summaries.get(i, "")
+            if summary and completion.finish_reason != "length":
+                self._record_output(summary, output_shares[i], completion.finish_reason, max_length)
+            metrics = self._create_metrics(
+                completion.start_time, completion.end_time, input_shares[i], output_shares[i],
+                max_tokens, completion.finish_reason
+            )
+            metrics.packed_documents = len(texts)
+            results.append(SummaryResponse(summary=summary, model=self.model_name, metrics=metrics))
+        return results
+    
+    def _record_output(
+        self,
+        summary: Optional[str],
+        output_tokens: int,
+        finish_reason: Optional[str],
+        max_length: Optional[int] = None
+    ) -> None:
+        """Posreduje usage podatke odgovora kalibratorju tokenov"""
+        token_calibrator.observe(self.model_name, summary, output_tokens, finish_reason, max_length)
+    
     def _measure_time(self) -> float:
         """Pomožna metoda za merjenje časa"""
         return time.time()
@@ -67,7 +169,9 @@ class LLMService(ABC):
         start_time: float, 
         end_time: float,
         input_tokens: int,
-        output_tokens: int
+        output_tokens: int,
+        max_tokens: Optional[int] = None,
+        finish_reason: Optional[str] = None
     ) -> SummaryMetrics:
         """Ustvari SummaryMetrics objekt"""
         response_time_ms = (end_time - start_time) * 1000
@@ -77,6 +181,11 @@ class LLMService(ABC):
         return SummaryMetrics(
             response_time_ms=response_time_ms,
             tokens_used=total_tokens,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            max_tokens=max_tokens,
+            finish_reason=finish_reason,
+            truncated=finish_reason == "length",
             cost_usd=cost,
             timestamp=datetime.now()
         )
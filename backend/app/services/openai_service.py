@@ -2,22 +2,25 @@
 OpenAI LLM Service - Integracija z OpenAI API preko OpenRouter
 """
 from typing import Optional
-from app.services.llm_service import LLMService
+from app.services.llm_service import LLMService, Completion
 from app.schemas.summary import SummaryResponse
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.config import settings
+from app.services.scheduler import provider_scheduler
 
 
 class OpenAIService(LLMService):
     """OpenAI LLM storitev - uporablja OpenRouter API"""
     
+    provider = "OpenAI"
+    
     def __init__(self, model_name: str = "gpt-4o-mini", api_key: str = ""):
         super().__init__(model_name, api_key)
         
         if not settings.openrouter_api_key:
             raise ValueError("OpenRouter API key is required. Nastavite OPENROUTER_API_KEY v config.")
         
-        self.client = OpenAI(
+        self.client = AsyncOpenAI(
             base_url=settings.openrouter_base_url,
             api_key=settings.openrouter_api_key
         )
@@ -34,43 +37,61 @@ class OpenAIService(LLMService):
         max_length: Optional[int] = None
     ) -> SummaryResponse:
         """Generira povzetek z OpenAI modelom preko OpenRouterja"""
-        start_time = self._measure_time()
-        
         prompt = f"Povzemi naslednje besedilo v slovenščini. Povzetek naj bo jasen in jedrnat:\n\n{text}"
         if max_length:
             prompt += f"\n\nPovzetek naj bo največ {max_length} znakov dolg."
         
         try:
-            extra_headers = {
-                "HTTP-Referer": "http://localhost:3000",
-                "X-Title": "AI Summary App"
-            }
+            max_tokens = self.max_output_tokens(max_length)
+            completion = await self.complete(prompt, max_tokens)
             
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": "Ti si pomočnik za povzemanje besedil v slovenščini."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_length // 4 if max_length else 200,
-                extra_headers=extra_headers
+            self._record_output(
+                completion.content, completion.output_tokens, completion.finish_reason, max_length
+            )
+            metrics = self._create_metrics(
+                completion.start_time, completion.end_time,
+                completion.input_tokens, completion.output_tokens,
+                max_tokens, completion.finish_reason
             )
-            
-            summary = response.choices[0].message.content
-            input_tokens = response.usage.prompt_tokens
-            output_tokens = response.usage.completion_tokens
-            end_time = self._measure_time()
-            
-            metrics = self._create_metrics(start_time, end_time, input_tokens, output_tokens)
             
             return SummaryResponse(
-                summary=summary,
+                summary=completion.content,
                 model=self.model_name,
                 metrics=metrics
             )
         except Exception as e:
             raise Exception(f"Napaka pri generiranju povzetka z OpenAI: {str(e)}")
     
+    async def complete(self, prompt: str, max_tokens: int) -> Completion:
+        """En klic modela preko OpenRouterja"""
+        extra_headers = {
+            "HTTP-Referer": "http://localhost:3000",
+            "X-Title": "AI Summary App"
+        }
+        
+        # Vsi klici gredo skozi centralni razporejevalnik (prioritete, omejitev sočasnosti)
+        async with provider_scheduler.slot(self.provider):
+            # Čas odziva brez čakanja v vrsti razporejevalnika
+            start_time = self._measure_time()
+            response = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": "Ti si pomočnik za povzemanje besedil v slovenščini."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                extra_headers=extra_headers
+            )
+        
+        return Completion(
+            content=response.choices[0].message.content,
+            finish_reason=response.choices[0].finish_reason,
+            input_tokens=response.usage.prompt_tokens,
+            output_tokens=response.usage.completion_tokens,
+            start_time=start_time,
+            end_time=self._measure_time()
+        )
+    
     def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
         """Izračuna strošek za OpenAI modele preko OpenRouterja"""
         model_lower = self.model_name.lower()
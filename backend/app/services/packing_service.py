@@ -0,0 +1,163 @@
+"""
+Pakirni service - več kratkih besedil v en klic modela, ob napaki navadni klici
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.schemas.summary import SummaryResponse, PackingReport
+from app.utils.packing import pack_documents
+
+# besedilo -> rezultat navadnega klica; klicatelj poskrbi za proračun in sledenje
+SingleDispatch = Callable[[str], Awaitable[SummaryResponse]]
+# besedila -> rezultati pakiranega klica (glej LLMService.generate_packed)
+PackedDispatch = Callable[[List[str]], Awaitable[List[SummaryResponse]]]
+
+
+class PackingService:
+    """
+    Razdeli besedila v skupine do proračuna vhodnih tokenov in vsako skupino
+    povzame z enim klicem. Besedila, za katera odgovor ni razčlenljiv (ali je
+    pakiran klic spodletel), se povzamejo z navadnim klicem; delež stroška
+    neuspelega pakiranega klica se prišteje njihovemu rezultatu.
+    """
+
+    # Skupna statistika procesa (za /api/summary/packing/stats)
+    stats: Dict[str, float] = {
+        "runs": 0,
+        "documents": 0,
+        "calls": 0,
+        "packed_calls": 0,
+        "packed_documents": 0,
+        "fallback_documents": 0,
+        "total_cost_usd": 0.0
+    }
+
+    def __init__(
+        self,
+        dispatch_single: SingleDispatch,
+        dispatch_packed: PackedDispatch,
+        token_budget: Optional[int] = None,
+        max_documents: Optional[int] = None,
+        max_document_tokens: Optional[int] = None
+    ):
+        """
+        Args:
+            dispatch_single: Funkcija, ki povzame eno besedilo
+            dispatch_packed: Funkcija, ki povzame skupino besedil z enim klicem
+            token_budget: Največ vhodnih tokenov besedil na pakiran klic
+            max_documents: Največ besedil na pakiran klic (1 = brez pakiranja)
+            max_document_tokens: Daljša besedila gredo vedno v navaden klic
+        """
+        self.dispatch_single = dispatch_single
+        self.dispatch_packed = dispatch_packed
+        self.token_budget = token_budget or settings.packing_token_budget
+        self.max_documents = max_documents or settings.packing_max_documents
+        self.max_document_tokens = max_document_tokens or settings.packing_max_document_tokens
+        self._calls = 0
+        self._packed_calls = 0
+        self._packed_documents = 0
+        self._fallback_documents = 0
+        # Plačani deleži pakiranih klicev za besedila, katerih navaden klic je spodletel
+        self._unassigned_cost = 0.0
+
+    async def _single(self, text: str) -> Tuple[Optional[SummaryResponse], Optional[Exception]]:
+        self._calls += 1
+        try:
+            return await self.dispatch_single(text), None
+        except Exception as e:
+            return None, e
+
+    async def _run_group(
+        self, texts: List[str]
+    ) -> List[Tuple[Optional[SummaryResponse], Optional[Exception]]]:
+        if len(texts) == 1:
+            return [await self._single(texts[0])]
+
+        self._calls += 1
+        try:
+            packed: List[Optional[SummaryResponse]] = list(await self.dispatch_packed(texts))
+            self._packed_calls += 1
+        except Exception as e:
+            print(f"Napaka pri pakiranem klicu ({len(texts)} besedil), uporabljeni bodo navadni klici: {e}")
+            packed = [None] * len(texts)
+
+        missing = [i for i, result in enumerate(packed) if result is None or not result.summary]
+        self._packed_documents += len(texts) - len(missing)
+        self._fallback_documents += len(missing)
+        fallbacks = await asyncio.gather(*(self._single(texts[i]) for i in missing))
+
+        outcomes = [(result, None) for result in packed]
+        for i, (result, error) in zip(missing, fallbacks):
+            wasted = packed[i]
+            if result is None and wasted is not None:
+                # Ni rezultata, ki bi mu pripisali strošek - v poročilu ostane vseeno
+                self._unassigned_cost += wasted.metrics.cost_usd
+            elif result is not None and wasted is not None:
+                # Delež pakiranega klica je bil plačan - pripiše se temu besedilu
+                metrics = result.metrics
+                metrics.cost_usd += wasted.metrics.cost_usd
+                metrics.tokens_used += wasted.metrics.tokens_used
+                metrics.input_tokens = (metrics.input_tokens or 0) + (wasted.metrics.input_tokens or 0)
+                metrics.output_tokens = (metrics.output_tokens or 0) + (wasted.metrics.output_tokens or 0)
+                metrics.response_time_ms += wasted.metrics.response_time_ms
+            outcomes[i] = (result, error)
+        return outcomes
+
+    async def run(
+        self, texts: List[str]
+    ) -> Tuple[List[Optional[SummaryResponse]], Dict[int, Exception], PackingReport]:
+        """
+        Povzame vsa besedila - skupine tečejo sočasno (omejitev je v razporejevalniku)
+
+        Returns:
+            (rezultati v vrstnem redu besedil, napake po indeksu, poročilo)
+        """
+        start = time.perf_counter()
+        groups = pack_documents(texts, self.token_budget, self.max_documents, self.max_document_tokens)
+        group_outcomes = await asyncio.gather(
+            *(self._run_group([texts[i] for i in group]) for group in groups)
+        )
+
+        results: List[Optional[SummaryResponse]] = [None] * len(texts)
+        errors: Dict[int, Exception] = {}
+        for group, outcomes in zip(groups, group_outcomes):
+            for index, (result, error) in zip(group, outcomes):
+                results[index] = result
+                if error is not None:
+                    errors[index] = error
+
+        total_cost = sum(result.metrics.cost_usd for result in results if result is not None) + self._unassigned_cost
+        succeeded = len(texts) - len(errors)
+        report = PackingReport(
+            documents=len(texts),
+            groups=len(groups),
+            calls=self._calls,
+            packed_calls=self._packed_calls,
+            packed_documents=self._packed_documents,
+            fallback_documents=self._fallback_documents,
+            failed_documents=len(errors),
+            total_cost_usd=total_cost,
+            cost_per_document_usd=total_cost / succeeded if succeeded else 0.0,
+            duration_ms=(time.perf_counter() - start) * 1000
+        )
+
+        stats = PackingService.stats
+        stats["runs"] += 1
+        stats["documents"] += len(texts)
+        stats["calls"] += self._calls
+        stats["packed_calls"] += self._packed_calls
+        stats["packed_documents"] += self._packed_documents
+        stats["fallback_documents"] += self._fallback_documents
+        stats["total_cost_usd"] += total_cost
+        return results, errors, report
+
+    @staticmethod
+    def get_stats() -> Dict[str, float]:
+        """Vrne statistiko pakiranja z deležem navadnih klicev"""
+        stats = dict(PackingService.stats)
+        attempted = stats["packed_documents"] + stats["fallback_documents"]
+        stats["fallback_rate"] = stats["fallback_documents"] / attempted if attempted else 0.0
+        stats["documents_per_call"] = stats["documents"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
@@ -0,0 +1,223 @@
+"""
+Razporejevalnik klicev providerjev - prioritetni razredi, pravično čakanje
+po odjemalcih in omejitev sočasnih klicev na providerja
+
+Uporaba v LLM servisih:
+    async with provider_scheduler.slot("OpenAI"):
+        response = await self.client.chat.completions.create(...)
+
+Razred in odjemalca nastavi router s set_request_context() - vrednosti se
+prenašajo preko ContextVar, tudi v taske iz asyncio.gather.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+PRIORITY_CLASSES = ("interactive", "batch")
+
+_request_priority: ContextVar[str] = ContextVar("request_priority", default="interactive")
+_request_client: ContextVar[str] = ContextVar("request_client", default="anonymous")
+
+
+def set_request_context(priority: Optional[str], client_key: Optional[str]) -> None:
+    """Nastavi prioritetni razred in odjemalca za klice providerjev v tej zahtevi"""
+    if priority is not None:
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Neznan prioritetni razred '{priority}'. Podprti: {', '.join(PRIORITY_CLASSES)}")
+        _request_priority.set(priority)
+    if client_key is not None:
+        _request_client.set(client_key)
+
+
+class _Waiter:
+    """Zahteva v čakalni vrsti"""
+    __slots__ = ("future", "priority", "client", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, priority: str, client: str):
+        self.future = future
+        self.priority = priority
+        self.client = client
+        self.enqueued_at = time.perf_counter()
+
+
+class _ClassQueue:
+    """
+    Čakalna vrsta enega prioritetnega razreda - uteženo pravično čakanje po odjemalcih
+
+    Vsaka zahteva dobi oznako max(virtualni čas, zadnja oznaka odjemalca) + 1/utež
+    (settings.scheduler_client_weights, privzeto 1), vrsta pa vedno vrne najmanjšo
+    oznako. Odjemalec z veliko zahtevami tako ne more izriniti ostalih, odjemalec
+    z utežjo 2 pa dobi dvakrat več slotov kot odjemalec z utežjo 1.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._last_tag: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, waiter: _Waiter) -> None:
+        weight = settings.scheduler_client_weights.get(waiter.client, 1.0)
+        tag = max(self._virtual_time, self._last_tag.get(waiter.client, 0.0)) + 1.0 / max(weight, 1e-3)
+        self._last_tag[waiter.client] = tag
+        heapq.heappush(self._heap, (tag, next(self._seq), waiter))
+
+    def pop(self) -> Optional[_Waiter]:
+        while self._heap:
+            tag, _, waiter = heapq.heappop(self._heap)
+            if waiter.future.done():
+                continue  # Preklican med čakanjem
+            self._virtual_time = tag
+            if not self._heap:
+                self._last_tag.clear()
+            return waiter
+        return None
+
+
+class _ProviderState:
+    """Stanje enega providerja - zasedenost in vrste po razredih"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.queues: Dict[str, _ClassQueue] = {p: _ClassQueue() for p in PRIORITY_CLASSES}
+        # Virtualni čas razredov za uteženo delitev med interactive in batch
+        self.class_time: Dict[str, float] = {p: 0.0 for p in PRIORITY_CLASSES}
+
+    def enqueue(self, waiter: _Waiter) -> None:
+        queue = self.queues[waiter.priority]
+        if not len(queue):
+            # Razred, ki je miroval, ne sme dobiti nabranega "kredita"
+            others = [self.class_time[p] for p in PRIORITY_CLASSES if p != waiter.priority and len(self.queues[p])]
+            if others:
+                self.class_time[waiter.priority] = max(self.class_time[waiter.priority], min(others))
+        queue.push(waiter)
+
+    def has_waiters(self) -> bool:
+        return any(len(q) for q in self.queues.values())
+
+    def next_waiter(self) -> Optional[_Waiter]:
+        weights = settings.scheduler_class_weights
+        active = [p for p in PRIORITY_CLASSES if len(self.queues[p])]
+        while active:
+            # Razred, ki je najbolj zaostal glede na svojo utež
+            chosen = min(active, key=lambda p: (self.class_time[p], PRIORITY_CLASSES.index(p)))
+            waiter = self.queues[chosen].pop()
+            if waiter is None:
+                active.remove(chosen)
+                continue
+            self.class_time[chosen] += 1.0 / weights.get(chosen, 1)
+            return waiter
+        return None
+
+
+class ProviderScheduler:
+    """Centralni razporejevalnik za vse klice providerjev"""
+
+    def __init__(self):
+        self._providers: Dict[str, _ProviderState] = {}
+        self._waits: Dict[str, Deque[float]] = {p: deque(maxlen=1000) for p in PRIORITY_CLASSES}
+        self._counts: Dict[str, int] = {p: 0 for p in PRIORITY_CLASSES}
+        self._total_wait_ms: Dict[str, float] = {p: 0.0 for p in PRIORITY_CLASSES}
+
+    def _state(self, provider: str) -> _ProviderState:
+        state = self._providers.get(provider)
+        if state is None:
+            limit = settings.scheduler_provider_concurrency.get(provider, settings.scheduler_default_concurrency)
+            state = self._providers[provider] = _ProviderState(max(1, limit))
+        return state
+
+    def _record_wait(self, priority: str, wait_ms: float) -> None:
+        self._waits[priority].append(wait_ms)
+        self._counts[priority] += 1
+        self._total_wait_ms[priority] += wait_ms
+
+    def _dispatch(self, state: _ProviderState) -> None:
+        """Dodeli proste sloti čakajočim zahtevam"""
+        while state.in_flight < state.limit:
+            waiter = state.next_waiter()
+            if waiter is None:
+                return
+            state.in_flight += 1
+            self._record_wait(waiter.priority, (time.perf_counter() - waiter.enqueued_at) * 1000)
+            waiter.future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, provider: str, priority: Optional[str] = None, client_key: Optional[str] = None):
+        """
+        Počaka na prost slot pri providerju in ga po koncu klica sprosti
+
+        Args:
+            provider: Ime providerja (OpenAI, Anthropic)
+            priority: Prioritetni razred (privzeto iz konteksta zahteve)
+            client_key: Odjemalec (privzeto iz konteksta zahteve)
+        """
+        priority = priority or _request_priority.get()
+        client_key = client_key or _request_client.get()
+        state = self._state(provider)
+
+        if state.in_flight < state.limit and not state.has_waiters():
+            # Hitra pot - prost slot in nihče ne čaka
+            state.in_flight += 1
+            self._record_wait(priority, 0.0)
+        else:
+            waiter = _Waiter(asyncio.get_running_loop().create_future(), priority, client_key)
+            state.enqueue(waiter)
+            # Vrsta ima lahko samo še preklicane čakalce - dodeli takoj, če je slot prost
+            self._dispatch(state)
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Slot je bil dodeljen tik pred preklicem - vrni ga
+                    state.in_flight -= 1
+                    self._dispatch(state)
+                else:
+                    waiter.future.cancel()
+                raise
+
+        try:
+            yield
+        finally:
+            state.in_flight -= 1
+            self._dispatch(state)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Vrne čakalne čase po razredih in zasedenost providerjev"""
+        def percentile(values: List[float], q: float) -> Optional[float]:
+            return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+        classes = {}
+        for priority in PRIORITY_CLASSES:
+            waits = sorted(self._waits[priority])
+            count = self._counts[priority]
+            classes[priority] = {
+                "requests": count,
+                "avg_wait_ms": self._total_wait_ms[priority] / count if count else 0.0,
+                "p50_wait_ms": percentile(waits, 0.5),
+                "p95_wait_ms": percentile(waits, 0.95),
+                "max_wait_ms": waits[-1] if waits else None
+            }
+        providers = {
+            name: {
+                "limit": state.limit,
+                "in_flight": state.in_flight,
+                "queued": {p: len(q) for p, q in state.queues.items()}
+            }
+            for name, state in self._providers.items()
+        }
+        return {"classes": classes, "providers": providers}
+
+
+# Globalni razporejevalnik (singleton)
+provider_scheduler = ProviderScheduler()
@@ -0,0 +1,521 @@
+"""
+Lokalni iskalni indeks nad shranjenimi povzetki - obrnjen indeks in BM25
+
+Indeks živi v procesu in se posodablja ob vsakem shranjevanju
+(DatabaseService.save_summary / save_comparison). Na disk se shrani kot
+urejeni seznami pojavitev (posting lists) v enem .npz, zato je ponovni
+zagon samo nekaj np.load klicev. Vrstice, ki jih je medtem shranil drug
+proces, se ob zagonu in periodično dopolnijo iz baze (keyset po created_at, id).
+
+Zgradba pojavitev:
+    base    - združeni numpy seznami iz zadnjega shranjevanja (nespremenljivi)
+    frozen  - delta, ki se ravno združuje v base (med shranjevanjem)
+    delta   - array('I') na izraz za dokumente, dodane po zadnjem shranjevanju
+Ker so ID-ji dokumentov naraščajoči, so vsi seznami že urejeni.
+
+Zaklep varuje samo kratke posnetke (pogledi stolpcev, kopije delte za izraze
+poizvedbe); točkovanje, združevanje in pisanje na disk tečejo brez njega.
+
+Datoteko indeksa piše en sam proces: pri več uvicorn workerjih jo zaklene
+prvi, ki shranjuje (flock na <datoteka>.lock), ostali indeks le naložijo ob
+zagonu in ga dopolnjujejo iz baze.
+"""
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.tokenizer import tokenize
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    # fcntl ni na voljo (Windows) - zaščita datoteke indeksa pred več procesi je izklopljena
+
+SEARCH_TABLES = ("summaries", "comparison_results")
+
+# BM25 parametri
+K1 = 1.2
+B = 0.75
+
+_INDEX_VERSION = 1
+_SYNC_PAGE_SIZE = 1000
+_FRACTION_RE = re.compile(r"\.(\d+)")
+
+Postings = Dict[str, Tuple[array, array]]
+
+
+def _timestamp(value: Any) -> float:
+    """ISO časovni žig iz PostgREST -> unix sekunde"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    text = str(value).replace("Z", "+00:00").replace(" ", "T")
+    # Python < 3.11 sprejme samo 3 ali 6 decimalk
+    text = _FRACTION_RE.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), text, count=1)
+    return datetime.fromisoformat(text).timestamp()
+
+
+def _empty_base() -> Dict[str, Any]:
+    return {
+        "terms": {},
+        "offsets": np.zeros(1, dtype=np.int64),
+        "docs": np.zeros(0, dtype=np.uint32),
+        "tfs": np.zeros(0, dtype=np.uint16)
+    }
+
+
+class _Column:
+    """
+    Stolpec dokumentov v numpy polju z rezervo
+
+    Zapisani elementi se ne spreminjajo, ob rasti pa se polje zamenja z
+    večjim - pogled view(), vzet pod zaklepom, ostane veljaven tudi brez njega.
+    """
+
+    def __init__(self, dtype: Any, width: Optional[int] = None, data: Optional[np.ndarray] = None):
+        if data is None:
+            data = np.zeros((0,) if width is None else (0, width), dtype=dtype)
+        self.data = data
+        self.size = len(data)
+
+    def append(self, value: Any) -> None:
+        if self.size == len(self.data):
+            grown = np.empty((max(1024, 2 * self.size),) + self.data.shape[1:], dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size] = value
+        self.size += 1
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class SearchIndex:
+    """Obrnjen indeks z BM25 rangiranjem"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._file_lock = None  # Odprt <datoteka>.lock, ko ta proces piše indeks
+        # Dokumenti - ID dokumenta je indeks v teh stolpcih
+        self._doc_uuid = _Column(np.uint8, 16)
+        self._doc_table = _Column(np.uint8)
+        self._doc_model = _Column(np.uint16)
+        self._doc_created = _Column(np.float64)
+        self._doc_len = _Column(np.uint32)
+        self._total_len = 0
+        self._models: List[str] = []
+        self._model_codes: Dict[str, int] = {}
+        # Pojavitve
+        self._base = _empty_base()
+        self._frozen: Postings = {}
+        self._delta: Postings = {}
+        # Sinhronizacija z bazo
+        self._cursors: Dict[str, Optional[Tuple[str, str]]] = {t: None for t in SEARCH_TABLES}
+        self._recent: Dict[str, Tuple[str, str]] = {}  # id -> (tabela, created_at) dodani mimo kurzorja
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return self._doc_len.size
+
+    # ------------------------------------------------------------------
+    # Dodajanje
+    # ------------------------------------------------------------------
+
+    def _model_code(self, model: str) -> int:
+        code = self._model_codes.get(model)
+        if code is None:
+            code = self._model_codes[model] = len(self._models)
+            self._models.append(model)
+        return code
+
+    @staticmethod
+    def _prepare(row: Dict[str, Any]) -> Tuple[bytes, float, str, Counter]:
+        """Tokenizira vrstico - brez zaklepa, lahko v threadu"""
+        return (
+            uuid.UUID(str(row["id"])).bytes,
+            _timestamp(row["created_at"]),
+            row.get("model_name") or "",
+            Counter(tokenize(row.get("summary_text") or ""))
+        )
+
+    def _add_locked(self, table: str, prepared: Tuple[bytes, float, str, Counter]) -> None:
+        uuid_bytes, created, model, counts = prepared
+        doc_id = self._doc_len.size
+        self._doc_uuid.append(np.frombuffer(uuid_bytes, dtype=np.uint8))
+        self._doc_table.append(SEARCH_TABLES.index(table))
+        self._doc_model.append(self._model_code(model))
+        self._doc_created.append(created)
+        length = sum(counts.values())
+        self._doc_len.append(length)
+        self._total_len += length
+        delta = self._delta
+        for term, tf in counts.items():
+            postings = delta.get(term)
+            if postings is None:
+                postings = delta[term] = (array("I"), array("H"))
+            postings[0].append(doc_id)
+            postings[1].append(tf if tf < 0xFFFF else 0xFFFF)
+        self._dirty = True
+
+    def add(self, table: str, row: Dict[str, Any]) -> None:
+        """
+        Doda shranjeno vrstico v indeks
+
+        Args:
+            table: summaries ali comparison_results
+            row: Vrstica, kot jo vrne insert (id, created_at, model_name, summary_text)
+        """
+        prepared = self._prepare(row)
+        row_id = str(row["id"])
+        with self._lock:
+            if row_id in self._recent:
+                return
+            self._add_locked(table, prepared)
+            self._recent[row_id] = (table, str(row["created_at"]))
+
+    async def sync(self) -> int:
+        """
+        Dopolni indeks z vrsticami iz baze, novejšimi od zadnjega kurzorja
+
+        Returns:
+            Število dodanih dokumentov
+        """
+        from app.services.database_service import DatabaseService
+
+        added = 0
+        columns = ["id", "created_at", "model_name", "summary_text"]
+        for table in SEARCH_TABLES:
+            while True:
+                rows, has_more = await asyncio.to_thread(
+                    DatabaseService.fetch_page, table, columns, _SYNC_PAGE_SIZE,
+                    self._cursors[table], ascending=True
+                )
+                if not rows:
+                    break
+                # Tokenizacija v threadu, v indeks pa pod zaklepom
+                prepared = await asyncio.to_thread(lambda: [(str(r["id"]), self._prepare(r)) for r in rows])
+                with self._lock:
+                    for row_id, doc in prepared:
+                        if row_id not in self._recent:
+                            self._add_locked(table, doc)
+                            added += 1
+                    last = rows[-1]
+                    cursor = (str(last["created_at"]), str(last["id"]))
+                    self._cursors[table] = cursor
+                    # Vrstice za kurzorjem ne potrebujejo več posebne evidence
+                    self._recent = {
+                        k: v for k, v in self._recent.items()
+                        if v[0] != table or (v[1], k) > cursor
+                    }
+                    self._dirty = True
+                if not has_more:
+                    break
+        return added
+
+    # ------------------------------------------------------------------
+    # Iskanje
+    # ------------------------------------------------------------------
+
+    def _postings(self, term: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Posnetek pojavitev izraza iz vseh plasti (kliči pod zaklepom)
+
+        Base je nespremenljiv (rezine so pogledi), delta pa se kopira, ker se
+        array lahko kasneje podaljša.
+        """
+        parts = []
+        base = self._base
+        index = base["terms"].get(term)
+        if index is not None:
+            start, end = base["offsets"][index], base["offsets"][index + 1]
+            parts.append((base["docs"][start:end], base["tfs"][start:end]))
+        for layer in (self._frozen, self._delta):
+            postings = layer.get(term)
+            if postings is not None:
+                parts.append((np.array(postings[0], dtype=np.uint32), np.array(postings[1], dtype=np.uint16)))
+        return parts
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        table: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Poišče dokumente z BM25 rangiranjem (blokirajoče - iz async kode kliči v threadu)
+
+        Args:
+            query: Iskalni niz
+            limit: Največ zadetkov
+            table: Samo summaries ali comparison_results
+            model: Samo ta model
+
+        Returns:
+            Slovar s terms, total_matches in hits (table, id, model_name, created_at, score)
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        result: Dict[str, Any] = {"terms": terms, "total_matches": 0, "hits": []}
+        with self._lock:
+            n_docs = self._doc_len.size
+            if not terms or not n_docs:
+                return result
+            if model is not None and model not in self._model_codes:
+                return result
+            model_code = self._model_codes[model] if model is not None else None
+            avg_len = max(self._total_len / n_docs, 1.0)
+            doc_len = self._doc_len.view()
+            doc_table = self._doc_table.view()
+            doc_model = self._doc_model.view()
+            doc_uuid = self._doc_uuid.view()
+            doc_created = self._doc_created.view()
+            models = list(self._models)
+            layers = [self._postings(term) for term in terms]
+
+        # Točkovanje na posnetku - dodajanje in shranjevanje medtem nista blokirana
+        scores = np.zeros(n_docs, dtype=np.float32)
+        matched = []
+        for parts in layers:
+            if not parts:
+                continue
+            if len(parts) == 1:
+                docs, tfs = parts[0]
+            else:
+                docs = np.concatenate([p[0] for p in parts])
+                tfs = np.concatenate([p[1] for p in parts])
+            idf = math.log(1.0 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            tf = tfs.astype(np.float32)
+            norm = K1 * (1.0 - B + B * doc_len[docs] / avg_len)
+            scores[docs] += idf * tf * (K1 + 1.0) / (tf + norm)
+            matched.append(docs)
+        if not matched:
+            return result
+
+        # Več izrazov: zadetki so vsi dokumenti s pozitivno oceno (brez sortiranja)
+        candidates = np.flatnonzero(scores) if len(matched) > 1 else matched[0]
+        if table is not None:
+            candidates = candidates[doc_table[candidates] == SEARCH_TABLES.index(table)]
+        if model_code is not None:
+            candidates = candidates[doc_model[candidates] == model_code]
+
+        result["total_matches"] = int(len(candidates))
+        if len(candidates) > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        order = np.argsort(-scores[candidates], kind="stable")
+
+        hits = []
+        for doc_id in candidates[order].tolist():
+            hits.append({
+                "table": SEARCH_TABLES[doc_table[doc_id]],
+                "id": str(uuid.UUID(bytes=doc_uuid[doc_id].tobytes())),
+                "model_name": models[doc_model[doc_id]],
+                "created_at": datetime.fromtimestamp(float(doc_created[doc_id]), tz=timezone.utc).isoformat(),
+                "score": round(float(scores[doc_id]), 4)
+            })
+        result["hits"] = hits
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Velikost indeksa"""
+        with self._lock:
+            return {
+                "documents": self._doc_len.size,
+                "terms": len(set(self._base["terms"]) | set(self._frozen) | set(self._delta)),
+                "postings": int(len(self._base["docs"])) + sum(
+                    len(p[0]) for layer in (self._frozen, self._delta) for p in layer.values()
+                ),
+                "unsaved_terms": len(self._delta),
+                "cursors": {t: c[0] if c else None for t, c in self._cursors.items()}
+            }
+
+    # ------------------------------------------------------------------
+    # Shranjevanje
+    # ------------------------------------------------------------------
+
+    def load(self, path: str) -> None:
+        """Naloži indeks iz datoteke (če obstaja)"""
+        if not os.path.exists(path):
+            return
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+                if meta.get("version") != _INDEX_VERSION:
+                    print("Iskalni indeks ima staro različico - zgradil se bo na novo")
+                    return
+                term_list = data["terms"].tobytes().decode("utf-8").split("\n") if data["terms"].size else []
+                base = {
+                    "terms": {term: i for i, term in enumerate(term_list)},
+                    "offsets": data["offsets"],
+                    "docs": data["docs"],
+                    "tfs": data["tfs"]
+                }
+                doc_uuid = _Column(np.uint8, data=data["doc_uuid"].reshape(-1, 16))
+                doc_table = _Column(np.uint8, data=data["doc_table"])
+                doc_model = _Column(np.uint16, data=data["doc_model"])
+                doc_created = _Column(np.float64, data=data["doc_created"])
+                doc_len = _Column(np.uint32, data=data["doc_len"])
+            with self._lock:
+                self._base = base
+                self._frozen = {}
+                self._delta = {}
+                self._doc_uuid = doc_uuid
+                self._doc_table = doc_table
+                self._doc_model = doc_model
+                self._doc_created = doc_created
+                self._doc_len = doc_len
+                self._total_len = int(doc_len.view().sum(dtype=np.int64))
+                self._models = meta["models"]
+                self._model_codes = {m: i for i, m in enumerate(self._models)}
+                self._cursors = {t: tuple(meta["cursors"][t]) if meta["cursors"].get(t) else None for t in SEARCH_TABLES}
+                self._recent = {k: tuple(v) for k, v in meta["recent"].items()}
+                self._dirty = False
+        except Exception as e:
+            print(f"Napaka pri nalaganju iskalnega indeksa: {e}")
+
+    @staticmethod
+    def _merge(base: Dict[str, Any], frozen: Postings) -> Dict[str, Any]:
+        """Združi base in zamrznjeno delto v nove urejene sezname pojavitev"""
+        term_list = sorted(set(base["terms"]) | set(frozen))
+        offsets = np.zeros(len(term_list) + 1, dtype=np.int64)
+        docs_parts = []
+        tfs_parts = []
+        for i, term in enumerate(term_list):
+            length = 0
+            index = base["terms"].get(term)
+            if index is not None:
+                start, end = base["offsets"][index], base["offsets"][index + 1]
+                docs_parts.append(base["docs"][start:end])
+                tfs_parts.append(base["tfs"][start:end])
+                length += end - start
+            postings = frozen.get(term)
+            if postings is not None:
+                docs_parts.append(np.frombuffer(postings[0], dtype=np.uint32))
+                tfs_parts.append(np.frombuffer(postings[1], dtype=np.uint16))
+                length += len(postings[0])
+            offsets[i + 1] = offsets[i] + length
+        return {
+            "terms": {term: i for i, term in enumerate(term_list)},
+            "term_list": term_list,
+            "offsets": offsets,
+            "docs": np.concatenate(docs_parts) if docs_parts else np.zeros(0, dtype=np.uint32),
+            "tfs": np.concatenate(tfs_parts) if tfs_parts else np.zeros(0, dtype=np.uint16)
+        }
+
+    def _claim_file(self, path: str) -> bool:
+        """
+        Zaklene datoteko indeksa za ta proces (do konca procesa)
+
+        Returns:
+            False, če indeks že piše drug proces (drug uvicorn worker)
+        """
+        if self._file_lock is not None or not FCNTL_AVAILABLE:
+            return True
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(f"{path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file_lock = lock_file
+        return True
+
+    def save(self, path: str) -> None:
+        """
+        Shrani indeks v datoteko (kliči iz threada)
+
+        Delta se zamrzne pod zaklepom, združevanje in pisanje pa potekata
+        brez njega - dodajanje in iskanje medtem nista blokirana. Če datoteko
+        piše drug proces, se shranjevanje preskoči.
+        """
+        with self._save_lock:
+            if not self._claim_file(path):
+                return
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._frozen = self._delta
+                self._delta = {}
+                base, frozen = self._base, self._frozen
+                n_docs = self._doc_len.size
+                # Pogledi brez kopiranja - zapisani elementi stolpcev se ne spreminjajo
+                doc_arrays = {
+                    "doc_uuid": self._doc_uuid.view().reshape(-1),
+                    "doc_table": self._doc_table.view(),
+                    "doc_model": self._doc_model.view(),
+                    "doc_created": self._doc_created.view(),
+                    "doc_len": self._doc_len.view()
+                }
+                meta = {
+                    "version": _INDEX_VERSION,
+                    "documents": n_docs,
+                    "models": list(self._models),
+                    "cursors": {t: list(c) if c else None for t, c in self._cursors.items()},
+                    "recent": {k: list(v) for k, v in self._recent.items()},
+                    "saved_at": time.time()
+                }
+                self._dirty = False
+
+            try:
+                merged = self._merge(base, frozen)
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.savez(
+                        f,
+                        meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+                        terms=np.frombuffer("\n".join(merged["term_list"]).encode("utf-8"), dtype=np.uint8),
+                        offsets=merged["offsets"],
+                        docs=merged["docs"],
+                        tfs=merged["tfs"],
+                        **doc_arrays
+                    )
+                os.replace(tmp_path, path)
+            except Exception:
+                # Zamrznjena delta se vrne nazaj, da se ne izgubi
+                with self._lock:
+                    for term, (docs, tfs) in self._delta.items():
+                        previous = self._frozen.get(term)
+                        self._frozen[term] = (previous[0] + docs, previous[1] + tfs) if previous else (docs, tfs)
+                    self._delta, self._frozen = self._frozen, {}
+                    self._dirty = True
+                raise
+
+            with self._lock:
+                merged.pop("term_list")
+                self._base = merged
+                self._frozen = {}
+
+    async def maintain_periodically(self, path: str, interval_s: float) -> None:
+        """Background naloga - dopolni indeks iz baze in ga shrani vsakih interval_s sekund"""
+        while True:
+            try:
+                added = await self.sync()
+                if added:
+                    print(f"Iskalni indeks: dodanih {added} dokumentov iz baze")
+                await asyncio.to_thread(self.save, path)
+            except Exception as e:
+                print(f"Napaka pri vzdrževanju iskalnega indeksa: {e}")
+            await asyncio.sleep(interval_s)
+
+
+# Globalni iskalni indeks (singleton)
+search_index = SearchIndex()
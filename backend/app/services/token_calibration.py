@@ -0,0 +1,184 @@
+"""
+Kalibracija izhodnih tokenov po modelih - max_tokens iz opaženih usage podatkov
+
+Namesto fiksnega max_length // 4 se za vsak model sproti učimo:
+    - znakov na izhodni token (slovenščina ima drugačno razmerje kot angleščina),
+    - za koliko model preseže zahtevano dolžino (len(povzetek) / max_length),
+    - naravno dolžino povzetka v tokenih, kadar max_length ni podan.
+max_tokens je potem ozek, a varen zgornji rob (konzervativni percentili +
+rezerva). Ko model vseeno konča z finish_reason="length", se rezerva modela
+poveča, ob uspešnih klicih pa počasi pada nazaj.
+
+Ob zagonu se stanje napolni iz zadnjih shranjenih povzetkov (output_tokens,
+finish_reason), med delovanjem pa iz vsakega odgovora.
+"""
+import asyncio
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.config import settings
+
+_WINDOW = 500
+_MARGIN_TOKENS = 16
+_MIN_TOKENS = 32
+_TRUNCATION_BOOST = 1.25
+_RECOVERY = 0.98
+_MAX_MULTIPLIER = 2.5
+
+
+def _percentile(values: Deque[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _ModelCalibration:
+    """Drseča okna meritev enega modela"""
+
+    def __init__(self):
+        self.chars_per_token: Deque[float] = deque(maxlen=_WINDOW)
+        self.length_overshoot: Deque[float] = deque(maxlen=_WINDOW)
+        self.natural_tokens: Deque[float] = deque(maxlen=_WINDOW)
+        self.multiplier = 1.0
+        self.calls = 0
+        self.truncated = 0
+
+
+class TokenCalibrator:
+    """Učenje max_tokens po modelih"""
+
+    def __init__(self):
+        self._models: Dict[str, _ModelCalibration] = {}
+
+    @staticmethod
+    def _key(model: str) -> str:
+        return model.replace("openai/", "").replace("anthropic/", "")
+
+    def _state(self, model: str) -> _ModelCalibration:
+        key = self._key(model)
+        state = self._models.get(key)
+        if state is None:
+            state = self._models[key] = _ModelCalibration()
+        return state
+
+    def max_tokens(self, model: str, max_length: Optional[int] = None) -> int:
+        """
+        Omejitev izhodnih tokenov za naslednji klic modela
+
+        Args:
+            model: Ime modela (s prefiksom ali brez)
+            max_length: Zahtevana največja dolžina povzetka v znakih
+        """
+        state = self._state(model)
+        calibrated = len(state.chars_per_token) >= settings.token_calibration_min_samples
+
+        if max_length:
+            if calibrated:
+                # Nizek percentil znakov/token in visok percentil prekoračitve = varna meja
+                chars_per_token = _percentile(state.chars_per_token, 0.1)
+                overshoot = max(1.0, _percentile(state.length_overshoot, 0.9)) if state.length_overshoot else 1.2
+            else:
+                chars_per_token = settings.token_default_chars_per_token
+                overshoot = 1.2
+            tokens = max_length * overshoot / chars_per_token
+        elif len(state.natural_tokens) >= settings.token_calibration_min_samples:
+            tokens = _percentile(state.natural_tokens, 0.95)
+        else:
+            tokens = settings.token_default_output_tokens
+
+        return max(_MIN_TOKENS, math.ceil(tokens * state.multiplier) + _MARGIN_TOKENS)
+
+    def observe(
+        self,
+        model: str,
+        summary: Optional[str],
+        output_tokens: Optional[int],
+        finish_reason: Optional[str] = None,
+        max_length: Optional[int] = None
+    ) -> None:
+        """
+        Zabeleži odgovor modela
+
+        Args:
+            model: Ime modela
+            summary: Besedilo povzetka
+            output_tokens: usage.completion_tokens
+            finish_reason: finish_reason iz odgovora ("length" = odrezano)
+            max_length: Zahtevana dolžina povzetka (če je bila podana)
+        """
+        state = self._state(model)
+        state.calls += 1
+        if finish_reason == "length":
+            # Odrezan odgovor ne pove prave dolžine - samo povečaj rezervo
+            state.truncated += 1
+            state.multiplier = min(_MAX_MULTIPLIER, state.multiplier * _TRUNCATION_BOOST)
+            return
+
+        state.multiplier = max(1.0, state.multiplier * _RECOVERY)
+        if not summary or not output_tokens:
+            return
+        state.chars_per_token.append(len(summary) / output_tokens)
+        if max_length:
+            state.length_overshoot.append(len(summary) / max_length)
+        else:
+            state.natural_tokens.append(output_tokens)
+
+    def observe_row(self, row: Dict[str, Any]) -> None:
+        """Zabeleži shranjeno vrstico (summaries / comparison_results)"""
+        self.observe(
+            row.get("model_name") or "",
+            row.get("summary_text"),
+            row.get("output_tokens"),
+            row.get("finish_reason"),
+            row.get("max_length")
+        )
+
+    async def bootstrap(self, limit: int = _WINDOW) -> int:
+        """
+        Napolni okna iz zadnjih shranjenih povzetkov
+
+        Returns:
+            Število uporabljenih vrstic
+        """
+        from app.services.database_service import DatabaseService
+
+        used = 0
+        sources = {
+            "summaries": ["id", "created_at", "model_name", "summary_text", "output_tokens", "finish_reason", "max_length"],
+            "comparison_results": ["id", "created_at", "model_name", "summary_text", "output_tokens", "finish_reason", "max_length"]
+        }
+        for table, columns in sources.items():
+            try:
+                rows, _ = await asyncio.to_thread(DatabaseService.fetch_page, table, columns, limit)
+            except Exception as e:
+                print(f"Napaka pri kalibraciji tokenov iz {table}: {e}")
+                continue
+            # Od najstarejše proti najnovejši - okna obdržijo najnovejše
+            for row in reversed(rows):
+                if row.get("output_tokens"):
+                    self.observe_row(row)
+                    used += 1
+        return used
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Kalibracija po modelih"""
+        stats = {}
+        for model, state in self._models.items():
+            stats[model] = {
+                "calls": state.calls,
+                "truncated": state.truncated,
+                "truncation_rate": state.truncated / state.calls if state.calls else 0.0,
+                "samples": len(state.chars_per_token),
+                "chars_per_token_median": _percentile(state.chars_per_token, 0.5) if state.chars_per_token else None,
+                "chars_per_token_p10": _percentile(state.chars_per_token, 0.1) if state.chars_per_token else None,
+                "length_overshoot_p90": _percentile(state.length_overshoot, 0.9) if state.length_overshoot else None,
+                "natural_tokens_p95": _percentile(state.natural_tokens, 0.95) if state.natural_tokens else None,
+                "multiplier": round(state.multiplier, 3),
+                "max_tokens_default": self.max_tokens(model),
+                "max_tokens_500_chars": self.max_tokens(model, 500)
+            }
+        return stats
+
+
+# Globalni kalibrator (singleton)
+token_calibrator = TokenCalibrator()
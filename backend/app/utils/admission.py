@@ -0,0 +1,304 @@
+"""
+Nadzor sprejema zahtev (admission control) in zavračanje ob preobremenitvi
+
+Pred summary routerjem omeji število sočasnih zahtev. Presežne zahteve
+čakajo v omejeni vrsti največ admission_queue_timeout_ms; ko je vrsta polna
+ali čas poteče, se zahteva takoj zavrne z 503 in glavo Retry-After - preden
+se prebere telo in ustvari LLM service.
+
+Meja se prilagaja opaženi latenci:
+    gradient - meja *= dolgoročna latenca / kratkoročna latenca (+ sqrt(meja)),
+               ko se latenca providerja poveča, se meja zmanjša
+    aimd     - +1 na "krog" zahtev pod ciljno latenco, *0.9 nad njo
+Napake (5xx) v obeh primerih mejo zmanjšajo za 10 %.
+
+Dolgotrajne zahteve (admission_bulk_paths in benchmark /compare, ki se
+prestavi z move_to_bulk()) imajo ločen limiter, da njihova latenca ne
+zniža meje interaktivnih zahtev.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional
+
+from app.config import settings
+from app.utils.serialization import FastJSONResponse
+from app.utils.tracing import span
+
+# Glajenje kratkoročne in dolgoročne latence (EMA)
+_SHORT_ALPHA = 0.2
+_LONG_ALPHA = 0.01
+_LIMIT_SMOOTHING = 0.2
+_BACKOFF = 0.9
+
+
+class AdmissionRejected(Exception):
+    """Zahteva ni bila sprejeta (polna vrsta ali potekel čas čakanja)"""
+
+    def __init__(self, reason: str, retry_after: int):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(reason)
+
+
+class AdaptiveLimiter:
+    """Prilagodljiva meja sočasnih zahtev z omejeno FIFO vrsto"""
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        queue_size: int,
+        queue_timeout_ms: float,
+        algorithm: str = "gradient",
+        latency_target_ms: float = 15000.0,
+        tolerance: float = 1.5
+    ):
+        if algorithm not in ("gradient", "aimd"):
+            raise ValueError(f"Neznan algoritem '{algorithm}'. Podprta: gradient, aimd")
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.queue_size = queue_size
+        self.queue_timeout_s = queue_timeout_ms / 1000
+        self.algorithm = algorithm
+        self.latency_target_ms = latency_target_ms
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self._queue: Deque[asyncio.Future] = deque()
+        self._short_ms: Optional[float] = None
+        self._long_ms: Optional[float] = None
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0}
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for f in self._queue if not f.done())
+
+    def retry_after(self) -> int:
+        """Ocena v sekundah, kdaj bo prostor - čas za izpraznitev vrste"""
+        latency_s = (self._short_ms or 1000.0) / 1000
+        return max(1, math.ceil(latency_s * (self.queued + 1) / max(self.limit, 1.0)))
+
+    def _dispatch(self) -> None:
+        """Sprejme čakajoče zahteve, dokler je pod mejo"""
+        while self._queue and self.in_flight < int(self.limit):
+            future = self._queue.popleft()
+            if future.done():
+                continue  # Potekel čas čakanja ali prekinjena povezava
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def acquire(self) -> None:
+        """
+        Počaka na prost slot
+
+        Raises:
+            AdmissionRejected: Če je vrsta polna ali čakanje preseže časovni budžet
+        """
+        if self.in_flight < int(self.limit) and not self.queued:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self.queued >= self.queue_size:
+            self.rejected["queue_full"] += 1
+            raise AdmissionRejected("queue_full", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(future)
+        try:
+            with span("admission_wait"):
+                await asyncio.wait_for(future, self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self.rejected["queue_timeout"] += 1
+            raise AdmissionRejected("queue_timeout", self.retry_after())
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot je bil dodeljen tik pred prekinitvijo - vrni ga
+                self.in_flight -= 1
+                self._dispatch()
+            raise
+        self.admitted += 1
+
+    def release_unmeasured(self) -> None:
+        """Sprosti slot brez vzorca latence (zahteva se prestavi v drug limiter)"""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def release(self, latency_ms: float, ok: bool) -> None:
+        """
+        Sprosti slot in prilagodi mejo
+
+        Args:
+            latency_ms: Čas obdelave zahteve (brez čakanja v vrsti)
+            ok: False za napake strežnika (5xx) - meja se zmanjša
+        """
+        # Povpraševanje ob koncu zahteve - ta zahteva, ostale v obdelavi in čakajoče
+        demand = self.in_flight + self.queued
+        self.in_flight -= 1
+        if not ok:
+            self.limit = max(self.min_limit, self.limit * _BACKOFF)
+        else:
+            self._short_ms = latency_ms if self._short_ms is None else (
+                self._short_ms + _SHORT_ALPHA * (latency_ms - self._short_ms)
+            )
+            self._long_ms = latency_ms if self._long_ms is None else (
+                self._long_ms + _LONG_ALPHA * (latency_ms - self._long_ms)
+            )
+            if self.algorithm == "gradient":
+                self._update_gradient(demand)
+            else:
+                self._update_aimd(latency_ms, demand)
+        self._dispatch()
+
+    def _update_gradient(self, demand: int) -> None:
+        short_ms, long_ms = self._short_ms, self._long_ms
+        if long_ms / short_ms > 2:
+            # Latenca je trajno padla - dolgoročna vrednost ji hitreje sledi
+            long_ms = self._long_ms = long_ms * 0.95
+        # Meje ne višaj, če je ne izkoriščamo (aplikacija ni omejena z mejo)
+        if demand < self.limit / 2 and short_ms <= long_ms * self.tolerance:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * long_ms / short_ms))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = min(self.max_limit, max(
+            self.min_limit, self.limit * (1 - _LIMIT_SMOOTHING) + new_limit * _LIMIT_SMOOTHING
+        ))
+
+    def _update_aimd(self, latency_ms: float, demand: int) -> None:
+        if latency_ms > self.latency_target_ms:
+            self.limit = max(self.min_limit, self.limit * _BACKOFF)
+        elif demand >= self.limit / 2:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Trenutna meja, zasedenost in zavrnitve"""
+        return {
+            "algorithm": self.algorithm,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "short_latency_ms": round(self._short_ms, 1) if self._short_ms is not None else None,
+            "long_latency_ms": round(self._long_ms, 1) if self._long_ms is not None else None
+        }
+
+
+class _Admission:
+    """Sprejeta zahteva - limiter, ki mu pripada slot, in začetek merjenja"""
+    __slots__ = ("limiter", "start")
+
+    def __init__(self, limiter: Optional[AdaptiveLimiter]):
+        self.limiter = limiter
+        self.start = time.perf_counter()
+
+
+_current_admission: ContextVar[Optional[_Admission]] = ContextVar("current_admission", default=None)
+
+
+async def move_to_bulk() -> None:
+    """
+    Prestavi trenutno zahtevo v limiter za dolgotrajne zahteve
+
+    Za zahteve, ki se izkažejo za dolgotrajne šele po branju telesa
+    (benchmark /compare). Slot interaktivnega limiterja se sprosti brez
+    vzorca latence.
+
+    Raises:
+        AdmissionRejected: Če limiter za dolgotrajne zahteve zahteve ne sprejme
+    """
+    admission = _current_admission.get()
+    if admission is None or admission.limiter is None or admission.limiter is bulk_admission_limiter:
+        return
+    admission.limiter.release_unmeasured()
+    admission.limiter = None
+    await bulk_admission_limiter.acquire()
+    admission.limiter = bulk_admission_limiter
+    admission.start = time.perf_counter()
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware - POST zahteve pod path_prefix gredo skozi AdaptiveLimiter
+    (dolgotrajne poti skozi bulk_limiter), zavrnjene dobijo 503 z Retry-After
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: Optional[AdaptiveLimiter] = None,
+        path_prefix: str = "/api/summary",
+        bulk_limiter: Optional[AdaptiveLimiter] = None
+    ):
+        self.app = app
+        self.limiter = limiter or admission_limiter
+        self.bulk_limiter = bulk_limiter or bulk_admission_limiter
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.admission_enabled
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.bulk_limiter if scope["path"] in settings.admission_bulk_paths else self.limiter
+        try:
+            await limiter.acquire()
+        except AdmissionRejected as e:
+            response = FastJSONResponse(
+                {"detail": "Strežnik je preobremenjen, poskusite znova kasneje", "reason": e.reason},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+        admission = _Admission(limiter)
+        token = _current_admission.set(admission)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_admission.reset(token)
+            if admission.limiter is not None:
+                admission.limiter.release((time.perf_counter() - admission.start) * 1000, ok=status_code < 500)
+
+
+# Globalni limiter (singleton)
+admission_limiter = AdaptiveLimiter(
+    initial_limit=settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    queue_size=settings.admission_queue_size,
+    queue_timeout_ms=settings.admission_queue_timeout_ms,
+    algorithm=settings.admission_algorithm,
+    latency_target_ms=settings.admission_latency_target_ms
+)
+
+# Globalni limiter za dolgotrajne zahteve (singleton) - gradient je relativen,
+# zato ne potrebuje ciljne latence
+bulk_admission_limiter = AdaptiveLimiter(
+    initial_limit=settings.admission_bulk_max_limit,
+    min_limit=1,
+    max_limit=settings.admission_bulk_max_limit,
+    queue_size=settings.admission_bulk_queue_size,
+    queue_timeout_ms=settings.admission_queue_timeout_ms,
+    algorithm="gradient"
+)
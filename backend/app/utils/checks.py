@@ -0,0 +1,97 @@
+"""
+Hitra lokalna preverjanja povzetka - brez klica modela
+"""
+import re
+from typing import List, Optional
+
+from app.utils.metrics import source_overlap
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Najpogostejše funkcijske besede - za grobo zaznavo jezika
+_LANGUAGE_WORDS = {
+    "sl": frozenset("""
+        in je so da se na za v z s ki pa ter bo bi ali kot tudi pri po od do iz
+        ne še že ga jih jo tem tega ta to te so bili bila bilo lahko morajo naj
+    """.split()),
+    "en": frozenset("""
+        the and is are of to in that for with on as by this be was were it an
+        from at or which have has not can will their its
+    """.split()),
+}
+_SLOVENE_CHARS = set("čšžČŠŽ")
+
+MIN_SUMMARY_CHARS = 15
+MIN_SOURCE_OVERLAP = 0.35
+MAX_LENGTH_TOLERANCE = 1.15
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    Groba zaznava jezika (sl/en) iz funkcijskih besed in šumnikov
+
+    Returns:
+        Koda jezika ali None, če besedilo ni dovolj dolgo za odločitev
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < 5:
+        return None
+    scores = {
+        lang: sum(1 for w in words if w in vocabulary)
+        for lang, vocabulary in _LANGUAGE_WORDS.items()
+    }
+    # Šumniki so močan znak slovenščine
+    scores["sl"] += sum(1 for ch in text if ch in _SLOVENE_CHARS) / 2
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else None
+
+
+def looks_truncated(summary: str, finish_reason: Optional[str] = None) -> bool:
+    """Ali je povzetek odrezan (finish_reason=length ali brez končnega ločila)"""
+    if finish_reason == "length":
+        return True
+    stripped = summary.rstrip()
+    return not stripped or stripped[-1] not in ".!?…\")»*"
+
+
+def summary_checks(
+    source_text: str,
+    summary: str,
+    max_length: Optional[int] = None,
+    language: str = "sl",
+    finish_reason: Optional[str] = None
+) -> List[str]:
+    """
+    Preveri povzetek s hitrimi lokalnimi pravili
+
+    Args:
+        source_text: Originalno besedilo
+        summary: Povzetek modela
+        max_length: Zahtevana maksimalna dolžina v znakih
+        language: Pričakovan jezik povzetka (preveri se samo sl/en); prekrivanje z
+            izvirnikom se preverja samo, če je izvirnik v istem jeziku
+        finish_reason: finish_reason iz odgovora modela (če je znan)
+
+    Returns:
+        Seznam imen neuspelih preverjanj (prazen, če je povzetek sprejemljiv)
+    """
+    failed = []
+    length = len(summary.strip())
+    if length < MIN_SUMMARY_CHARS or length >= len(source_text):
+        failed.append("length")
+    elif max_length and length > max_length * MAX_LENGTH_TOLERANCE:
+        failed.append("length")
+
+    # Povzetek v drugem jeziku kot izvirnik se z njim besedno ne prekriva
+    if detect_language(source_text) == language and source_overlap(source_text, summary) < MIN_SOURCE_OVERLAP:
+        failed.append("source_overlap")
+
+    # Jezike brez besednjaka v _LANGUAGE_WORDS zaznava ne loči - preverjanje se preskoči
+    if language in _LANGUAGE_WORDS:
+        detected = detect_language(summary)
+        if detected is not None and detected != language:
+            failed.append("language")
+
+    if looks_truncated(summary, finish_reason):
+        failed.append("truncated")
+    return failed
@@ -0,0 +1,392 @@
+"""
+Diagnostika delujočega procesa - profil CPU, pomnilnik, event loop, objekti
+
+Vse meritve so časovno omejene ali eksplicitno vklopljene; ko diagnostika
+ne teče, ni aktivnih niti, hookov, tracemalloca ali debug načina event
+loopa - obdelava zahtev ne plača ničesar.
+    SamplingProfiler - nit vsakih interval_ms prebere sklade vseh niti
+                       (sys._current_frames); izvoz v collapsed stacks
+                       (flamegraph.pl, speedscope) ali pstats (pstats.Stats, snakeviz)
+    MemoryTracker    - tracemalloc posnetki in razlike med zaporednimi posnetki
+    monitor_loop     - zamik event loopa in počasni callbacki (asyncio debug način)
+    largest_objects  - največji živi objekti in poraba po tipih
+"""
+import asyncio
+import gc
+import heapq
+import logging
+import marshal
+import os
+import reprlib
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# (datoteka, vrstica definicije, ime funkcije) - enak ključ kot v pstats
+FrameKey = Tuple[str, int, str]
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class SamplingProfiler:
+    """
+    Vzorčni (wall-clock) profiler vseh niti procesa
+
+    Za razliko od cProfile ne nastavi sys.setprofile - tuja nit le periodično
+    prebere sklade, zato je cena sorazmerna s frekvenco vzorčenja, ne s
+    številom klicev. Niti, ki čakajo (event loop v select, prazni workerji),
+    se prav tako vidijo v profilu.
+    """
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval_s = interval_ms / 1000
+        self.samples = 0
+        self.duration_s = 0.0
+        self._stacks: Counter = Counter()
+
+    def run(self, seconds: float) -> None:
+        """Vzorči seconds sekund (blokira - kliči v threadu)"""
+        own = threading.get_ident()
+        names: Dict[int, str] = {}
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_sample = start
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                # Koren sklada je nit - v flamegraphu so niti ločene
+                stack.append(("~", 0, f"<thread {names.get(ident, ident)}>"))
+                stack.reverse()
+                self._stacks[tuple(stack)] += 1
+            self.samples += 1
+            next_sample += self.interval_s
+            time.sleep(max(0.0, next_sample - time.perf_counter()))
+        self.duration_s = time.perf_counter() - start
+
+    @staticmethod
+    def _label(func: FrameKey) -> str:
+        filename, lineno, name = func
+        if filename == "~":
+            return name
+        return f"{name} ({filename}:{lineno})".replace(";", ",")
+
+    def collapsed(self) -> str:
+        """Collapsed stacks - ena vrstica na sklad: 'koren;...;list število'"""
+        lines = [
+            ";".join(self._label(func) for func in stack) + f" {count}"
+            for stack, count in self._stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def pstats(self) -> bytes:
+        """
+        Profil v formatu pstats (marshal) - naloži se s pstats.Stats(pot)
+
+        "Klici" so število vzorcev, časi so vzorci * povprečni interval.
+        """
+        per_sample = self.duration_s / self.samples if self.samples else 0.0
+        # func -> [cc, nc, tt, ct, {klicatelj: [cc, nc, tt, ct]}]
+        stats: Dict[FrameKey, list] = {}
+        for stack, count in self._stacks.items():
+            seconds = count * per_sample
+            seen = set()
+            for depth, func in enumerate(stack):
+                entry = stats.setdefault(func, [0, 0, 0.0, 0.0, {}])
+                if func in seen:
+                    continue  # Rekurzija - vključni čas šteje enkrat
+                seen.add(func)
+                entry[0] += count
+                entry[1] += count
+                entry[3] += seconds
+                if depth:
+                    edge = entry[4].setdefault(stack[depth - 1], [0, 0, 0.0, 0.0])
+                    edge[0] += count
+                    edge[1] += count
+                    edge[3] += seconds
+                    if depth == len(stack) - 1:
+                        edge[2] += seconds
+            stats[stack[-1]][2] += seconds
+        return marshal.dumps({
+            func: (cc, nc, tt, ct, {caller: tuple(edge) for caller, edge in callers.items()})
+            for func, (cc, nc, tt, ct, callers) in stats.items()
+        })
+
+
+class MemoryTracker:
+    """tracemalloc z omejenim trajanjem - po max_seconds se samodejno izklopi"""
+
+    def __init__(self):
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._stop_handle: Optional[asyncio.TimerHandle] = None
+        self._started_at: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int, max_seconds: float) -> None:
+        """
+        Vklopi tracemalloc (kliči iz event loopa)
+
+        Raises:
+            RuntimeError: Če tracemalloc že teče
+        """
+        if tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc že teče")
+        tracemalloc.start(frames)
+        self._previous = None
+        self._started_at = time.monotonic()
+        self._stop_handle = asyncio.get_running_loop().call_later(max_seconds, self.stop)
+
+    def stop(self) -> None:
+        """Izklopi tracemalloc in zavrže posnetke"""
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+        tracemalloc.stop()
+        self._previous = None
+        self._started_at = None
+
+    def snapshot(self, limit: int = 30, group_by: str = "lineno") -> Dict[str, Any]:
+        """
+        Posnetek alokacij in razlika glede na prejšnji posnetek (blokira - kliči v threadu)
+
+        Raises:
+            RuntimeError: Če tracemalloc ni vklopljen
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc ni vklopljen")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+
+        def frames(stat) -> List[str]:
+            return [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+
+        top = [
+            {"size_kb": round(stat.size / 1024, 1), "count": stat.count, "traceback": frames(stat)}
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+        diff = None
+        if self._previous is not None:
+            diff = [
+                {
+                    "size_kb": round(stat.size / 1024, 1),
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                    "traceback": frames(stat)
+                }
+                for stat in snapshot.compare_to(self._previous, group_by)[:limit]
+            ]
+        self._previous = snapshot
+        return {
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "tracing_s": round(time.monotonic() - self._started_at, 1) if self._started_at else None,
+            "top": top,
+            "diff": diff
+        }
+
+    def dump(self) -> bytes:
+        """
+        Zadnji posnetek v formatu tracemalloc.Snapshot.dump (naloži s Snapshot.load)
+
+        Raises:
+            RuntimeError: Če še ni posnetka
+        """
+        if self._previous is None:
+            raise RuntimeError("Ni posnetka - najprej ustvarite posnetek")
+        fd, path = tempfile.mkstemp(suffix=".tracemalloc")
+        os.close(fd)
+        try:
+            self._previous.dump(path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.unlink(path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "tracing_s": round(time.monotonic() - self._started_at, 1) if self._started_at else None,
+            "has_snapshot": self._previous is not None
+        }
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Ujame asyncio opozorila 'Executing <callback> took X seconds'"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.callbacks: List[Tuple[str, float]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if isinstance(record.msg, str) and record.msg.startswith("Executing") and len(record.args or ()) == 2:
+            description, seconds = record.args
+            self.callbacks.append((str(description), float(seconds)))
+
+
+async def monitor_loop(
+    seconds: float,
+    threshold_ms: float = 100.0,
+    interval_ms: float = 50.0,
+    limit: int = 20
+) -> Dict[str, Any]:
+    """
+    Zamik event loopa in počasni callbacki v časovnem oknu
+
+    Zamik meri korutina, ki spi interval_ms in beleži zamudo ob prebujanju.
+    Počasne callbacke javi asyncio debug način (slow_callback_duration), ki
+    je vklopljen samo med meritvijo.
+    """
+    loop = asyncio.get_running_loop()
+    logger = logging.getLogger("asyncio")
+    handler = _SlowCallbackHandler()
+    previous_debug = loop.get_debug()
+    previous_threshold = loop.slow_callback_duration
+    previous_level = logger.level
+
+    logger.addHandler(handler)
+    if not logger.isEnabledFor(logging.WARNING):
+        logger.setLevel(logging.WARNING)
+    loop.slow_callback_duration = threshold_ms / 1000
+    loop.set_debug(True)
+    lags: List[float] = []
+    try:
+        interval = interval_ms / 1000
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+    finally:
+        loop.set_debug(previous_debug)
+        loop.slow_callback_duration = previous_threshold
+        logger.setLevel(previous_level)
+        logger.removeHandler(handler)
+
+    grouped: Dict[str, List[float]] = {}
+    for description, duration in handler.callbacks:
+        grouped.setdefault(description, []).append(duration * 1000)
+    slow = sorted(
+        (
+            {
+                "callback": description,
+                "count": len(durations),
+                "total_ms": round(sum(durations), 1),
+                "max_ms": round(max(durations), 1)
+            }
+            for description, durations in grouped.items()
+        ),
+        key=lambda item: item["total_ms"],
+        reverse=True
+    )
+
+    ordered = sorted(lags)
+    return {
+        "seconds": seconds,
+        "lag_ms": {
+            "samples": len(ordered),
+            "mean": round(sum(ordered) / len(ordered), 2) if ordered else None,
+            "p50": round(_percentile(ordered, 0.5), 2) if ordered else None,
+            "p99": round(_percentile(ordered, 0.99), 2) if ordered else None,
+            "max": round(ordered[-1], 2) if ordered else None,
+            "over_threshold": sum(1 for lag in ordered if lag >= threshold_ms)
+        },
+        "slow_callbacks": slow[:limit],
+        "slow_callback_count": len(handler.callbacks)
+    }
+
+
+def _type_name(obj: Any) -> str:
+    cls = type(obj)
+    return cls.__qualname__ if cls.__module__ == "builtins" else f"{cls.__module__}.{cls.__qualname__}"
+
+
+def largest_objects(limit: int = 20, include_repr: bool = False) -> Dict[str, Any]:
+    """
+    Največji živi objekti (plitva velikost, sys.getsizeof) in poraba po tipih
+
+    Pregleda objekte, ki jih spremlja gc, in njihove neposredne reference -
+    tako so zajeti tudi veliki str/bytes/numpy nizi, ki jih gc ne spremlja.
+    Blokira - kliči v threadu.
+    """
+    seen = set()
+    by_type: Dict[str, List[int]] = {}
+    heap: List[Tuple[int, int, Any]] = []
+
+    def visit(obj: Any) -> None:
+        key = id(obj)
+        if key in seen:
+            return
+        seen.add(key)
+        try:
+            size = sys.getsizeof(obj)
+        except TypeError:
+            return
+        totals = by_type.setdefault(_type_name(obj), [0, 0])
+        totals[0] += 1
+        totals[1] += size
+        if len(heap) < limit:
+            heapq.heappush(heap, (size, key, obj))
+        elif size > heap[0][0]:
+            heapq.heapreplace(heap, (size, key, obj))
+
+    tracked = gc.get_objects()
+    seen.add(id(tracked))
+    for obj in tracked:
+        visit(obj)
+        for referent in gc.get_referents(obj):
+            visit(referent)
+    del tracked
+
+    short_repr = reprlib.Repr()
+    short_repr.maxstring = short_repr.maxother = 120
+    objects = []
+    for size, _, obj in sorted(heap, key=lambda item: item[0], reverse=True):
+        entry = {"type": _type_name(obj), "size_kb": round(size / 1024, 1)}
+        try:
+            entry["length"] = len(obj)
+        except Exception:
+            pass
+        if include_repr:
+            try:
+                entry["repr"] = short_repr.repr(obj)
+            except Exception as e:
+                entry["repr"] = f"<repr ni uspel: {e}>"
+        objects.append(entry)
+    heap.clear()
+
+    types = sorted(by_type.items(), key=lambda item: item[1][1], reverse=True)
+    return {
+        "objects_scanned": len(seen) - 1,
+        "largest": objects,
+        "by_type": [
+            {"type": name, "count": count, "size_kb": round(total / 1024, 1)}
+            for name, (count, total) in types[:limit]
+        ]
+    }
+
+
+# Globalni sledilnik pomnilnika (singleton)
+memory_tracker = MemoryTracker()
@@ -0,0 +1,120 @@
+"""
+Pomožne funkcije za pretočni izvoz - NDJSON in Parquet po kosih
+"""
+from typing import Any, Dict, List, Optional
+
+from app.utils.serialization import dumps
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    # pyarrow paket ni nameščen - izvoz v Parquet ni na voljo
+
+
+# Arrow tipi stolpcev - tipi morajo biti enaki v vseh row groupih
+_INT_COLUMNS = {"tokens_used", "input_tokens", "output_tokens", "max_length", "summary_length"}
+_FLOAT_COLUMNS = {
+    "response_time_ms", "cost_usd", "average_response_time", "total_cost",
+    "compression_ratio", "source_rouge1_precision", "source_rouge2_precision",
+    "consensus_rouge_l", "quality_score"
+}
+_TIMESTAMP_COLUMNS = {"created_at", "updated_at"}
+
+
+def ndjson_chunk(rows: List[Dict[str, Any]], checkpoint: Optional[str] = None) -> bytes:
+    """
+    Serializira kos vrstic v NDJSON
+
+    Args:
+        rows: Vrstice kosa
+        checkpoint: Kurzor zadnje vrstice - doda se kot vrstica {"_checkpoint": ...}
+
+    Returns:
+        Bytes z eno JSON vrstico na zapis
+    """
+    lines = [dumps(row) for row in rows]
+    if checkpoint:
+        lines.append(dumps({"_checkpoint": checkpoint}))
+    lines.append(b"")
+    return b"\n".join(lines)
+
+
+def arrow_schema(columns: List[str]) -> "pa.Schema":
+    """Zgradi Arrow shemo za izbrane stolpce"""
+    fields = []
+    for column in columns:
+        if column in _INT_COLUMNS:
+            fields.append(pa.field(column, pa.int64()))
+        elif column in _FLOAT_COLUMNS:
+            fields.append(pa.field(column, pa.float64()))
+        elif column in _TIMESTAMP_COLUMNS:
+            fields.append(pa.field(column, pa.timestamp("us", tz="UTC")))
+        else:
+            # Besedila in UUID-ji
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+class _ChunkSink:
+    """Datoteki podoben objekt, ki zbira zapisane bytes do naslednjega drain()"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._parts.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class ParquetStreamWriter:
+    """
+    Piše Parquet po row groupih in sproti vrača zapisane bytes
+
+    V pomnilniku je vedno samo en kos vrstic; footer se zapiše ob close().
+    """
+
+    def __init__(self, columns: List[str]):
+        if not PYARROW_AVAILABLE:
+            raise ValueError("pyarrow paket ni nameščen. Namestite z: pip install pyarrow")
+        self.columns = columns
+        self.schema = arrow_schema(columns)
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> bytes:
+        """Zapiše kos vrstic kot en row group in vrne nove bytes"""
+        arrays = []
+        for field in self.schema:
+            values = [row.get(field.name) for row in rows]
+            if pa.types.is_timestamp(field.type):
+                arrays.append(pa.array(values, type=pa.string()).cast(field.type))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Zapiše footer in vrne preostale bytes"""
+        self._writer.close()
+        return self._sink.drain()
@@ -0,0 +1,106 @@
+"""
+Inkrementalno izluščanje besedila iz naloženih datotek (.txt, .md, .html, .pdf)
+
+Datoteka se bere po kosih iz začasne (spooled) datoteke, zato je v pomnilniku
+samo izluščeno besedilo in en kos surovih bytes.
+"""
+import codecs
+from html.parser import HTMLParser
+from typing import BinaryIO, List
+
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+    # pypdf paket ni nameščen - PDF datoteke niso podprte
+
+READ_CHUNK_BYTES = 64 * 1024
+
+SUPPORTED_EXTENSIONS = (".txt", ".md", ".html", ".htm", ".pdf")
+
+
+class _TextExtractor(HTMLParser):
+    """HTML parser, ki zbira vidno besedilo (brez script/style)"""
+
+    _SKIP_TAGS = {"script", "style", "noscript", "template", "head"}
+    _BLOCK_TAGS = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section", "article"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def _iter_decoded(file: BinaryIO):
+    """Bere datoteko po kosih in jih sproti dekodira iz UTF-8"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    while True:
+        chunk = file.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def _extract_plain(file: BinaryIO) -> str:
+    return "".join(_iter_decoded(file))
+
+
+def _extract_html(file: BinaryIO) -> str:
+    parser = _TextExtractor()
+    for text in _iter_decoded(file):
+        parser.feed(text)
+    parser.close()
+    # Strni prazne vrstice, ki jih pustijo bločni elementi
+    lines = (line.strip() for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _extract_pdf(file: BinaryIO) -> str:
+    if not PYPDF_AVAILABLE:
+        raise ValueError("PDF datoteke niso podprte - pypdf paket ni nameščen")
+    reader = PdfReader(file)
+    # Stran za stranjo - PdfReader bere objekte iz datoteke po potrebi
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_text(file: BinaryIO, filename: str) -> str:
+    """
+    Izlušči besedilo iz naložene datoteke
+
+    Args:
+        file: Binarna datoteka (npr. SpooledTemporaryFile iz UploadFile)
+        filename: Ime datoteke - končnica določa format
+
+    Returns:
+        Izluščeno besedilo
+
+    Raises:
+        ValueError: Če format ni podprt
+    """
+    name = (filename or "").lower()
+    file.seek(0)
+    if name.endswith((".txt", ".md")):
+        return _extract_plain(file)
+    if name.endswith((".html", ".htm")):
+        return _extract_html(file)
+    if name.endswith(".pdf"):
+        return _extract_pdf(file)
+    raise ValueError(f"Format datoteke ni podprt. Podprti formati: {', '.join(SUPPORTED_EXTENSIONS)}")
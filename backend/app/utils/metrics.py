@@ -1,8 +1,29 @@
 """
 Pomožne funkcije za merjenje metrik
 """
-from typing import List
-from app.schemas.summary import SummaryResponse, ComparisonResult
+import math
+import re
+import statistics
+import time
+from itertools import combinations
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.models.database import ModelRollup
+from app.schemas.summary import (
+    SummaryResponse,
+    ComparisonResult,
+    DistributionStats,
+    ModelBenchmark,
+    PairwiseTest,
+    BenchmarkReport,
+    ModelQuality,
+    PairwiseRouge,
+    QualityReport
+)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
 
 
 def calculate_comparison(results: List[SummaryResponse]) -> ComparisonResult:
@@ -36,3 +57,351 @@ def calculate_comparison(results: List[SummaryResponse]) -> ComparisonResult:
         average_response_time=avg_time,
         total_cost=total_cost
     )
+
+
+def _token_ids(text: str, vocab: Dict[str, int]) -> np.ndarray:
+    """Pretvori besedilo v vektor ID-jev besed (skupni slovar za vse tekste)"""
+    words = _WORD_RE.findall(text.lower())
+    return np.fromiter(
+        (vocab.setdefault(w, len(vocab)) for w in words), dtype=np.int64, count=len(words)
+    )
+
+
+def _ngram_counts(ids: np.ndarray, n: int, vocab_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Vrne (unikatni n-grami, števila) - n-gram je kodiran kot eno int64 število"""
+    if len(ids) < n:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    codes = ids[:len(ids) - n + 1].copy()
+    for k in range(1, n):
+        codes = codes * vocab_size + ids[k:len(ids) - n + 1 + k]
+    return np.unique(codes, return_counts=True)
+
+
+def _overlap(a: Tuple[np.ndarray, np.ndarray], b: Tuple[np.ndarray, np.ndarray]) -> int:
+    """Število skupnih n-gramov (s clippingom na manjše število)"""
+    _, ia, ib = np.intersect1d(a[0], b[0], assume_unique=True, return_indices=True)
+    return int(np.minimum(a[1][ia], b[1][ib]).sum())
+
+
+def _f1(overlap: int, total_a: int, total_b: int) -> float:
+    """F1 iz overlapa in števila n-gramov na obeh straneh"""
+    if overlap == 0 or total_a == 0 or total_b == 0:
+        return 0.0
+    precision = overlap / total_a
+    recall = overlap / total_b
+    return 2 * precision * recall / (precision + recall)
+
+
+def _lcs_length(a: Sequence[int], b: Sequence[int]) -> int:
+    """
+    Dolžina najdaljšega skupnega podzaporedja (bit-paralelni algoritem, Hyyrö)
+
+    Vsaka vrstica DP tabele je predstavljena kot en Python int, zato je
+    časovna zahtevnost O(len(b) * len(a) / velikost besede).
+    """
+    if not a or not b:
+        return 0
+    masks: Dict[int, int] = {}
+    for i, token in enumerate(a):
+        masks[token] = masks.get(token, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    v = full
+    for token in b:
+        u = v & masks.get(token, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(a) - bin(v).count("1")
+
+
+def source_overlap(source_text: str, summary: str) -> float:
+    """Delež unigramov povzetka, ki se pojavijo v viru (ROUGE-1 precision)"""
+    vocab: Dict[str, int] = {}
+    summary_ids = _token_ids(summary, vocab)
+    if len(summary_ids) == 0:
+        return 0.0
+    source_ids = _token_ids(source_text, vocab)
+    vocab_size = max(len(vocab), 1)
+    return _overlap(
+        _ngram_counts(summary_ids, 1, vocab_size), _ngram_counts(source_ids, 1, vocab_size)
+    ) / len(summary_ids)
+
+
+def calculate_quality(source_text: str, results: List[SummaryResponse]) -> QualityReport:
+    """
+    Izračuna kakovostne metrike primerjave
+
+    - kompresijsko razmerje (besede povzetka / besede vira)
+    - prekrivanje povzetka z virom (ROUGE-1/2 precision)
+    - ROUGE-1/2/L F1 med pari povzetkov
+
+    Args:
+        source_text: Originalno besedilo
+        results: Seznam SummaryResponse objektov
+
+    Returns:
+        QualityReport
+    """
+    start = time.perf_counter()
+    vocab: Dict[str, int] = {}
+    summary_ids = [_token_ids(r.summary or "", vocab) for r in results]
+    source_ids = _token_ids(source_text, vocab)
+    vocab_size = max(len(vocab), 1)
+
+    summary_grams = [
+        {n: _ngram_counts(ids, n, vocab_size) for n in (1, 2)} for ids in summary_ids
+    ]
+    source_grams = {n: _ngram_counts(source_ids, n, vocab_size) for n in (1, 2)}
+
+    pairwise: List[PairwiseRouge] = []
+    consensus: List[List[float]] = [[] for _ in results]
+    for i, j in combinations(range(len(results)), 2):
+        rouge = {}
+        for n in (1, 2):
+            rouge[n] = _f1(
+                _overlap(summary_grams[i][n], summary_grams[j][n]),
+                max(len(summary_ids[i]) - n + 1, 0),
+                max(len(summary_ids[j]) - n + 1, 0)
+            )
+        rouge_l = _f1(
+            _lcs_length(summary_ids[i].tolist(), summary_ids[j].tolist()),
+            len(summary_ids[i]),
+            len(summary_ids[j])
+        )
+        consensus[i].append(rouge_l)
+        consensus[j].append(rouge_l)
+        pairwise.append(PairwiseRouge(
+            model_a=results[i].model,
+            model_b=results[j].model,
+            rouge1=rouge[1],
+            rouge2=rouge[2],
+            rouge_l=rouge_l
+        ))
+
+    models: List[ModelQuality] = []
+    for idx, result in enumerate(results):
+        length = len(summary_ids[idx])
+        precision = {
+            n: _overlap(summary_grams[idx][n], source_grams[n]) / (length - n + 1)
+            if length >= n else 0.0
+            for n in (1, 2)
+        }
+        consensus_l = float(np.mean(consensus[idx])) if consensus[idx] else 0.0
+        models.append(ModelQuality(
+            model=result.model,
+            compression_ratio=length / len(source_ids) if len(source_ids) else 0.0,
+            source_rouge1_precision=precision[1],
+            source_rouge2_precision=precision[2],
+            consensus_rouge_l=consensus_l,
+            quality_score=(consensus_l + precision[2]) / 2
+        ))
+
+    best = max(models, key=lambda m: m.quality_score) if models else None
+    return QualityReport(
+        models=models,
+        pairwise=pairwise,
+        best_quality=best.model if best else None,
+        time_ms=(time.perf_counter() - start) * 1000
+    )
+
+
+def _rollup_stats(buckets: List[ModelRollup]) -> Dict[str, Any]:
+    """Združi več agregatov istega modela v eno statistiko"""
+    count = sum(b.result_count for b in buckets)
+    quality_count = sum(b.quality_count for b in buckets)
+    mins = [b.min_response_time_ms for b in buckets if b.min_response_time_ms is not None]
+    maxs = [b.max_response_time_ms for b in buckets if b.max_response_time_ms is not None]
+    total_cost = sum(b.sum_cost_usd for b in buckets)
+    return {
+        "count": count,
+        "avg_response_time_ms": sum(b.sum_response_time_ms for b in buckets) / count if count else None,
+        "min_response_time_ms": min(mins) if mins else None,
+        "max_response_time_ms": max(maxs) if maxs else None,
+        "avg_cost_usd": total_cost / count if count else None,
+        "total_cost_usd": total_cost,
+        "avg_tokens_used": sum(b.sum_tokens_used for b in buckets) / count if count else None,
+        "times_fastest": sum(b.times_fastest for b in buckets),
+        "times_cheapest": sum(b.times_cheapest for b in buckets),
+        "avg_quality_score": sum(b.sum_quality_score for b in buckets) / quality_count if quality_count else None
+    }
+
+
+def merge_rollups(rollups: List[ModelRollup]) -> List[Dict[str, Any]]:
+    """
+    Združi časovne agregate v trende po modelih
+
+    Args:
+        rollups: Agregati (model_rollups), urejeni po bucket_start
+
+    Returns:
+        Za vsak model: skupna statistika okna in časovna vrsta po intervalih
+    """
+    by_model: Dict[str, List[ModelRollup]] = {}
+    for rollup in rollups:
+        by_model.setdefault(rollup.model_name, []).append(rollup)
+
+    trends = []
+    for model_name, buckets in by_model.items():
+        trends.append({
+            "model_name": model_name,
+            "provider": buckets[0].provider,
+            "totals": _rollup_stats(buckets),
+            "series": [
+                {"bucket_start": b.bucket_start, **_rollup_stats([b])} for b in buckets
+            ]
+        })
+    return sorted(trends, key=lambda t: t["model_name"])
+
+
+def _median_ci(values: List[float], confidence: float) -> Tuple[float, float]:
+    """
+    Interval zaupanja za mediano iz vrstilnih statistik (brez predpostavk o porazdelitvi)
+
+    Meji sta x_(k) in x_(n-k+1), kjer je k največji, da P(Bin(n, 0.5) < k) <= alfa/2.
+    Pri premalo meritvah (n < 6 za 95 %) je interval kar [min, max].
+    """
+    n = len(values)
+    tail = (1 - confidence) / 2
+    cdf = 0.0
+    k = 0
+    for i in range(n + 1):
+        p = math.comb(n, i) / 2 ** n
+        if cdf + p > tail:
+            break
+        cdf += p
+        k = i + 1
+    if k == 0:
+        return values[0], values[-1]
+    return values[k - 1], values[n - k]
+
+
+def describe(values: List[float], confidence: float = 0.95) -> DistributionStats:
+    """Mediana, kvartili in interval zaupanja za mediano"""
+    ordered = sorted(values)
+    if len(ordered) > 1:
+        q1, _, q3 = statistics.quantiles(ordered, n=4, method="inclusive")
+    else:
+        q1 = q3 = ordered[0]
+    ci_low, ci_high = _median_ci(ordered, confidence)
+    return DistributionStats(
+        n=len(ordered),
+        mean=statistics.fmean(ordered),
+        median=statistics.median(ordered),
+        q1=q1,
+        q3=q3,
+        iqr=q3 - q1,
+        ci_low=ci_low,
+        ci_high=ci_high,
+        min=ordered[0],
+        max=ordered[-1]
+    )
+
+
+def mann_whitney_u(a: List[float], b: List[float]) -> float:
+    """
+    Dvostranski Mann-Whitney U test (normalna aproksimacija s popravkom za vezi)
+
+    Returns:
+        p-vrednost za hipotezo, da sta porazdelitvi enaki
+    """
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+    combined = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    n = n1 + n2
+    rank_sum_a = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1  # Povprečen rang skupine vezi
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        rank_sum_a += rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 0)
+        i = j + 1
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    mean_u = n1 * n2 / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0
+    z = max(abs(u - mean_u) - 0.5, 0.0) / sigma
+    return math.erfc(z / math.sqrt(2))
+
+
+def holm(p_values: List[float]) -> List[float]:
+    """Holm-Bonferronijev popravek za več hkratnih testov"""
+    m = len(p_values)
+    order = sorted(range(m), key=lambda i: p_values[i])
+    adjusted = [0.0] * m
+    running = 0.0
+    for rank, i in enumerate(order):
+        running = max(running, min(1.0, (m - rank) * p_values[i]))
+        adjusted[i] = running
+    return adjusted
+
+
+def calculate_benchmark(
+    samples: Dict[str, List[SummaryResponse]],
+    errors: Dict[str, int],
+    trials: int,
+    warmup: int,
+    concurrency: int,
+    duration_ms: float,
+    confidence: float = 0.95
+) -> BenchmarkReport:
+    """
+    Statistika ponovljenih klicev modelov
+
+    Najhitrejši model se razglasi samo, če je njegova latenca značilno nižja
+    (Mann-Whitney U, Holm popravek, alfa = 1 - confidence) od vseh ostalih.
+
+    Args:
+        samples: Uspešni rezultati po modelih (brez ogrevalnih klicev)
+        errors: Število neuspelih klicev po modelih
+        trials, warmup, concurrency: Parametri benchmarka
+        duration_ms: Skupni čas benchmarka
+        confidence: Stopnja zaupanja
+    """
+    latencies = {m: [r.metrics.response_time_ms for r in rs] for m, rs in samples.items()}
+    models = [
+        ModelBenchmark(
+            model=model,
+            trials=len(results),
+            errors=errors.get(model, 0),
+            latency_ms=describe(latencies[model], confidence),
+            cost_usd=describe([r.metrics.cost_usd for r in results], confidence)
+        )
+        for model, results in samples.items()
+    ]
+
+    leader = min(models, key=lambda m: m.latency_ms.median)
+    others = [m for m in models if m.model != leader.model]
+    p_values = [mann_whitney_u(latencies[leader.model], latencies[m.model]) for m in others]
+    adjusted = holm(p_values)
+    alpha = 1 - confidence
+    tests = [
+        PairwiseTest(
+            model_a=leader.model,
+            model_b=other.model,
+            median_diff_ms=other.latency_ms.median - leader.latency_ms.median,
+            p_value=p,
+            p_adjusted=p_adj,
+            significant=p_adj < alpha and other.latency_ms.median > leader.latency_ms.median
+        )
+        for other, p, p_adj in zip(others, p_values, adjusted)
+    ]
+    significant = bool(tests) and all(t.significant for t in tests)
+
+    return BenchmarkReport(
+        trials=trials,
+        warmup=warmup,
+        concurrency=concurrency,
+        confidence=confidence,
+        models=models,
+        tests=tests,
+        fastest=leader.model if significant else None,
+        fastest_significant=significant,
+        total_cost_usd=sum(r.metrics.cost_usd for rs in samples.values() for r in rs),
+        duration_ms=duration_ms
+    )
@@ -0,0 +1,123 @@
+"""
+Pakiranje več kratkih besedil v en klic modela
+
+Pri kratkih besedilih (nekaj sto znakov) strošek klica obvladujejo
+sistemski prompt, navodila in HTTP povratna pot. Pakiranje združi več
+besedil v en strukturiran prompt, model pa vrne JSON s povzetkom za
+vsako besedilo:
+    {"summaries": [{"id": 1, "summary": "..."}, ...]}
+"""
+import json
+import re
+from typing import Dict, List, Optional, Sequence
+
+from app.utils.compression import estimate_tokens
+
+# Tokeni ovojnice na dokument (oznake v promptu, JSON ključi v odgovoru)
+DOCUMENT_OVERHEAD_TOKENS = 24
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def pack_documents(
+    texts: Sequence[str],
+    token_budget: int,
+    max_documents: int,
+    max_document_tokens: int
+) -> List[List[int]]:
+    """
+    Razdeli besedila v skupine do token_budget vhodnih tokenov (po vrstnem redu)
+
+    Besedila nad max_document_tokens dobijo svojo skupino - zanje se
+    pakiranje ne splača in bi le povečalo tveganje za odrezan odgovor.
+
+    Returns:
+        Seznami indeksov besedil; skupina z enim indeksom gre v navaden klic
+    """
+    groups: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text) + DOCUMENT_OVERHEAD_TOKENS
+        if tokens > max_document_tokens:
+            groups.append([index])
+            continue
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_documents):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def build_packed_prompt(texts: Sequence[str], max_length: Optional[int] = None) -> str:
+    """Prompt z oštevilčenimi besedili in navodilom za JSON odgovor"""
+    parts = [
+        f"Povzemi vsako od naslednjih {len(texts)} besedil posebej v slovenščini. "
+        "Vsak povzetek naj bo jasen in jedrnat in naj vsebuje samo vsebino svojega besedila."
+    ]
+    if max_length:
+        parts.append(f"Vsak povzetek naj bo največ {max_length} znakov dolg.")
+    parts.append(
+        'Odgovori samo z JSON objektom brez dodatnega besedila: '
+        '{"summaries": [{"id": 1, "summary": "..."}, ...]} - en element za vsak id.'
+    )
+    for number, text in enumerate(texts, start=1):
+        parts.append(f'<besedilo id="{number}">\n{text}\n</besedilo>')
+    return "\n\n".join(parts)
+
+
+def parse_packed_response(content: str, count: int) -> Dict[int, str]:
+    """
+    Razčleni JSON odgovor pakiranega klica
+
+    Returns:
+        Povzetki po indeksu besedila (0..count-1); manjkajoči ali neveljavni
+        elementi niso vključeni - zanje se izvede navaden klic
+    """
+    if not content:
+        return {}
+    content = _FENCE.sub("", content.strip())
+    start, end = content.find("{"), content.rfind("}")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(content[start:end + 1])
+    except ValueError:
+        return {}
+
+    items = data.get("summaries") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return {}
+    summaries: Dict[int, str] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("id")) - 1
+        except (TypeError, ValueError):
+            continue
+        summary = item.get("summary")
+        if 0 <= index < count and index not in summaries and isinstance(summary, str) and summary.strip():
+            summaries[index] = summary.strip()
+    return summaries
+
+
+def split_tokens(total: int, weights: Sequence[float]) -> List[int]:
+    """
+    Razdeli total tokenov sorazmerno z utežmi (največji ostanki) - vsota je točno total
+    """
+    weight_sum = sum(weights)
+    if not weights:
+        return []
+    if weight_sum <= 0:
+        weights = [1.0] * len(weights)
+        weight_sum = float(len(weights))
+    exact = [total * weight / weight_sum for weight in weights]
+    shares = [int(value) for value in exact]
+    remainder = total - sum(shares)
+    for index in sorted(range(len(exact)), key=lambda i: exact[i] - shares[i], reverse=True)[:remainder]:
+        shares[index] += 1
+    return shares
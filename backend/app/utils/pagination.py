@@ -0,0 +1,44 @@
+"""
+Pomožne funkcije za keyset (kurzor) paginacijo po (created_at, id)
+"""
+import base64
+import re
+from typing import Tuple
+from uuid import UUID
+
+# ISO časovni žig, kot ga vrne PostgREST (npr. 2024-01-08T12:00:00.12345+00:00)
+_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """
+    Zakodira zadnjo vrstico strani v neprozoren kurzor
+
+    Args:
+        created_at: ISO časovni žig zadnje vrstice
+        row_id: UUID zadnje vrstice
+
+    Returns:
+        URL-safe base64 niz
+    """
+    raw = f"{created_at}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Odkodira kurzor nazaj v (created_at, id)
+
+    Raises:
+        ValueError: Če kurzor ni veljaven
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        # Validacija - prepreči vrivanje poljubnih filtrov v PostgREST poizvedbo
+        if not _TIMESTAMP_RE.match(created_at):
+            raise ValueError(created_at)
+        UUID(row_id)
+    except Exception:
+        raise ValueError("Neveljaven kurzor")
+    return created_at, row_id
@@ -0,0 +1,42 @@
+"""
+Pomožne funkcije za serializacijo odgovorov - en prehod za HTTP odgovor in bazo
+"""
+from typing import Any, Dict
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    # orjson paket ni nameščen - uporabi standardni JSON encoder
+
+
+# Razred odgovora za vse endpointe - orjson zna datetime, UUID in numpy tipe sam
+FastJSONResponse = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+
+
+def to_payload(model: BaseModel) -> Dict[str, Any]:
+    """
+    Pretvori Pydantic model v JSON-ready slovar (datetime -> ISO string)
+
+    Isti slovar se uporabi za HTTP odgovor in za zapis v bazo, zato se
+    rezultat serializira samo enkrat.
+
+    Args:
+        model: Pydantic model (npr. SummaryResponse, ComparisonResponse)
+
+    Returns:
+        Slovar, ki vsebuje samo JSON tipe
+    """
+    return model.model_dump(mode="json")
+
+
+def dumps(data: Any) -> bytes:
+    """Serializira podatke v JSON bytes - orjson če je na voljo"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    import json
+    return json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
@@ -0,0 +1,70 @@
+"""
+Tokenizacija za iskanje - slovenske besede, brez šumnikov in z lahkim krnjenjem
+
+Besede se pretvorijo v male črke, šumniki se poenostavijo (č -> c, š -> s,
+ž -> z), da iskanje deluje tudi z angleško tipkovnico, in odreže se
+najpogostejše pregibne končnice (hiša, hiše, hišami -> his).
+"""
+import re
+from functools import lru_cache
+from typing import List
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+_FOLD = str.maketrans("čćšžđàáâäèéêëìíîïòóôöùúûü", "ccszdaaaaeeeeiiiioooouuuu")
+
+# Pogoste slovenske (in angleške) besede brez pomena za iskanje - že poenostavljene
+STOPWORDS = frozenset("""
+a ali ampak bi bil bila bile bili bilo biti bo bodo bom bos bova ce da do ga je jih
+jo ju k kaj kako kar kateri ki ko kot le lahko med mu na nad ne ni nje njega njen
+njih njo o ob od oz pa po pod pri s sa saj se sem si smo so ste ta tako tam te tega
+tej tem temu ter ti tisto to tudi v vec vendar vsa vse z za ze
+an and are as at be by for from has have in is it its of on or that the this to was
+were will with
+""".split())
+
+# Pregibne končnice, najdaljše najprej - krn mora ostati vsaj MIN_STEM znakov
+_SUFFIXES = sorted({
+    "ijami", "ami", "ama", "ega", "emu", "imi", "ima", "ovi", "ove", "ova",
+    "ih", "im", "om", "em", "ov", "ev", "ah", "ja", "ju", "ji", "je", "jo",
+    "ati", "iti", "eti", "ajo", "ejo", "ijo", "amo", "emo", "imo", "ate", "ete", "ite",
+    "a", "e", "i", "o", "u"
+}, key=len, reverse=True)
+
+MIN_STEM = 3
+MAX_TOKEN_LENGTH = 40
+
+
+@lru_cache(maxsize=200_000)
+def normalize(word: str) -> str:
+    """Male črke, brez šumnikov in brez pregibne končnice ('' za stop besede)"""
+    word = word.lower().translate(_FOLD)
+    if word in STOPWORDS:
+        return ""
+    if word.isdigit():
+        return word
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Razbije besedilo na iskalne izraze
+
+    Args:
+        text: Poljubno besedilo (povzetek ali poizvedba)
+
+    Returns:
+        Normalizirani izrazi v vrstnem redu pojavitve, brez stop besed
+    """
+    terms = []
+    for match in _WORD_RE.finditer(text):
+        word = match.group()
+        if len(word) > MAX_TOKEN_LENGTH:
+            continue
+        term = normalize(word)
+        if term:
+            terms.append(term)
+    return terms
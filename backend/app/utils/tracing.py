@@ -0,0 +1,252 @@
+"""
+Lahko sledenje faz zahteve - Server-Timing glave in vzorčeni trace zapisi
+
+Uporaba:
+    with span("comparison"):
+        ...
+    result = await traced("provider", coro, desc="gpt-4o")
+
+Če za trenutno zahtevo ni aktivnega trace-a (Server-Timing izklopljen in
+zahteva ni vzorčena), span() vrne deljen no-op objekt - brez alokacij.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+# Server-Timing ime metrike mora biti HTTP token
+_METRIC_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+# Kontrolni znaki (razen tabulatorja) v quoted-string niso dovoljeni
+_DESC_UNSAFE_RE = re.compile(r"[\x00-\x08\x0a-\x1f\x7f]")
+
+
+def _quoted(value: str) -> str:
+    """HTTP quoted-string - \\ in " se ubežita, kontrolni znaki odstranijo"""
+    value = _DESC_UNSAFE_RE.sub("", value)
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class Span:
+    """Ena faza zahteve"""
+    __slots__ = ("trace", "name", "desc", "start", "end", "attributes")
+
+    def __init__(self, trace: "Trace", name: str, desc: Optional[str] = None):
+        self.trace = trace
+        self.name = name
+        self.desc = desc
+        self.start = 0.0
+        self.end = 0.0
+        self.attributes: Dict[str, Any] = {}
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.trace.spans.append(self)
+
+
+class _NoopSpan:
+    """Span, ki ne naredi ničesar - ko sledenje ni aktivno"""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Vse faze ene HTTP zahteve"""
+
+    def __init__(self, name: str, sampled: bool):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.sampled = sampled
+        self.start_wall = time.time()
+        self.start = time.perf_counter()
+        self.end = 0.0
+        self.spans: List[Span] = []
+        self.attributes: Dict[str, Any] = {}
+
+    def finish(self) -> None:
+        self.end = time.perf_counter()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end or time.perf_counter()
+        return (end - self.start) * 1000
+
+    def server_timing(self) -> str:
+        """Vrne vrednost Server-Timing glave (vključno s 'total')"""
+        parts = []
+        for s in self.spans:
+            entry = f"{_METRIC_NAME_RE.sub('_', s.name)};dur={s.duration_ms:.2f}"
+            if s.desc:
+                entry += f";desc={_quoted(s.desc)}"
+            parts.append(entry)
+        parts.append(f"total;dur={self.duration_ms:.2f}")
+        return ", ".join(parts)
+
+    def to_record(self) -> Dict[str, Any]:
+        """Strukturiran zapis za datoteko (JSON Lines)"""
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.start_wall,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "spans": [
+                {
+                    "name": s.name,
+                    "desc": s.desc,
+                    "offset_ms": round((s.start - self.start) * 1000, 3),
+                    "duration_ms": round(s.duration_ms, 3),
+                    "attributes": s.attributes
+                }
+                for s in self.spans
+            ]
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Zapis v OTLP/HTTP JSON formatu (ExportTraceServiceRequest)"""
+        def nanos(perf: float) -> str:
+            return str(int((self.start_wall + (perf - self.start)) * 1e9))
+
+        def attrs(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+            return [{"key": k, "value": {"stringValue": str(v)}} for k, v in values.items()]
+
+        root_id = uuid.uuid4().hex[:16]
+        spans = [{
+            "traceId": self.trace_id,
+            "spanId": root_id,
+            "name": self.name,
+            "kind": 2,  # SERVER
+            "startTimeUnixNano": nanos(self.start),
+            "endTimeUnixNano": nanos(self.end or time.perf_counter()),
+            "attributes": attrs(self.attributes)
+        }]
+        for s in self.spans:
+            span_attrs = dict(s.attributes)
+            if s.desc:
+                span_attrs["desc"] = s.desc
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": uuid.uuid4().hex[:16],
+                "parentSpanId": root_id,
+                "name": s.name,
+                "kind": 1,  # INTERNAL
+                "startTimeUnixNano": nanos(s.start),
+                "endTimeUnixNano": nanos(s.end),
+                "attributes": attrs(span_attrs)
+            })
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": attrs({"service.name": "ai-summary-api"})},
+                "scopeSpans": [{"scope": {"name": "app.utils.tracing"}, "spans": spans}]
+            }]
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    """Vrne trace trenutne zahteve ali None"""
+    return _current_trace.get()
+
+
+def span(name: str, desc: Optional[str] = None):
+    """Context manager za merjenje ene faze (no-op, če sledenje ni aktivno)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return Span(trace, name, desc)
+
+
+async def traced(name: str, awaitable: Awaitable[T], desc: Optional[str] = None) -> T:
+    """Počaka na awaitable znotraj spana - za vzporedne klice v asyncio.gather"""
+    with span(name, desc):
+        return await awaitable
+
+
+def export_trace(trace: Trace) -> None:
+    """Zapiše vzorčen trace v datoteko ali pošlje OTLP exporterju (kliči iz threada)"""
+    try:
+        if settings.trace_exporter == "otlp":
+            import httpx
+            httpx.post(settings.otlp_endpoint, json=trace.to_otlp(), timeout=5.0)
+        else:
+            line = json.dumps(trace.to_record(), ensure_ascii=False)
+            directory = os.path.dirname(settings.trace_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(settings.trace_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except Exception as e:
+        print(f"Napaka pri izvozu trace zapisa: {e}")
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware - odpre trace za vsako HTTP zahtevo, doda Server-Timing
+    glavo in vzorčene zahteve izvozi v ozadju
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sampled = settings.trace_sample_rate > 0 and random.random() < settings.trace_sample_rate
+        if not sampled and not settings.server_timing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}", sampled)
+        token = _current_trace.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                trace.attributes["http.status_code"] = message["status"]
+                if settings.server_timing_enabled:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1", "replace")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            trace.finish()
+            if sampled:
+                asyncio.get_running_loop().run_in_executor(None, export_trace, trace)
@@ -0,0 +1,125 @@
+"""
+Benchmark pakiranja kratkih besedil (/api/summary/batch)
+
+Primerja navadne klice (en klic na besedilo) s pakiranimi klici na
+simuliranem providerju: latenca = povratna pot + čas generiranja izhodnih
+tokenov, omejeno število sočasnih klicev (rate limit), cene gpt-4o-mini.
+Pri deležu neuspelih razčlenitev > 0 se izmeri tudi cena fallbacka.
+
+Zagon (iz mape backend):
+    python -m benchmarks.bench_packing [število_besedil]
+"""
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from typing import Optional
+
+from app.schemas.summary import SummaryResponse
+from app.services.llm_service import LLMService, Completion
+from app.services.packing_service import PackingService
+from app.utils.compression import estimate_tokens
+
+ROUND_TRIP_S = 0.4
+PER_OUTPUT_TOKEN_S = 0.01
+SYSTEM_TOKENS = 40
+CONCURRENCY = 4
+# Simulirani čas je skrajšan, da benchmark teče nekaj sekund
+TIME_SCALE = 0.05
+
+_DOCUMENT = re.compile(r'<besedilo id="(\d+)">\n(.*?)\n</besedilo>', re.S)
+_WORDS = ("vlada", "zakon", "podjetje", "poročilo", "občina", "projekt", "sredstva", "leto", "svet", "odločitev")
+
+
+class SimulatedService(LLMService):
+    """Provider s fiksno povratno potjo in časom na izhodni token"""
+
+    provider = "Simulated"
+
+    def __init__(self, failure_rate: float = 0.0, seed: int = 7):
+        super().__init__("gpt-4o-mini", "")
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.slots = asyncio.Semaphore(CONCURRENCY)
+
+    @staticmethod
+    def _summarize(text: str) -> str:
+        return text[:max(40, len(text) // 4)]
+
+    async def complete(self, prompt: str, max_tokens: int) -> Completion:
+        documents = _DOCUMENT.findall(prompt)
+        if documents:
+            items = [{"id": int(number), "summary": self._summarize(text)} for number, text in documents]
+            content = json.dumps({"summaries": items}, ensure_ascii=False)
+            if self.rng.random() < self.failure_rate:
+                content = content[:len(content) // 2]  # Odrezan / neveljaven JSON
+        else:
+            content = self._summarize(prompt.split("\n\n", 1)[-1])
+        output_tokens = min(max_tokens, estimate_tokens(content))
+
+        async with self.slots:
+            start_time = self._measure_time()
+            await asyncio.sleep((ROUND_TRIP_S + output_tokens * PER_OUTPUT_TOKEN_S) * TIME_SCALE)
+        return Completion(
+            content, "stop", estimate_tokens(prompt) + SYSTEM_TOKENS, output_tokens,
+            start_time, self._measure_time()
+        )
+
+    async def generate_summary(self, text: str, max_length: Optional[int] = None) -> SummaryResponse:
+        max_tokens = self.max_output_tokens(max_length)
+        completion = await self.complete(f"Povzemi naslednje besedilo v slovenščini:\n\n{text}", max_tokens)
+        metrics = self._create_metrics(
+            completion.start_time, completion.end_time,
+            completion.input_tokens, completion.output_tokens, max_tokens, completion.finish_reason
+        )
+        return SummaryResponse(summary=completion.content, model=self.model_name, metrics=metrics)
+
+    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+        return input_tokens / 1_000_000 * 0.15 + output_tokens / 1_000_000 * 0.60
+
+    def get_model_info(self) -> dict:
+        return {"id": self.model_name, "provider": self.provider}
+
+
+def build_texts(count: int) -> list:
+    """Kratka besedila (200-600 znakov)"""
+    rng = random.Random(42)
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(25, 75))]
+        texts.append(" ".join(words).capitalize() + ".")
+    return texts
+
+
+async def run(texts: list, pack: bool, failure_rate: float) -> None:
+    service = SimulatedService(failure_rate)
+    packing = PackingService(
+        lambda text: service.generate_summary(text, 300),
+        lambda group: service.generate_packed(group, 300),
+        max_documents=None if pack else 1
+    )
+    start = time.perf_counter()
+    results, errors, report = await packing.run(texts)
+    elapsed = (time.perf_counter() - start) / TIME_SCALE
+    input_tokens = sum(r.metrics.input_tokens for r in results if r is not None)
+    label = f"pakirano (napake {failure_rate:.0%})" if pack else "navadni klici"
+    print(
+        f"{label:24} klici={report.calls:4}  besedil/s={len(texts) / elapsed:7.1f}  "
+        f"USD/besedilo={report.cost_per_document_usd * 1e6:7.2f}e-6  "
+        f"vhodni tokeni/besedilo={input_tokens / len(texts):6.1f}  napake={len(errors)}"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    texts = build_texts(count)
+    print(f"besedila={count}  povprečna dolžina={sum(map(len, texts)) / count:.0f} znakov  sočasnost={CONCURRENCY}")
+    asyncio.run(run(texts, pack=False, failure_rate=0.0))
+    for failure_rate in (0.0, 0.1, 0.3):
+        asyncio.run(run(texts, pack=True, failure_rate=failure_rate))
+
+
+if __name__ == "__main__":
+    main()
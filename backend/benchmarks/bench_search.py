@@ -0,0 +1,79 @@
+"""
+Benchmark lokalnega iskalnega indeksa (BM25)
+
+Zgradi sintetičen indeks, ga shrani in ponovno naloži ter izmeri čas
+iskanja nad svežimi (delta) in naloženimi (base) seznami pojavitev.
+
+Zagon (iz mape backend):
+    python -m benchmarks.bench_search [število_dokumentov]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from app.services.search_service import SearchIndex
+
+QUERIES = ["zakon vlada", "poročilo podjetja", "beseda17 beseda99 beseda4000"]
+
+
+def build_index(documents: int) -> SearchIndex:
+    """Napolni indeks s sintetičnimi povzetki (Zipfova porazdelitev besed)"""
+    rng = np.random.default_rng(42)
+    vocab = ["zakon", "vlada", "poročilo", "podjetja"] + [f"beseda{i}" for i in range(50_000)]
+    index = SearchIndex()
+    for chunk_start in range(0, documents, 10_000):
+        chunk = min(10_000, documents - chunk_start)
+        word_ids = (rng.zipf(1.3, size=(chunk, 60)) - 1) % len(vocab)
+        for offset, ids in enumerate(word_ids.tolist()):
+            i = chunk_start + offset
+            index.add(
+                "summaries" if i % 3 else "comparison_results",
+                {
+                    "id": str(uuid.uuid4()),
+                    "created_at": "2024-01-08T12:00:00+00:00",
+                    "model_name": "gpt-4o" if i % 2 else "gpt-4o-mini",
+                    "summary_text": " ".join(vocab[w] for w in ids)
+                }
+            )
+    return index
+
+
+def bench(index: SearchIndex, repeat: int) -> float:
+    """Vrne povprečen čas ene poizvedbe v milisekundah"""
+    for query in QUERIES:
+        index.search(query)  # ogrevanje
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            index.search(query, limit=20)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1000
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    start = time.perf_counter()
+    index = build_index(documents)
+    print(f"dokumenti={documents}  gradnja={time.perf_counter() - start:6.2f} s")
+    print(f"iskanje (delta) {bench(index, 20):8.2f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "index.npz")
+        start = time.perf_counter()
+        index.save(path)
+        print(f"shranjevanje={time.perf_counter() - start:6.2f} s  velikost={os.path.getsize(path) / 1e6:.1f} MB")
+
+        loaded = SearchIndex()
+        start = time.perf_counter()
+        loaded.load(path)
+        print(f"nalaganje={time.perf_counter() - start:6.2f} s")
+    print(f"iskanje (base)  {bench(loaded, 20):8.2f} ms")
+    print(loaded.get_stats())
+
+
+if __name__ == "__main__":
+    main()
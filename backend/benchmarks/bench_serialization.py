@@ -0,0 +1,96 @@
+"""
+Mikrobenchmark serializacije velikih /compare odgovorov
+
+Primerja staro pot (model_dump + ročna pretvorba datetime za bazo in ločena
+FastAPI serializacija za HTTP) z novo potjo (en model_dump(mode="json") +
+FastJSONResponse).
+
+Zagon (iz mape backend):
+    python -m benchmarks.bench_serialization
+"""
+import json
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas.summary import (
+    SummaryResponse,
+    SummaryMetrics,
+    ComparisonResponse,
+    ComparisonResult
+)
+from app.utils.serialization import FastJSONResponse, to_payload, ORJSON_AVAILABLE
+
+
+def build_payload(models: int, summary_chars: int) -> ComparisonResponse:
+    """Zgradi velik ComparisonResponse za merjenje"""
+    results = [
+        SummaryResponse(
+            summary="Povzetek besedila. " * (summary_chars // 19),
+            model=f"openai/model-{i}",
+            metrics=SummaryMetrics(
+                response_time_ms=1000.0 + i,
+                tokens_used=500 + i,
+                cost_usd=0.001 * i,
+                timestamp=datetime.now()
+            )
+        )
+        for i in range(models)
+    ]
+    return ComparisonResponse(
+        results=results,
+        comparison=ComparisonResult(
+            fastest=results[0].model,
+            cheapest=results[0].model,
+            average_response_time=1000.0,
+            total_cost=0.01
+        )
+    )
+
+
+def old_path(response: ComparisonResponse) -> bytes:
+    """Stara pot - dvojna serializacija (baza + HTTP)"""
+    results_data = []
+    for r in response.results:
+        result_dict = r.model_dump()
+        result_dict["metrics"]["timestamp"] = result_dict["metrics"]["timestamp"].isoformat()
+        results_data.append(result_dict)
+    db_row = {"results": results_data, "comparison": response.comparison.model_dump()}
+    json.dumps(db_row)  # Supabase klient zakodira vrstico pred insertom
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def new_path(response: ComparisonResponse) -> bytes:
+    """Nova pot - en prehod, isti payload za bazo in HTTP"""
+    payload = to_payload(response)
+    json.dumps(payload)  # Supabase klient zakodira vrstico pred insertom
+    return FastJSONResponse(payload).body
+
+
+def bench(fn, response: ComparisonResponse, repeat: int) -> float:
+    """Vrne povprečen čas klica v mikrosekundah"""
+    fn(response)  # ogrevanje
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(response)
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def main():
+    print(f"orjson: {'da' if ORJSON_AVAILABLE else 'ne'}")
+    for models, summary_chars in [(3, 1_000), (10, 10_000), (50, 50_000)]:
+        response = build_payload(models, summary_chars)
+        assert json.loads(old_path(response)) == json.loads(new_path(response))
+        old_us = bench(old_path, response, 200)
+        new_us = bench(new_path, response, 200)
+        print(
+            f"modeli={models:3d} znaki={summary_chars:6d}  "
+            f"staro={old_us:9.1f} µs  novo={new_us:9.1f} µs  "
+            f"pospešitev={old_us / new_us:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
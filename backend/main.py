@@ -1,14 +1,26 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.routers import summary, decision
+from app.routers import summary, decision, history, export, search, diagnostics
 from app.database import init_supabase
+from app.services.budget_service import budget_ledger
+from app.services.search_service import search_index
+from app.services.token_calibration import token_calibrator
+from app.utils.serialization import FastJSONResponse
+from app.utils.tracing import TracingMiddleware
+from app.utils.admission import AdmissionMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    budget_ledger.load(settings.budget_ledger_file)
+    persist_task = asyncio.create_task(
+        budget_ledger.persist_periodically(settings.budget_ledger_file, settings.budget_persist_interval_s)
+    )
+    
     try:
         from app.database import SUPABASE_AVAILABLE
         if SUPABASE_AVAILABLE and settings.supabase_key:
@@ -23,18 +35,37 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Napaka pri inicializaciji Supabase: {e}")
     
+    # Kalibracija izhodnih tokenov iz zadnjih shranjenih povzetkov (v ozadju)
+    calibration_task = asyncio.create_task(token_calibrator.bootstrap())
+    
+    # Iskalni indeks - naloži z diska, dopolni iz baze v ozadju
+    await asyncio.to_thread(search_index.load, settings.search_index_file)
+    search_task = asyncio.create_task(
+        search_index.maintain_periodically(settings.search_index_file, settings.search_sync_interval_s)
+    )
+    
     yield
     
-    # Shutdown (če je potrebno)
+    # Shutdown
+    persist_task.cancel()
+    search_task.cancel()
+    calibration_task.cancel()
+    budget_ledger.save(settings.budget_ledger_file)
+    search_index.save(settings.search_index_file)
 
 
 app = FastAPI(
     title="AI Summary API",
     description="Backend API for AI Summary application - Generator povzetkov z LLM modeli",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
+# Nadzor sprejema zahtev - dodan prvi, zato je najbolj notranji in
+# zavrnjeni (503) odgovori še vedno dobijo CORS in Server-Timing glave
+app.add_middleware(AdmissionMiddleware, path_prefix="/api/summary")
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -42,11 +73,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Server-Timing glave in vzorčeni trace zapisi
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(summary.router)
 app.include_router(decision.router)
+app.include_router(history.router)
+app.include_router(export.router)
+app.include_router(search.router)
+app.include_router(diagnostics.router)
 
 @app.get("/")
 def read_root():
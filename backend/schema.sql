@@ -0,0 +1,267 @@
+-- =====================================================================
+-- AI Summary - Supabase (PostgreSQL) shema
+--
+-- Tabele, ki jih uporablja backend (app/services/database_service.py),
+-- pogled comparison_analysis in indeksi, na katere se zanašajo poizvedbe.
+-- Zaženite v Supabase SQL editorju.
+-- =====================================================================
+
+-- ---------------------------------------------------------------------
+-- Tabele
+-- ---------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS summaries (
+    id                UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    original_text     TEXT NOT NULL,
+    summary_text      TEXT NOT NULL,
+    model_name        TEXT NOT NULL,
+    provider          TEXT NOT NULL,
+    response_time_ms  DOUBLE PRECISION NOT NULL,
+    tokens_used       INTEGER NOT NULL,
+    input_tokens      INTEGER,
+    output_tokens     INTEGER,
+    finish_reason     TEXT,
+    cost_usd          DOUBLE PRECISION NOT NULL,
+    max_length        INTEGER,
+    language          TEXT NOT NULL DEFAULT 'sl',
+    created_at        TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at        TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS model_comparisons (
+    id                     UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    original_text          TEXT NOT NULL,
+    comparison_data        JSONB NOT NULL,
+    fastest_model          TEXT,
+    cheapest_model         TEXT,
+    average_response_time  DOUBLE PRECISION,
+    total_cost             DOUBLE PRECISION,
+    created_at             TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS comparison_results (
+    id                UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    comparison_id     UUID NOT NULL REFERENCES model_comparisons(id) ON DELETE CASCADE,
+    model_name        TEXT NOT NULL,
+    provider          TEXT NOT NULL,
+    summary_text      TEXT,
+    response_time_ms  DOUBLE PRECISION NOT NULL,
+    tokens_used       INTEGER NOT NULL,
+    input_tokens      INTEGER,
+    output_tokens     INTEGER,
+    finish_reason     TEXT,
+    cost_usd          DOUBLE PRECISION NOT NULL,
+    summary_length    INTEGER,
+    max_length        INTEGER,
+    -- Kakovostne metrike (app/utils/metrics.py: calculate_quality)
+    compression_ratio        DOUBLE PRECISION,
+    source_rouge1_precision  DOUBLE PRECISION,
+    source_rouge2_precision  DOUBLE PRECISION,
+    consensus_rouge_l        DOUBLE PRECISION,
+    quality_score            DOUBLE PRECISION,
+    created_at        TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Benchmarki (/compare s trials > 1) - ločeno od uporabniških primerjav,
+-- zato ne vplivajo na comparison_analysis in model_rollups
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+    id                UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    original_text     TEXT NOT NULL,
+    models            TEXT[] NOT NULL,
+    trials            INTEGER NOT NULL,
+    warmup            INTEGER NOT NULL DEFAULT 0,
+    concurrency       INTEGER NOT NULL DEFAULT 1,
+    fastest_model     TEXT,            -- samo, če je razlika statistično značilna
+    total_cost_usd    DOUBLE PRECISION NOT NULL,
+    report            JSONB NOT NULL,  -- mediane, IQR, intervali zaupanja, testi
+    created_at        TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Migracija za obstoječe baze
+ALTER TABLE comparison_results
+    ADD COLUMN IF NOT EXISTS compression_ratio        DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS source_rouge1_precision  DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS source_rouge2_precision  DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS consensus_rouge_l        DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS quality_score            DOUBLE PRECISION;
+
+-- Usage podatki za kalibracijo izhodnih tokenov (app/services/token_calibration.py)
+ALTER TABLE summaries
+    ADD COLUMN IF NOT EXISTS input_tokens   INTEGER,
+    ADD COLUMN IF NOT EXISTS output_tokens  INTEGER,
+    ADD COLUMN IF NOT EXISTS finish_reason  TEXT;
+ALTER TABLE comparison_results
+    ADD COLUMN IF NOT EXISTS input_tokens   INTEGER,
+    ADD COLUMN IF NOT EXISTS output_tokens  INTEGER,
+    ADD COLUMN IF NOT EXISTS finish_reason  TEXT,
+    ADD COLUMN IF NOT EXISTS max_length     INTEGER;
+
+-- ---------------------------------------------------------------------
+-- Časovni agregati (rollupi) za /api/decision/trends
+--
+-- Ena vrstica na (granularnost, začetek intervala, model). Vrstice vzdržuje
+-- trigger ob vsakem vpisu v comparison_results, zato trendi nikoli ne
+-- berejo surovih rezultatov - samo seštejejo že agregirane intervale.
+-- ---------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS model_rollups (
+    granularity           TEXT NOT NULL CHECK (granularity IN ('hour', 'day')),
+    bucket_start          TIMESTAMPTZ NOT NULL,
+    model_name            TEXT NOT NULL,
+    provider              TEXT NOT NULL,
+    result_count          INTEGER NOT NULL DEFAULT 0,
+    sum_response_time_ms  DOUBLE PRECISION NOT NULL DEFAULT 0,
+    min_response_time_ms  DOUBLE PRECISION,
+    max_response_time_ms  DOUBLE PRECISION,
+    sum_cost_usd          DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sum_tokens_used       BIGINT NOT NULL DEFAULT 0,
+    times_fastest         INTEGER NOT NULL DEFAULT 0,
+    times_cheapest        INTEGER NOT NULL DEFAULT 0,
+    quality_count         INTEGER NOT NULL DEFAULT 0,
+    sum_quality_score     DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, model_name)
+);
+
+CREATE OR REPLACE FUNCTION update_model_rollups() RETURNS TRIGGER AS $$
+DECLARE
+    comparison model_comparisons%ROWTYPE;
+    g TEXT;
+BEGIN
+    SELECT * INTO comparison FROM model_comparisons WHERE id = NEW.comparison_id;
+
+    FOREACH g IN ARRAY ARRAY['hour', 'day'] LOOP
+        INSERT INTO model_rollups AS r (
+            granularity, bucket_start, model_name, provider,
+            result_count, sum_response_time_ms, min_response_time_ms, max_response_time_ms,
+            sum_cost_usd, sum_tokens_used, times_fastest, times_cheapest,
+            quality_count, sum_quality_score
+        ) VALUES (
+            g, date_trunc(g, NEW.created_at, 'UTC'), NEW.model_name, NEW.provider,
+            1, NEW.response_time_ms, NEW.response_time_ms, NEW.response_time_ms,
+            NEW.cost_usd, NEW.tokens_used,
+            (comparison.fastest_model = NEW.model_name)::INT,
+            (comparison.cheapest_model = NEW.model_name)::INT,
+            (NEW.quality_score IS NOT NULL)::INT, COALESCE(NEW.quality_score, 0)
+        )
+        ON CONFLICT (granularity, bucket_start, model_name) DO UPDATE SET
+            result_count         = r.result_count + 1,
+            sum_response_time_ms = r.sum_response_time_ms + EXCLUDED.sum_response_time_ms,
+            min_response_time_ms = LEAST(r.min_response_time_ms, EXCLUDED.min_response_time_ms),
+            max_response_time_ms = GREATEST(r.max_response_time_ms, EXCLUDED.max_response_time_ms),
+            sum_cost_usd         = r.sum_cost_usd + EXCLUDED.sum_cost_usd,
+            sum_tokens_used      = r.sum_tokens_used + EXCLUDED.sum_tokens_used,
+            times_fastest        = r.times_fastest + EXCLUDED.times_fastest,
+            times_cheapest       = r.times_cheapest + EXCLUDED.times_cheapest,
+            quality_count        = r.quality_count + EXCLUDED.quality_count,
+            sum_quality_score    = r.sum_quality_score + EXCLUDED.sum_quality_score;
+    END LOOP;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Napolnitev iz obstoječih rezultatov in trigger v eni transakciji: zaklep
+-- prepreči vpise v comparison_results med obema korakoma, zato se nobena
+-- vrstica ne šteje dvakrat ali izpusti. Napolni se samo prazna model_rollups
+-- (ponoven zagon skripte ne podvoji vsot).
+BEGIN;
+LOCK TABLE comparison_results IN SHARE ROW EXCLUSIVE MODE;
+
+INSERT INTO model_rollups (
+    granularity, bucket_start, model_name, provider,
+    result_count, sum_response_time_ms, min_response_time_ms, max_response_time_ms,
+    sum_cost_usd, sum_tokens_used, times_fastest, times_cheapest,
+    quality_count, sum_quality_score
+)
+SELECT
+    g.granularity,
+    date_trunc(g.granularity, r.created_at, 'UTC'),
+    r.model_name,
+    MIN(r.provider),
+    COUNT(*),
+    SUM(r.response_time_ms),
+    MIN(r.response_time_ms),
+    MAX(r.response_time_ms),
+    SUM(r.cost_usd),
+    SUM(r.tokens_used),
+    COUNT(*) FILTER (WHERE c.fastest_model = r.model_name),
+    COUNT(*) FILTER (WHERE c.cheapest_model = r.model_name),
+    COUNT(r.quality_score),
+    COALESCE(SUM(r.quality_score), 0)
+FROM comparison_results r
+JOIN model_comparisons c ON c.id = r.comparison_id
+CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+WHERE NOT EXISTS (SELECT 1 FROM model_rollups)
+GROUP BY 1, 2, 3;
+
+DROP TRIGGER IF EXISTS trg_comparison_results_rollups ON comparison_results;
+CREATE TRIGGER trg_comparison_results_rollups
+    AFTER INSERT ON comparison_results
+    FOR EACH ROW EXECUTE FUNCTION update_model_rollups();
+
+COMMIT;
+
+-- ---------------------------------------------------------------------
+-- Pogledi
+-- ---------------------------------------------------------------------
+
+CREATE OR REPLACE VIEW comparison_analysis AS
+WITH ranked AS (
+    SELECT
+        r.*,
+        RANK() OVER (PARTITION BY r.comparison_id ORDER BY r.quality_score DESC NULLS LAST) AS quality_rank
+    FROM comparison_results r
+)
+SELECT
+    r.model_name,
+    r.provider,
+    COUNT(*)                                                  AS total_comparisons,
+    AVG(r.response_time_ms)                                   AS avg_response_time_ms,
+    AVG(r.cost_usd)                                           AS avg_cost_usd,
+    AVG(r.tokens_used)                                        AS avg_tokens_used,
+    SUM(r.cost_usd)                                           AS total_cost_usd,
+    MIN(r.response_time_ms)                                   AS min_response_time_ms,
+    MAX(r.response_time_ms)                                   AS max_response_time_ms,
+    COUNT(*) FILTER (WHERE c.fastest_model = r.model_name)    AS times_fastest,
+    COUNT(*) FILTER (WHERE c.cheapest_model = r.model_name)   AS times_cheapest,
+    AVG(r.compression_ratio)                                  AS avg_compression_ratio,
+    AVG(r.source_rouge1_precision)                            AS avg_source_rouge1_precision,
+    AVG(r.source_rouge2_precision)                            AS avg_source_rouge2_precision,
+    AVG(r.consensus_rouge_l)                                  AS avg_consensus_rouge_l,
+    AVG(r.quality_score)                                      AS avg_quality_score,
+    COUNT(*) FILTER (WHERE r.quality_score IS NOT NULL AND r.quality_rank = 1)
+                                                              AS times_best_quality
+FROM ranked r
+JOIN model_comparisons c ON c.id = r.comparison_id
+GROUP BY r.model_name, r.provider;
+
+-- ---------------------------------------------------------------------
+-- Indeksi za zgodovino (/api/history)
+--
+-- Keyset paginacija sortira po (created_at DESC, id DESC) in nadaljuje s
+-- pogojem (created_at, id) < (kurzor). Vsak filter ima svoj sestavljen
+-- indeks, ki se začne s filtriranim stolpcem, zato je vsaka stran
+-- en sam "index range scan" ne glede na globino listanja.
+-- ---------------------------------------------------------------------
+
+CREATE INDEX IF NOT EXISTS idx_summaries_created_id
+    ON summaries (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_summaries_model_created_id
+    ON summaries (model_name, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_summaries_provider_created_id
+    ON summaries (provider, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_model_comparisons_created_id
+    ON model_comparisons (created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_comparison_results_comparison_id
+    ON comparison_results (comparison_id);
+CREATE INDEX IF NOT EXISTS idx_comparison_results_created_id
+    ON comparison_results (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_comparison_results_model_created_id
+    ON comparison_results (model_name, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_comparison_results_provider_created_id
+    ON comparison_results (provider, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_benchmark_runs_created_id
+    ON benchmark_runs (created_at DESC, id DESC);
@@ -29,7 +29,7 @@ export interface ComparisonRequest {
 }
 
 export interface ComparisonResult {
-  fastest: string;
+  fastest: string | null;
   cheapest: string;
   average_response_time: number;
   total_cost: number;